@@ -30,5 +30,5 @@ from .uncertainty import UncertaintyQuantification
 from .plotting import PlotUncertainty
 from .features import Features, NetworkFeatures, EfelFeatures, GeneralNetworkFeatures
 from .features import GeneralSpikingFeatures, SpikingFeatures
-from .models import Model, NeuronModel, NestModel
+from .models import Model, NeuronModel, NestModel, ExternalProcessModel
 from ._version import __version__
\ No newline at end of file
@@ -6,16 +6,54 @@ calculate features of the model, both in parallel (``RunModel`` and
 ``Parallel``), as well as the class for performing the uncertainty calculations
 (``UncertaintyCalculations``. It also contains the base classes that are
 responsible for setting and updating parameters, models and features across
-classes (``Base`` and ``ParameterBase``).
+classes (``Base`` and ``ParameterBase``), and the class that stores completed
+model evaluations so an interrupted run can be resumed (``Checkpoint``) or
+reused by later runs (``EvaluationCache``). The model evaluations are run by an
+executor (``SerialExecutor``, ``ThreadExecutor``, ``ProcessExecutor``,
+``MPIExecutor`` or ``AsyncExecutor``), and their results can be streamed to
+disk (``ResultStore``) or written directly into shared arrays by the workers
+(``ResultBuffers``).
+The run time of the model evaluations can be predicted to evaluate the most
+expensive nodes first (``RuntimePredictor``). The polynomial chaos expansions of the
+model and features are fitted to the collocation nodes with a shared least
+squares solver (``PolynomialRegression``), and the statistical metrics are
+calculated from their coefficients (``PolynomialExpansion``). The orthogonal
+polynomials and quadrature rules can be stored in a persistent cache
+(``ExpansionCache``).
 """
 
 from .base import Base, ParameterBase
-from .run_model import RunModel
+from .run_model import RunModel, ErrorBudgetExceeded
 from .uncertainty_calculations import UncertaintyCalculations
 from .parallel import Parallel
+from .checkpoint import Checkpoint
+from .evaluation_cache import EvaluationCache
+from .result_store import ResultStore
+from .result_buffers import ResultBuffers
+from .executors import Executor, SerialExecutor, ThreadExecutor, ProcessExecutor, MPIExecutor
+from .async_executor import AsyncExecutor
+from .runtime_predictor import RuntimePredictor
+from .polynomial_regression import PolynomialRegression
+from .polynomial_expansion import PolynomialExpansion
+from .expansion_cache import ExpansionCache
 
 __all__ = ["Parallel",
+           "Checkpoint",
+           "EvaluationCache",
+           "ExpansionCache",
+           "ResultStore",
+           "ResultBuffers",
+           "RuntimePredictor",
+           "PolynomialRegression",
+           "PolynomialExpansion",
+           "Executor",
+           "SerialExecutor",
+           "ThreadExecutor",
+           "ProcessExecutor",
+           "MPIExecutor",
+           "AsyncExecutor",
            "Base",
            "ParameterBase",
            "RunModel",
+           "ErrorBudgetExceeded",
            "UncertaintyCalculations"]
\ No newline at end of file
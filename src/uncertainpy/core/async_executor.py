@@ -0,0 +1,293 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import time
+import asyncio
+import traceback
+import threading
+import functools
+
+import dill
+
+from .parallel import _run_batch, EvaluationError
+from .executors import Executor, _parallel_state
+from ..utils.timer import Timer
+
+
+# The Parallel instance installed in each feature worker process
+_feature_parallel = None
+
+
+def _init_feature_worker(serialized_parallel):
+    """
+    Install a Parallel instance serialized with dill in a feature worker
+    process. The model is not set up, since the feature workers only
+    postprocess the model results and calculate the features.
+
+    Parameters
+    ----------
+    serialized_parallel : bytes
+        The Parallel instance serialized with dill.
+    """
+    global _feature_parallel
+
+    _feature_parallel = dill.loads(serialized_parallel)
+
+
+def _process_worker(model_result):
+    """
+    Postprocess a model result and calculate the features in a feature
+    worker process.
+
+    Parameters
+    ----------
+    model_result : tuple
+        The result of a model evaluation, ``(time, values, info, ...)``.
+
+    Returns
+    -------
+    result : dict
+        The model and feature results, see Parallel.run.
+    timer : Timer
+        The wall and CPU time used by each stage.
+    """
+    timer = Timer()
+    result = _feature_parallel.process(model_result, timer=timer)
+
+    return result, timer
+
+
+
+class AsyncExecutor(Executor):
+    """
+    Evaluate models with a coroutine ``async def run`` function in an asyncio
+    event loop, with up to `max_concurrent` model evaluations in flight at
+    the same time.
+
+    This is suited for models that spend their time waiting, for example on
+    an external simulator running in a subprocess, where a worker process
+    for each evaluation that is waiting wastes memory. The event loop runs in
+    a separate thread in the current process, and the postprocessing and
+    feature calculations are sent to a small pool of worker processes.
+
+    Parameters
+    ----------
+    max_concurrent : int, optional
+        The maximum number of model evaluations running at the same time.
+        Default is 32.
+    feature_workers : {None, int}, optional
+        The number of worker processes that postprocess the model results and
+        calculate the features. If None, they are calculated in the event
+        loop thread. Default is None.
+
+    Attributes
+    ----------
+    nr_workers : int
+        The maximum number of model evaluations running at the same time.
+    feature_workers : {None, int}
+        The number of worker processes calculating the features.
+    loop : asyncio.AbstractEventLoop
+        The event loop evaluating the model.
+
+    Notes
+    -----
+    Models with a regular ``run`` function are run in the default thread
+    pool of the event loop, one batch at a time, so the AsyncExecutor can be
+    used with any model.
+
+    The model is set up (``Model.setup``) in the current process, and the
+    coroutines share the model object, so the model must not store the
+    parameters of an evaluation in the model object.
+
+    Examples
+    --------
+    A model that waits on an external simulator::
+
+        class ExternalModel(un.Model):
+            async def run(self, **parameters):
+                process = await asyncio.create_subprocess_exec("simulator", ...)
+                await process.wait()
+                ...
+                return time, values
+
+        runmodel = RunModel(ExternalModel(), parameters,
+                            executor=AsyncExecutor(max_concurrent=64, feature_workers=2))
+    """
+    in_process = True
+
+    def __init__(self, max_concurrent=32, feature_workers=None):
+        super(AsyncExecutor, self).__init__()
+
+        self.nr_workers = max_concurrent
+        self.feature_workers = feature_workers
+
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._feature_pool = None
+        self._feature_pool_state = None
+
+
+    def start(self, parallel):
+        # Restart the feature workers if the model or features have changed
+        if self._feature_pool is not None and self._feature_pool_state != _parallel_state(parallel):
+            self._close_feature_pool()
+
+        self.parallel = parallel
+
+
+    @property
+    def loop(self):
+        """
+        The event loop evaluating the model. The event loop is started in a
+        separate thread the first time it is used.
+
+        Returns
+        -------
+        loop : asyncio.AbstractEventLoop
+            The event loop.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+
+            self._thread = threading.Thread(target=self._loop.run_forever)
+            self._thread.daemon = True
+            self._thread.start()
+
+        return self._loop
+
+
+    @property
+    def feature_pool(self):
+        """
+        The pool of worker processes that calculate the features. The pool is
+        started the first time it is used.
+
+        Returns
+        -------
+        feature_pool : {None, concurrent.futures.ProcessPoolExecutor}
+            The pool of worker processes, or None if `feature_workers` is None.
+        """
+        if self._feature_pool is None and self.feature_workers:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._feature_pool_state = _parallel_state(self.parallel)
+            self._feature_pool = ProcessPoolExecutor(max_workers=self.feature_workers,
+                                                     initializer=_init_feature_worker,
+                                                     initargs=(dill.dumps(self.parallel),))
+
+        return self._feature_pool
+
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        if started is not None:
+            started(time.time())
+
+        future = asyncio.run_coroutine_threadsafe(self._run_batch(self.parallel, batch, buffers),
+                                                  self.loop)
+
+        def done(future):
+            error = future.exception()
+            callback(future.result() if error is None else error)
+
+        future.add_done_callback(done)
+
+
+    async def _run_batch(self, parallel, batch, buffers):
+        """
+        Evaluate a batch of model parameters in the event loop, see
+        ``uncertainpy.core.parallel._run_batch``.
+        """
+        loop = asyncio.get_event_loop()
+
+        if not parallel.model.is_async:
+            return await loop.run_in_executor(None, _run_batch, parallel, batch, buffers)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.nr_workers)
+
+        start = time.time()
+        timer = Timer()
+
+        batch_results = await asyncio.gather(*[self._run(parallel, model_parameters, timer)
+                                               for index, model_parameters in batch])
+
+        results = [(index, result) for (index, model_parameters), result in zip(batch, batch_results)]
+
+        if buffers is not None:
+            results = [(index, result if isinstance(result, EvaluationError) else buffers.store(index, result))
+                       for index, result in results]
+
+        return results, time.time() - start, timer
+
+
+    async def _run(self, parallel, model_parameters, timer):
+        """
+        Run the coroutine model for one set of model parameters, and calculate
+        the features from the model result. Failed evaluations return an
+        EvaluationError if ``parallel.catch_errors`` is True.
+        """
+        try:
+            return await self._evaluate(parallel, model_parameters, timer)
+        except Exception:
+            if not parallel.catch_errors:
+                raise
+
+            return EvaluationError(traceback.format_exc())
+
+
+    async def _evaluate(self, parallel, model_parameters, timer):
+        """
+        Run the coroutine model and calculate the features, see ``_run``.
+        """
+        model = parallel.model
+
+        async with self._semaphore:
+            try:
+                model._ensure_setup()
+
+                all_parameters = model.model_kwargs.copy()
+                all_parameters.update(parallel.all_parameters(model_parameters))
+
+                with timer.stage("evaluate"):
+                    model_result = await model.run(**all_parameters)
+
+                model.validate_run(model_result)
+
+            except Exception:
+                parallel._print_model_exception()
+                raise
+
+        feature_pool = self.feature_pool
+        if feature_pool is None:
+            return parallel.process(model_result, timer=timer)
+
+        loop = asyncio.get_event_loop()
+        result, process_timer = await loop.run_in_executor(feature_pool,
+                                                           functools.partial(_process_worker, model_result))
+        timer.merge(process_timer)
+
+        return result
+
+
+    def _close_feature_pool(self):
+        """
+        Stop the feature worker processes.
+        """
+        if self._feature_pool is not None:
+            self._feature_pool.shutdown(wait=True)
+
+            self._feature_pool = None
+            self._feature_pool_state = None
+
+
+    def close(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+            self._loop = None
+            self._thread = None
+            self._semaphore = None
+
+        self._close_feature_pool()
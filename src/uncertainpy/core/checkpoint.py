@@ -0,0 +1,133 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+
+import dill
+
+from ..utils.logger import get_logger, setup_module_logger
+
+
+class Checkpoint(object):
+    """
+    An append-only file with the results of completed model evaluations,
+    so an interrupted uncertainty quantification can be resumed without
+    evaluating the model again for the same model parameters.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the checkpoint file.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    filename : str
+        Name of the checkpoint file.
+
+    Notes
+    -----
+    Each completed model evaluation is written to the end of the file as a
+    separate record, and the file is flushed after each record, so at most the
+    evaluation that was written when the program stopped is lost. A truncated
+    last record is ignored when the checkpoint is loaded.
+
+    The results are identified by the full set of model parameters used in the
+    evaluation, so the same nodes (for example by using the same seed) must be
+    used for the results to be reused. The checkpoint does not know if the model
+    or features are changed, so the checkpoint file should be removed if they
+    are.
+    """
+    def __init__(self, filename, logger_level="info"):
+        self.filename = filename
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+
+    @staticmethod
+    def key(model_parameters):
+        """
+        Create the key that identifies a set of model parameters.
+
+        Parameters
+        ----------
+        model_parameters : dict
+            A dictionary with the model parameters,
+            ``{"parameter 1": value 1, "parameter 2": value 2, ...}``.
+
+        Returns
+        -------
+        key : tuple
+            A sorted tuple of ``(name, value)`` pairs.
+        """
+        return tuple(sorted((str(name), float(value)) for name, value in model_parameters.items()))
+
+
+    def load(self):
+        """
+        Load the results of the completed model evaluations.
+
+        Returns
+        -------
+        results : dict
+            A dictionary with the key of the model parameters (see ``key``) as
+            keys and the result dictionary of each model evaluation as values.
+            Empty if the checkpoint file does not exist.
+        """
+        results = {}
+
+        if not os.path.isfile(self.filename):
+            return results
+
+        position = 0
+        with open(self.filename, "rb") as f:
+            while True:
+                try:
+                    key, result = dill.load(f)
+                except Exception:
+                    break
+
+                results[key] = result
+                position = f.tell()
+
+        # Remove a record that was only partially written,
+        # so new records can be appended after the last complete record
+        if os.path.getsize(self.filename) > position:
+            logger = get_logger(self)
+            logger.warning("Removing incomplete record at the end of {}".format(self.filename))
+
+            with open(self.filename, "ab") as f:
+                f.truncate(position)
+
+        return results
+
+
+    def append(self, model_parameters, result):
+        """
+        Append the result of a model evaluation to the checkpoint file.
+
+        Parameters
+        ----------
+        model_parameters : dict
+            A dictionary with the model parameters used in the evaluation.
+        result : dict
+            The result dictionary of the model evaluation.
+        """
+        folder = os.path.dirname(self.filename)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        with open(self.filename, "ab") as f:
+            dill.dump((self.key(model_parameters), result), f)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+    def remove(self):
+        """
+        Remove the checkpoint file, if it exists.
+        """
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
@@ -0,0 +1,266 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import hashlib
+import tempfile
+
+import dill
+
+from ..utils.logger import get_logger, setup_module_logger
+
+
+class EvaluationCache(object):
+    """
+    A persistent cache of model evaluations, stored as one file for each
+    evaluation in a folder, with least recently used eviction when the cache
+    grows larger than a given size.
+
+    Parameters
+    ----------
+    folder : str
+        Name of the folder where the cached evaluations are stored.
+    max_size : {None, int}, optional
+        The maximum total size of the cached evaluations in bytes. When the
+        cache grows larger than this, the least recently used evaluations are
+        removed. If None, the size of the cache is not limited.
+        Default is 10**9 (1 GB).
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    folder : str
+        Name of the folder where the cached evaluations are stored.
+    max_size : {None, int}
+        The maximum total size of the cached evaluations in bytes.
+    hits : int
+        The number of evaluations found in the cache.
+    misses : int
+        The number of evaluations not found in the cache.
+
+    Notes
+    -----
+    The evaluations are identified by a key that combines the identity of the
+    model and features with the model parameters (see ``key``), so the cache
+    can be shared between different uncertainty quantifications of the same
+    model. The modification time of each file is updated when the evaluation
+    is read, and is used to find the least recently used evaluations. The
+    total size of the cache is found once, and then kept up to date as
+    evaluations are stored, so the folder is only scanned again when the
+    cache grows larger than `max_size`.
+    """
+    def __init__(self, folder, max_size=10**9, logger_level="info"):
+        self.folder = folder
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._size = None
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+
+    @staticmethod
+    def key(identity, model_parameters):
+        """
+        Create the key that identifies a model evaluation.
+
+        Parameters
+        ----------
+        identity : str
+            A string that identifies the model and features, for example a
+            hash of the model and feature configuration.
+        model_parameters : dict
+            A dictionary with all model parameters used in the evaluation,
+            ``{"parameter 1": value 1, "parameter 2": value 2, ...}``.
+
+        Returns
+        -------
+        key : str
+            A hexadecimal SHA-1 hash of the identity and model parameters.
+        """
+        key = hashlib.sha1(identity.encode("utf-8"))
+
+        for name in sorted(model_parameters):
+            key.update("{}={!r};".format(name, float(model_parameters[name])).encode("utf-8"))
+
+        return key.hexdigest()
+
+
+    def filename(self, key):
+        """
+        The name of the file where the evaluation with `key` is stored.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation.
+
+        Returns
+        -------
+        filename : str
+            Name of the file.
+        """
+        return os.path.join(self.folder, key + ".pkl")
+
+
+    def get(self, key):
+        """
+        Get a cached model evaluation.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation.
+
+        Returns
+        -------
+        result : {None, dict}
+            The result dictionary of the model evaluation,
+            or None if the evaluation is not in the cache.
+        """
+        filename = self.filename(key)
+
+        try:
+            with open(filename, "rb") as f:
+                result = dill.load(f)
+        except (IOError, OSError, EOFError, dill.UnpicklingError):
+            self.misses += 1
+            return None
+
+        # Mark the evaluation as recently used
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+
+        return result
+
+
+    def set(self, key, result):
+        """
+        Store a model evaluation in the cache, and remove the least recently
+        used evaluations if the cache is larger than `max_size`.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation.
+        result : dict
+            The result dictionary of the model evaluation.
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        # Write to a temporary file first so other processes never read
+        # a partially written evaluation
+        handle, tmp_filename = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            dill.dump(result, f)
+
+        filename = self.filename(key)
+        size = self._total_size() + os.path.getsize(tmp_filename)
+
+        # An evaluation stored again replaces the previous file
+        try:
+            size -= os.path.getsize(filename)
+        except OSError:
+            pass
+
+        os.replace(tmp_filename, filename)
+        self._size = size
+
+        if self.max_size is not None and self._size > self.max_size:
+            self.evict(self.max_size)
+
+
+    def size(self):
+        """
+        The total size of the cached evaluations in bytes.
+
+        Returns
+        -------
+        size : int
+            The total size of the cached evaluations in bytes.
+        """
+        return sum(size for filename, size, mtime in self._entries())
+
+
+    def evict(self, max_size):
+        """
+        Remove the least recently used evaluations until the total size of the
+        cache is at most `max_size` bytes.
+
+        Parameters
+        ----------
+        max_size : int
+            The maximum total size of the cached evaluations in bytes.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+
+        nr_removed = 0
+        for filename, file_size, mtime in entries:
+            if size <= max_size:
+                break
+
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+
+            size -= file_size
+            nr_removed += 1
+
+        self._size = size
+
+        if nr_removed:
+            logger = get_logger(self)
+            logger.debug("Removed {} evaluations from the cache in {}".format(nr_removed, self.folder))
+
+
+    def clear(self):
+        """
+        Remove all cached evaluations.
+        """
+        self.evict(0)
+
+
+    def _total_size(self):
+        """
+        The total size of the cached evaluations in bytes, found from the
+        folder the first time it is needed and kept up to date afterwards.
+        """
+        if self._size is None:
+            self._size = self.size()
+
+        return self._size
+
+
+    def _entries(self):
+        """
+        List the ``(filename, size, modification time)`` of each cached
+        evaluation.
+        """
+        if not os.path.isdir(self.folder):
+            return []
+
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(".pkl"):
+                continue
+
+            filename = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+
+            entries.append((filename, stat.st_size, stat.st_mtime))
+
+        return entries
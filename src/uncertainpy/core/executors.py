@@ -0,0 +1,525 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import copy
+import time
+import hashlib
+import itertools
+import threading
+
+from six.moves import queue
+
+import dill
+
+from .parallel import _init_worker, _run_worker_batch, _run_batch
+
+
+def _parallel_state(parallel):
+    """
+    A fingerprint of a Parallel instance, used to detect when the model or
+    features installed in the workers have changed. The fixed parameters are
+    not part of the fingerprint, since they are sent with each batch.
+
+    Parameters
+    ----------
+    parallel : Parallel
+        The Parallel instance.
+
+    Returns
+    -------
+    state : str
+        The hash of the serialized Parallel instance.
+    """
+    if parallel is not None:
+        parallel = copy.copy(parallel)
+        parallel.fixed_parameters = {}
+
+    return hashlib.sha1(dill.dumps(parallel)).hexdigest()
+
+
+def _init_serialized_worker(serialized_parallel):
+    """
+    Install a Parallel instance serialized with dill in the worker process.
+    Used by executors that do not serialize with dill themselves.
+
+    Parameters
+    ----------
+    serialized_parallel : bytes
+        The Parallel instance serialized with dill.
+    """
+    _init_worker(dill.loads(serialized_parallel))
+
+
+
+class Executor(object):
+    """
+    Base class for the executors that evaluate batches of model parameters
+    for RunModel.
+
+    An executor must implement ``submit``, and set ``nr_workers``. Executors
+    that start workers should stop them in ``close``, and executors that can
+    stop evaluations that are running should set ``can_terminate`` to True and
+    implement ``terminate``. Executors that evaluate the model in the current
+    process should set ``in_process`` to True.
+
+    Attributes
+    ----------
+    parallel : {None, Parallel}
+        The Parallel instance used to evaluate the model and features.
+    nr_workers : int
+        The number of model evaluations that can run at the same time.
+    can_terminate : bool
+        True if the executor can stop the evaluations that are running,
+        which is required to use a timeout.
+    in_process : bool
+        True if the model is evaluated in the current process, so thread
+        limits are applied to the current process during the evaluations
+        instead of in worker processes.
+
+    See Also
+    --------
+    uncertainpy.core.RunModel
+    uncertainpy.core.Parallel
+    """
+    can_terminate = False
+    in_process = False
+
+    def __init__(self):
+        self.parallel = None
+        self.nr_workers = 1
+
+
+    def start(self, parallel):
+        """
+        Prepare the executor for evaluating the model and features in
+        `parallel`. Called by RunModel before each series of evaluations.
+
+        Parameters
+        ----------
+        parallel : Parallel
+            The Parallel instance used to evaluate the model and features.
+        """
+        self.parallel = parallel
+
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        """
+        Evaluate a batch of model parameters, and call `callback` with the
+        result when it is completed.
+
+        Parameters
+        ----------
+        batch : list
+            A list of ``(index, model_parameters)`` pairs.
+        callback : callable
+            Called with the ``(results, elapsed, timer)`` returned by evaluating the
+            batch (see ``uncertainpy.core.parallel._run_batch``), or with the
+            exception raised if the evaluation failed. Can be called from
+            another thread.
+        buffers : {None, ResultBuffers}, optional
+            Shared buffers the values of regular results are written to
+            by the workers. Default is None.
+        started : {None, callable}, optional
+            Called with the time (``time.time()``) the evaluation of the
+            batch started. RunModel uses it to measure the timeout from when
+            the batch starts in a worker, instead of from when it is
+            submitted. Can be called from another thread. Executors that can
+            not tell when a batch starts call it when the batch is submitted.
+            Default is None.
+
+        Raises
+        ------
+        NotImplementedError
+            If the executor has not implemented submit.
+        """
+        raise NotImplementedError("No submit method implemented in {class_name}".format(class_name=self.__class__.__name__))
+
+
+    def close(self):
+        """
+        Stop the workers, if any, after the evaluations that are running are
+        completed.
+        """
+        pass
+
+
+    def terminate(self):
+        """
+        Stop the workers immediately, without waiting for the evaluations that
+        are running.
+
+        Raises
+        ------
+        NotImplementedError
+            If the executor can not stop the evaluations that are running.
+        """
+        raise NotImplementedError("{class_name} can not stop evaluations that are running".format(class_name=self.__class__.__name__))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+
+class SerialExecutor(Executor):
+    """
+    Evaluate the model and features in the current process, one batch at a
+    time, without multiprocessing.
+    """
+    in_process = True
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        if started is not None:
+            started(time.time())
+
+        try:
+            result = _run_batch(self.parallel, batch, buffers=buffers)
+        except Exception as error:
+            result = error
+
+        callback(result)
+
+
+
+class ThreadExecutor(Executor):
+    """
+    Evaluate the model and features in a pool of threads in the current
+    process.
+
+    Threads avoid sending the model and results between processes, and are
+    well suited for simulators that release the GIL while running. The model
+    and features are shared between the threads, so the model must not store
+    the parameters of an evaluation in the model object.
+
+    Parameters
+    ----------
+    workers : {int, "max"}, optional
+        The number of threads. If "max", the number of CPUs on the computer
+        is used. Default is "max".
+
+    Attributes
+    ----------
+    nr_workers : int
+        The number of threads.
+    pool : multiprocess.pool.ThreadPool
+        The pool of threads.
+    """
+    in_process = True
+
+    def __init__(self, workers="max"):
+        super(ThreadExecutor, self).__init__()
+
+        if workers == "max":
+            import multiprocess
+
+            workers = multiprocess.cpu_count()
+
+        self.nr_workers = workers
+        self._pool = None
+
+
+    @property
+    def pool(self):
+        """
+        The pool of threads. The pool is started the first time it is used.
+
+        Returns
+        -------
+        pool : multiprocess.pool.ThreadPool
+            The pool of threads.
+        """
+        if self._pool is None:
+            from multiprocess.pool import ThreadPool
+
+            self._pool = ThreadPool(processes=self.nr_workers)
+
+        return self._pool
+
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        if started is not None:
+            started(time.time())
+
+        self.pool.apply_async(_run_batch,
+                              (self.parallel, batch, buffers),
+                              callback=callback,
+                              error_callback=callback)
+
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+            self._pool = None
+
+
+
+class ProcessExecutor(Executor):
+    """
+    Evaluate the model and features in a persistent pool of worker processes.
+
+    The model and features are sent to each worker process once, when the
+    pool is started, and the pool is reused by later evaluations. If the model
+    or features are changed, the pool is restarted.
+
+    Parameters
+    ----------
+    CPUs : {int, "max"}, optional
+        The number of worker processes. If "max", the number of CPUs on the
+        computer (multiprocess.cpu_count()) is used. Default is "max".
+    max_tasks_per_worker : {None, int}, optional
+        The number of batches each worker process performs before it is
+        replaced by a new worker process. If None, the worker processes live
+        as long as the pool. Default is None.
+
+    Attributes
+    ----------
+    nr_workers : int
+        The number of worker processes.
+    max_tasks_per_worker : {None, int}
+        The number of batches each worker process performs before it is
+        replaced.
+    pool : multiprocess.Pool
+        The pool of worker processes.
+    """
+    can_terminate = True
+
+    def __init__(self, CPUs="max", max_tasks_per_worker=None):
+        super(ProcessExecutor, self).__init__()
+
+        if CPUs == "max":
+            import multiprocess
+
+            CPUs = multiprocess.cpu_count()
+
+        self.nr_workers = CPUs
+        self.max_tasks_per_worker = max_tasks_per_worker
+
+        self._pool = None
+        self._pool_state = None
+
+        # The workers report when they start a batch through a queue, which
+        # a thread reads and passes on to the started callbacks
+        self._started = None
+        self._listener = None
+        self._stop_listener = None
+        self._started_callbacks = {}
+        self._tags = itertools.count()
+
+
+    def start(self, parallel):
+        # Restart the workers if the model or features have changed
+        if self._pool is not None and self._pool_state != _parallel_state(parallel):
+            self.close()
+
+        self.parallel = parallel
+
+
+    @property
+    def pool(self):
+        """
+        The pool of worker processes. The pool is started the first time it
+        is used, and reused until ``close`` is called.
+
+        Returns
+        -------
+        pool : multiprocess.Pool
+            The pool of worker processes.
+        """
+        if self._pool is None:
+            import multiprocess as mp
+
+            # The free pinning slots, taken by each worker when it starts
+            # and returned when it exits
+            slots = None
+            if self.parallel is not None and self.parallel.pin_workers:
+                slots = mp.Queue()
+                for slot in range(self.nr_workers):
+                    slots.put(slot)
+
+            self._started = mp.Queue()
+            self._stop_listener = threading.Event()
+            self._listener = threading.Thread(target=self._listen,
+                                              args=(self._started,
+                                                    self._started_callbacks,
+                                                    self._stop_listener))
+            self._listener.daemon = True
+            self._listener.start()
+
+            self._pool_state = _parallel_state(self.parallel)
+            self._pool = mp.Pool(processes=self.nr_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.parallel, slots, self._started),
+                                 maxtasksperchild=self.max_tasks_per_worker)
+
+        return self._pool
+
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        pool = self.pool
+
+        tag = None
+        if started is not None:
+            tag = next(self._tags)
+            self._started_callbacks[tag] = started
+
+        pool.apply_async(_run_worker_batch,
+                         (batch, buffers, self.parallel.fixed_parameters, tag),
+                         callback=callback,
+                         error_callback=callback)
+
+
+    @staticmethod
+    def _listen(started, callbacks, stop):
+        """
+        Read the ``(tag, start_time)`` pairs the workers put in `started`
+        when they start a batch, and call the started callback of the batch,
+        until `stop` is set.
+        """
+        while not stop.is_set():
+            try:
+                tag, start_time = started.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+
+            callback = callbacks.pop(tag, None)
+            if callback is not None:
+                callback(start_time)
+
+
+    def _stop(self):
+        """
+        Stop the thread reading when the workers start a batch, after the
+        pool is stopped.
+        """
+        if self._listener is not None:
+            self._stop_listener.set()
+            self._listener.join()
+
+            # A worker that was terminated may hold the lock of the queue,
+            # so the queue is not flushed when it is closed
+            self._started.cancel_join_thread()
+            self._started.close()
+
+            self._started = None
+            self._listener = None
+            self._stop_listener = None
+
+        self._started_callbacks.clear()
+
+        self._pool = None
+        self._pool_state = None
+
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+            self._stop()
+
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+
+            self._stop()
+
+
+
+class MPIExecutor(Executor):
+    """
+    Evaluate the model and features on the ranks of an MPI allocation,
+    using ``mpi4py.futures.MPIPoolExecutor``.
+
+    The model and features are serialized with dill and installed on each
+    worker once, when the workers are started.
+
+    Parameters
+    ----------
+    workers : {None, int}, optional
+        The number of MPI workers. If None, the size of the MPI allocation
+        minus one (the rank running the uncertainty quantification) is used.
+        Default is None.
+
+    Attributes
+    ----------
+    nr_workers : int
+        The number of MPI workers.
+
+    Raises
+    ------
+    ImportError
+        If mpi4py is not installed.
+
+    Notes
+    -----
+    The script should be started with ``mpi4py.futures``, so the workers are
+    the ranks of the allocation instead of dynamically spawned processes::
+
+        mpirun -n 4 python -m mpi4py.futures uq_script.py
+
+    Rank 0 runs the script, and the remaining ranks evaluate the model.
+    The workers import the script when they start, so the uncertainty
+    quantification must be placed under a ``if __name__ == "__main__":``
+    guard.
+    """
+    def __init__(self, workers=None):
+        super(MPIExecutor, self).__init__()
+
+        try:
+            from mpi4py import MPI
+        except ImportError:
+            raise ImportError("MPIExecutor requires: mpi4py")
+
+        if workers is None:
+            workers = max(MPI.COMM_WORLD.Get_size() - 1, 1)
+
+        self.nr_workers = workers
+
+        self._executor = None
+        self._executor_state = None
+
+
+    def start(self, parallel):
+        # Restart the workers if the model or features have changed
+        if self._executor is not None and self._executor_state != _parallel_state(parallel):
+            self.close()
+
+        self.parallel = parallel
+
+
+    def submit(self, batch, callback, buffers=None, started=None):
+        if started is not None:
+            started(time.time())
+
+        if self._executor is None:
+            from mpi4py.futures import MPIPoolExecutor
+
+            self._executor_state = _parallel_state(self.parallel)
+            self._executor = MPIPoolExecutor(max_workers=self.nr_workers,
+                                             initializer=_init_serialized_worker,
+                                             initargs=(dill.dumps(self.parallel),))
+
+        future = self._executor.submit(_run_worker_batch, batch, buffers, self.parallel.fixed_parameters)
+
+        def done(future):
+            error = future.exception()
+            callback(future.result() if error is None else error)
+
+        future.add_done_callback(done)
+
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+            self._executor = None
+            self._executor_state = None
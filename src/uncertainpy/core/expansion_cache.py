@@ -0,0 +1,193 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import hashlib
+
+import numpy as np
+import chaospy as cp
+
+from .evaluation_cache import EvaluationCache
+
+
+class ExpansionCache(EvaluationCache):
+    """
+    A persistent cache of orthogonal polynomials (``chaospy.orth_ttr``) and
+    quadrature rules (``chaospy.generate_quadrature``), so they are loaded
+    instead of recalculated when the same distribution and order are used
+    again. The cache is stored as one file for each entry in a folder, with
+    least recently used eviction, see EvaluationCache.
+
+    Parameters
+    ----------
+    folder : str
+        Name of the folder where the cached polynomials and quadrature rules
+        are stored.
+    max_size : {None, int}, optional
+        The maximum total size of the cache in bytes. When the cache grows
+        larger than this, the least recently used entries are removed. If
+        None, the size of the cache is not limited.
+        Default is 10**8 (100 MB).
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    folder : str
+        Name of the folder where the cache is stored.
+    max_size : {None, int}
+        The maximum total size of the cache in bytes.
+    hits : int
+        The number of entries found in the cache.
+    misses : int
+        The number of entries not found in the cache.
+
+    Notes
+    -----
+    The entries are identified by a canonical description of the
+    distribution (see ``describe``), the order, the options and the version
+    of Chaospy. Distributions without a canonical description, for example
+    user defined distributions, are not cached.
+
+    See Also
+    --------
+    uncertainpy.core.EvaluationCache
+    """
+    def __init__(self, folder, max_size=10**8, logger_level="info"):
+        super(ExpansionCache, self).__init__(folder,
+                                             max_size=max_size,
+                                             logger_level=logger_level)
+
+
+    @staticmethod
+    def describe(distribution):
+        """
+        Create a canonical description of a distribution.
+
+        The description combines the representation of the distribution,
+        which gives the families and parameters of standard distributions,
+        with the first four moments of each uncertain parameter, so
+        distributions with an incomplete representation are not confused.
+
+        Parameters
+        ----------
+        distribution : chaospy.Dist
+            The distribution.
+
+        Returns
+        -------
+        description : {None, str}
+            The description, or None if the distribution has no canonical
+            description.
+        """
+        description = repr(distribution)
+
+        # The default representation of objects contains the memory address
+        if " at 0x" in description:
+            return None
+
+        try:
+            exponents = np.concatenate([np.eye(len(distribution), dtype=int)*degree
+                                        for degree in range(1, 5)], axis=1)
+            moments = np.asarray(distribution.mom(exponents), dtype=float).ravel()
+        except Exception:
+            return None
+
+        return "{};{}".format(description, ",".join("{!r}".format(moment) for moment in moments))
+
+
+    def expansion_key(self, name, distribution, **options):
+        """
+        Create the key that identifies a cached polynomial or quadrature rule.
+
+        Parameters
+        ----------
+        name : str
+            The name of the Chaospy function the entry is created with.
+        distribution : chaospy.Dist
+            The distribution.
+        **options
+            The order and other arguments of the Chaospy function.
+
+        Returns
+        -------
+        key : {None, str}
+            A hexadecimal SHA-1 hash of the name, the description of the
+            distribution, the options and the version of Chaospy, or None if
+            the distribution can not be cached.
+        """
+        description = self.describe(distribution)
+        if description is None:
+            return None
+
+        key = hashlib.sha1("{};{};{}".format(name, cp.__version__, description).encode("utf-8"))
+
+        for option in sorted(options):
+            key.update("{}={!r};".format(option, options[option]).encode("utf-8"))
+
+        return key.hexdigest()
+
+
+    def _cached(self, key, create):
+        """
+        Get an entry from the cache, or create and store it.
+        """
+        if key is None:
+            return create()
+
+        result = self.get(key)
+        if result is None:
+            result = create()
+            self.set(key, result)
+
+        return result
+
+
+    def orth_ttr(self, order, distribution):
+        """
+        Get the orthogonal polynomials created with the three terms recursion,
+        ``chaospy.orth_ttr(order, distribution)``, from the cache.
+
+        Parameters
+        ----------
+        order : int
+            The polynomial order.
+        distribution : chaospy.Dist
+            The distribution the polynomials are orthogonal on.
+
+        Returns
+        -------
+        P : chaospy.Poly
+            The orthogonal polynomials.
+        """
+        key = self.expansion_key("orth_ttr", distribution, order=order)
+
+        return self._cached(key, lambda: cp.orth_ttr(order, distribution))
+
+
+    def generate_quadrature(self, order, distribution, **kwargs):
+        """
+        Get the quadrature nodes and weights,
+        ``chaospy.generate_quadrature(order, distribution, **kwargs)``, from
+        the cache.
+
+        Parameters
+        ----------
+        order : int
+            The quadrature order.
+        distribution : chaospy.Dist
+            The distribution of the quadrature rule.
+        **kwargs
+            Keyword arguments of ``chaospy.generate_quadrature``, such as
+            `rule` and `sparse`.
+
+        Returns
+        -------
+        nodes : numpy.ndarray
+            The quadrature nodes.
+        weights : numpy.ndarray
+            The quadrature weights.
+        """
+        key = self.expansion_key("generate_quadrature", distribution, order=order, **kwargs)
+
+        return self._cached(key, lambda: cp.generate_quadrature(order, distribution, **kwargs))
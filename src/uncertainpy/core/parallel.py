@@ -1,15 +1,253 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import sys
+import time
+import inspect
 import traceback
 import warnings
 import logging
 
+import six
+from six.moves import queue
 import numpy as np
 import scipy.interpolate as scpi
 
 from .base import Base
 from ..utils.utility import none_to_nan, contains_nan, is_regular
 from ..utils.logger import get_logger
+from ..utils.timer import Timer
+from ..utils.threads import limit_threads, pin_process
+
+
+# The Parallel instance installed in each worker process by _init_worker
+_worker_parallel = None
+
+# The pinning slot taken by each worker process in _init_worker
+_worker_slot = None
+
+# The queue each worker process reports the batches it starts to, installed
+# by _init_worker
+_worker_started = None
+
+
+class EvaluationError(Exception):
+    """
+    A model evaluation that failed, returned by the workers instead of
+    raising the exception when ``Parallel.catch_errors`` is True.
+
+    Parameters
+    ----------
+    traceback : str
+        The formatted traceback of the exception raised by the evaluation.
+
+    Attributes
+    ----------
+    traceback : str
+        The formatted traceback of the exception raised by the evaluation.
+    """
+    def __init__(self, traceback):
+        super(EvaluationError, self).__init__(traceback)
+
+        self.traceback = traceback
+
+
+
+def _worker_number():
+    """
+    The number of the current worker process, used to pin the workers to
+    distinct CPUs when no free pinning slots are given to ``_init_worker``.
+
+    Returns
+    -------
+    worker_number : int
+        The number of the worker in the pool, or the MPI rank for MPI
+        workers.
+    """
+    import multiprocess
+
+    identity = multiprocess.current_process()._identity
+    if identity:
+        return identity[-1] - 1
+
+    if "mpi4py" in sys.modules:
+        from mpi4py import MPI
+
+        return MPI.COMM_WORLD.Get_rank()
+
+    return 0
+
+
+def _init_worker(parallel, slots=None, started=None):
+    """
+    Install a Parallel instance in a worker process. Used as the initializer
+    of the worker pool, so the model and features are sent to each worker
+    only once, instead of with every model evaluation.
+
+    The number of OpenMP and BLAS threads is limited to
+    ``parallel.worker_threads``, and the worker is pinned to a CPU set if
+    ``parallel.pin_workers`` is set, before the model is set up (see
+    ``Model.setup``) when the worker is started. The model is torn down when
+    the worker exits.
+
+    Parameters
+    ----------
+    parallel : Parallel
+        The Parallel instance used by the worker process.
+    slots : {None, multiprocess.Queue}, optional
+        A queue with the free pinning slots, shared by the workers of a pool.
+        Each worker takes a slot when it starts and puts it back when it
+        exits, so workers replaced after ``max_tasks_per_worker`` batches are
+        pinned to the CPU set left by the worker they replace. If None, or if
+        no slot is free, the worker is pinned using ``_worker_number``.
+        Default is None.
+    started : {None, multiprocess.Queue}, optional
+        A queue the worker puts ``(tag, start_time)`` in when it starts a
+        tagged batch, see ``_run_worker_batch``. Default is None.
+    """
+    global _worker_parallel, _worker_slot, _worker_started
+
+    from multiprocess.util import Finalize
+
+    _worker_parallel = parallel
+    _worker_started = started
+
+    if parallel.worker_threads is not None:
+        limit_threads(parallel.worker_threads)
+
+    if parallel.pin_workers:
+        _worker_slot = None
+
+        if slots is not None:
+            try:
+                _worker_slot = slots.get(timeout=1)
+            except queue.Empty:
+                pass
+            else:
+                Finalize(None, slots.put, args=(_worker_slot,), exitpriority=10)
+
+        if _worker_slot is None:
+            _worker_slot = _worker_number()
+
+        pin_process(_worker_slot, parallel.pin_workers)
+
+    parallel.model._ensure_setup()
+    Finalize(None, parallel.model._ensure_teardown, exitpriority=10)
+
+
+def _run_worker_batch(batch, buffers=None, fixed_parameters=None, tag=None):
+    """
+    Run the model and calculate the features for a batch of model parameters
+    using the Parallel instance installed in the worker process.
+
+    Parameters
+    ----------
+    batch : list
+        A list of ``(index, model_parameters)`` pairs, see ``_run_batch``.
+    buffers : {None, ResultBuffers}, optional
+        Shared buffers the regular results are written to, see ``_run_batch``.
+        Default is None.
+    fixed_parameters : {None, dict}, optional
+        The fixed parameters of the evaluations. They are sent with each
+        batch, so a new set of fixed parameters does not require new worker
+        processes. If None, the fixed parameters of the installed Parallel
+        instance are used. Default is None.
+    tag : {None, int}, optional
+        If given, ``(tag, start_time)`` is put in the started queue of the
+        worker (see ``_init_worker``) when the batch starts. Default is None.
+
+    Returns
+    -------
+    results : list
+        A list of ``(index, result)`` pairs with the model and feature results
+        for each set of model parameters, see Parallel.run.
+    elapsed : float
+        The wall time in seconds used to evaluate the whole batch.
+    timer : Timer
+        The wall and CPU time used by each stage of the evaluations.
+    """
+    if tag is not None and _worker_started is not None:
+        _worker_started.put((tag, time.time()))
+
+    if fixed_parameters is not None:
+        _worker_parallel.fixed_parameters = fixed_parameters
+
+    return _run_batch(_worker_parallel, batch, buffers=buffers)
+
+
+def _run_batch(parallel, batch, buffers=None):
+    """
+    Run the model and calculate the features for a batch of model parameters.
+
+    Parameters
+    ----------
+    parallel : Parallel
+        The Parallel instance used to run the model and calculate the features.
+    batch : list
+        A list of ``(index, model_parameters)`` pairs, where index is the
+        index of the node and model_parameters is a dictionary with the
+        model parameters for the evaluation.
+    buffers : {None, ResultBuffers}, optional
+        Shared buffers the values of regular model and feature results are
+        written to, instead of being returned with the results.
+        Default is None.
+
+    Returns
+    -------
+    results : list
+        A list of ``(index, result)`` pairs with the model and feature results
+        for each set of model parameters, see Parallel.run.
+    elapsed : float
+        The wall time in seconds used to evaluate the whole batch.
+    timer : Timer
+        The wall and CPU time used by each stage of the evaluations.
+
+    Notes
+    -----
+    If the model implements ``run_batch``, the whole batch is evaluated in a
+    single call to the model.
+
+    If ``parallel.catch_errors`` is True, the result of an evaluation that
+    raises an exception is an EvaluationError with the traceback, instead of
+    the exception being raised. When ``run_batch`` fails, every evaluation
+    in the batch fails.
+    """
+    start = time.time()
+    timer = Timer()
+
+    if parallel.model.run_batch is not None:
+        indices = [index for index, model_parameters in batch]
+
+        try:
+            batch_results = parallel.run_batch([model_parameters for index, model_parameters in batch],
+                                               timer=timer)
+        except Exception:
+            if not parallel.catch_errors:
+                raise
+
+            batch_results = [EvaluationError(traceback.format_exc())]*len(batch)
+
+        results = list(zip(indices, batch_results))
+
+    else:
+        results = []
+        for index, model_parameters in batch:
+            try:
+                result = parallel.run(model_parameters, timer=timer)
+            except Exception:
+                if not parallel.catch_errors:
+                    raise
+
+                result = EvaluationError(traceback.format_exc())
+
+            results.append((index, result))
+
+    if buffers is not None:
+        results = [(index, result if isinstance(result, EvaluationError) else buffers.store(index, result))
+                   for index, result in results]
+
+    return results, time.time() - start, timer
+
+
 
 class Parallel(Base):
     """
@@ -31,11 +269,44 @@ class Parallel(Base):
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed
         Default logger level is "info".
+    time_grid : {None, array_like, dict}, optional
+        A fixed time grid the model and features that are interpolated are
+        resampled onto, so the interpolated values are returned instead of the
+        interpolation objects. Either a single time array used for the model
+        and every interpolated feature, or a dictionary
+        ``{"model/feature name": time array}``. If None, the interpolation
+        objects are returned. Default is None.
+    catch_errors : bool, optional
+        If True, evaluations that raise an exception are returned as an
+        EvaluationError by ``_run_batch``, instead of stopping the whole
+        batch. Default is False.
+    worker_threads : {None, int}, optional
+        The number of OpenMP and BLAS threads in each worker process. If
+        None, the number of threads is not limited. Default is None.
+    pin_workers : {False, "core", "numa"}, optional
+        Pin each worker process to a distinct core or NUMA node.
+        Default is False.
+    fixed_parameters : {None, dict}, optional
+        The model parameters that are the same in every evaluation,
+        ``{"parameter 1": value 1, ...}``. They are combined with the model
+        parameters of each evaluation (see ``all_parameters``), so only the
+        uncertain parameters must be sent with each evaluation. If None, no
+        fixed parameters are used. Default is None.
 
     Attributes
     ----------
     model : uncertainpy.Parallel.model
     features : uncertainpy.Parallel.features
+    time_grid : {None, array, dict}
+        The fixed time grid the interpolated results are resampled onto.
+    catch_errors : bool
+        If failed evaluations are returned as an EvaluationError.
+    worker_threads : {None, int}
+        The number of OpenMP and BLAS threads in each worker process.
+    pin_workers : {False, "core", "numa"}
+        If the worker processes are pinned to cores or NUMA nodes.
+    fixed_parameters : dict
+        The model parameters that are the same in every evaluation.
 
     See Also
     --------
@@ -43,6 +314,126 @@ class Parallel(Base):
     uncertainpy.models.Model
     uncertainpy.models.Model.run : Requirements for the model run function.
     """
+    def __init__(self,
+                 model=None,
+                 features=None,
+                 logger_level="info",
+                 time_grid=None,
+                 catch_errors=False,
+                 worker_threads=None,
+                 pin_workers=False,
+                 fixed_parameters=None):
+
+        super(Parallel, self).__init__(model=model,
+                                       features=features,
+                                       logger_level=logger_level)
+
+        self.time_grid = time_grid
+        self.catch_errors = catch_errors
+        self.worker_threads = worker_threads
+        self.pin_workers = pin_workers
+        self.fixed_parameters = {} if fixed_parameters is None else fixed_parameters
+
+
+    def all_parameters(self, model_parameters):
+        """
+        Combine the model parameters of an evaluation with the fixed
+        parameters.
+
+        Parameters
+        ----------
+        model_parameters : dict
+            The model parameters of the evaluation. They take precedence over
+            the fixed parameters with the same name.
+
+        Returns
+        -------
+        all_parameters : dict
+            All model parameters of the evaluation.
+        """
+        if not self.fixed_parameters:
+            return model_parameters
+
+        all_parameters = self.fixed_parameters.copy()
+        all_parameters.update(model_parameters)
+
+        return all_parameters
+
+
+    def get_time_grid(self, feature):
+        """
+        The fixed time grid of a model or feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of the model or feature.
+
+        Returns
+        -------
+        time_grid : {None, array}
+            The time grid `feature` is resampled onto, or None if `feature` has
+            no fixed time grid.
+        """
+        if self.time_grid is None:
+            return None
+
+        if isinstance(self.time_grid, dict):
+            time_grid = self.time_grid.get(feature)
+        else:
+            time_grid = self.time_grid
+
+        if time_grid is None:
+            return None
+
+        return np.asarray(time_grid, dtype=float)
+
+
+    def resample(self, result):
+        """
+        Replace the interpolation of the model and features that have a fixed
+        time grid with the interpolation evaluated on the time grid.
+
+        Parameters
+        ----------
+        result : dict
+            The model and feature results, with interpolations as created by
+            ``create_interpolations``.
+
+        Returns
+        -------
+        result : dict
+            The model and feature results, where the model and features that
+            have a fixed time grid have the time grid as ``"time"``, the
+            resampled values as ``"values"``, and no ``"interpolation"``.
+            If the interpolation could not be created, the values are
+            numpy.nan.
+        """
+        logger = get_logger(self)
+
+        for feature in result:
+            time_grid = self.get_time_grid(feature)
+
+            if time_grid is None or "interpolation" not in result[feature]:
+                continue
+
+            interpolation = result[feature].pop("interpolation")
+
+            if interpolation is None:
+                values = np.full(len(time_grid), np.nan)
+                logger.error("{}: Unknown error while creating the interpolation".format(feature))
+
+            elif isinstance(interpolation, six.string_types):
+                values = np.full(len(time_grid), np.nan)
+                logger.error(interpolation)
+
+            else:
+                values = interpolation(time_grid)
+
+            result[feature]["time"] = time_grid
+            result[feature]["values"] = values
+
+        return result
 
     def create_interpolations(self, result):
         """
@@ -111,6 +502,10 @@ class Parallel(Base):
         interpolated for Chaospy to be able to create the polynomial
         approximation. For 1D results this is done with scipy:
         ``InterpolatedUnivariateSpline(time, U, k=3)``.
+
+        If the model or feature has a fixed `time_grid`, the interpolation is
+        evaluated on the time grid in the worker (see ``resample``), and the
+        resampled values are returned instead of the interpolation object.
         """
         logger = get_logger(self)
 
@@ -143,7 +538,7 @@ class Parallel(Base):
                     raise NotImplementedError("{feature}: ".format(feature=feature)
                                             + " no support for >= 2D interpolation")
 
-        return result
+        return self.resample(result)
 
 
     def interpolation_1d(self, result, feature):
@@ -228,7 +623,7 @@ class Parallel(Base):
 
 
 
-    def run(self, model_parameters):
+    def run(self, model_parameters, timer=None):
         """
         Run a model and calculate features from the model output,
         return the results.
@@ -243,8 +638,15 @@ class Parallel(Base):
         Parameters
         ----------
         model_parameters : dictionary
-            All model parameters as a dictionary. These parameters are sent to
-            model.run().
+            The model parameters as a dictionary. These parameters, combined
+            with the fixed parameters, are sent to model.run().
+        timer : {None, Timer}, optional
+            A timer the wall and CPU time of each stage is added to. The
+            stages are ``"evaluate"``, ``"postprocess"``, ``"preprocess"``,
+            ``"feature <feature name>"`` for each feature, and
+            ``"interpolation"``. Features that override
+            ``calculate_features`` without a `timer` argument are timed as a
+            single ``"features"`` stage. Default is None.
 
         Returns
         -------
@@ -293,15 +695,96 @@ class Parallel(Base):
             # model_result = self.model.run(**model_parameters, **self.model.model_kwargs)
             # self.model.validate_run(model_result)
 
-            model_result = self.model.evaluate(**model_parameters)
+            if timer is None:
+                timer = Timer()
+
+            with timer.stage("evaluate"):
+                model_result = self.model.evaluate(**self.all_parameters(model_parameters))
+
+        except Exception as error:
+            self._print_model_exception()
+            raise
+
+        return self.process(model_result, timer=timer)
+
+
+    def run_batch(self, model_parameters, timer=None):
+        """
+        Run a model for a block of model parameters with ``model.run_batch``
+        and calculate features from the output of each model evaluation,
+        return the results.
+
+        Parameters
+        ----------
+        model_parameters : list
+            A list of dictionaries with the model parameters for each
+            model evaluation. The fixed parameters are added to each.
+        timer : {None, Timer}, optional
+            A timer the wall and CPU time of each stage is added to, see
+            ``run``. The ``"evaluate"`` stage is timed once for the whole
+            block. Default is None.
+
+        Returns
+        -------
+        results : list
+            A list with the model and feature results for each set of model
+            parameters. See ``run`` for the format of each result.
+
+        See also
+        --------
+        uncertainpy.models.Model.run_batch : Requirements for the model run_batch function.
+        uncertainpy.core.Parallel.run
+        """
+        model_parameters = [self.all_parameters(values) for values in model_parameters]
+
+        parameters = {}
+        for name in model_parameters[0]:
+            parameters[name] = np.array([values[name] for values in model_parameters])
+
+        if timer is None:
+            timer = Timer()
+
+        try:
+            with timer.stage("evaluate"):
+                model_results = self.model.evaluate_batch(**parameters)
+
+        except Exception as error:
+            self._print_model_exception()
+            raise
 
+        return [self.process(model_result, timer=timer) for model_result in model_results]
+
+
+    def process(self, model_result, timer=None):
+        """
+        Postprocess the result of a model evaluation and calculate features
+        from it, return the results.
+
+        Parameters
+        ----------
+        model_result : tuple
+            The result of a model evaluation, ``(time, values, info, ...)``.
+        timer : {None, Timer}, optional
+            A timer the wall and CPU time of each stage is added to, see
+            ``run``. Default is None.
+
+        Returns
+        -------
+        result : dictionary
+            The model and feature results. See ``run`` for the format.
+        """
+        if timer is None:
+            timer = Timer()
+
+        try:
             results = {}
 
             if self.model.ignore:
                 time_postprocess, values_postprocess = model_result[:2]
 
             else:
-                postprocess_result = self.model.postprocess(*model_result)
+                with timer.stage("postprocess"):
+                    postprocess_result = self.model.postprocess(*model_result)
 
                 self.model.validate_postprocess(model_result)
 
@@ -315,17 +798,17 @@ class Parallel(Base):
 
 
         except Exception as error:
-            print("")
-            print("Caught exception when running/postprocessing model: {} in parallel:".format(self.model.name))
-            print("===================================================================")
-            traceback.print_exc()
-            print("===================================================================")
-            print("")
+            self._print_model_exception()
             raise
 
         try:
-            # Calculate features from the model results
-            feature_results = self.features.calculate_features(*model_result)
+            # Calculate features from the model results. Features that
+            # override calculate_features without a timer are timed as a whole
+            if "timer" in inspect.signature(self.features.calculate_features).parameters:
+                feature_results = self.features.calculate_features(*model_result, timer=timer)
+            else:
+                with timer.stage("features"):
+                    feature_results = self.features.calculate_features(*model_result)
 
             for feature in feature_results:
                 time_feature = feature_results[feature]["time"]
@@ -338,16 +821,40 @@ class Parallel(Base):
                                     "time": time_feature}
 
             # Create interpolations
-            results = self.create_interpolations(results)
+            with timer.stage("interpolation"):
+                results = self.create_interpolations(results)
 
             return results
 
         except Exception as error:
-            print("")
-            print("Caught exception when calculating/postprocessing features of model: {} in parallel:".format(self.model.name))
-            print("===================================================================")
-            traceback.print_exc()
-            print("===================================================================")
-            print("")
+            self._print_model_exception(stage="calculating/postprocessing features of model")
             raise
 
+
+    def _print_model_exception(self, stage="running/postprocessing model"):
+        """
+        Print the stack trace of an exception raised when running or
+        postprocessing the model, or calculating the features.
+
+        If ``catch_errors`` is True, the traceback is returned with the failed
+        evaluation instead, so only a single line is logged.
+
+        Parameters
+        ----------
+        stage : str, optional
+            What was done when the exception was raised.
+            Default is "running/postprocessing model".
+        """
+        if self.catch_errors:
+            logger = get_logger(self)
+
+            error = traceback.format_exception_only(*sys.exc_info()[:2])[-1].strip()
+            logger.debug("Caught exception when {}: {}: {}".format(stage, self.model.name, error))
+            return
+
+        print("")
+        print("Caught exception when {}: {} in parallel:".format(stage, self.model.name))
+        print("===================================================================")
+        traceback.print_exc()
+        print("===================================================================")
+        print("")
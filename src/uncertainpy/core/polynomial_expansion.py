@@ -0,0 +1,470 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+import chaospy as cp
+
+
+class PolynomialExpansion(object):
+    """
+    A polynomial approximation stored as a coefficient matrix and a table of
+    exponents, used to calculate the statistical metrics of polynomial chaos
+    expansions for many outputs at the same time.
+
+    The polynomial approximation of output ``o`` is
+    ``sum_k coefficients[k, o]*prod_j x_j**exponents[k, j]``. The mean,
+    variance and Sobol indices are calculated directly from the coefficients
+    and the moments of the marginal distributions, for every output at once,
+    and the approximation is evaluated as a single product of the monomials
+    evaluated at the samples and the coefficient matrix.
+
+    Parameters
+    ----------
+    coefficients : array_like
+        The coefficients, of shape ``(nr_terms, nr_outputs)``.
+    exponents : array_like
+        The exponents of the monomial of each term, of shape
+        ``(nr_terms, nr_uncertain_parameters)``.
+    shape : {None, tuple}, optional
+        The shape of the output. If None, the output has shape
+        ``(nr_outputs,)``. Default is None.
+
+    Attributes
+    ----------
+    coefficients : numpy.ndarray
+        The coefficients, of shape ``(nr_terms, nr_outputs)``.
+    exponents : numpy.ndarray
+        The exponents of the monomial of each term, of shape
+        ``(nr_terms, nr_uncertain_parameters)``.
+    shape : tuple
+        The shape of the output.
+
+    Notes
+    -----
+    The statistical metrics require that the uncertain parameters are
+    independent, so the moments of a monomial are the product of the moments
+    of the marginal distributions. They give the same results as
+    ``chaospy.E``, ``chaospy.Var``, ``chaospy.Sens_m`` and ``chaospy.Sens_t``.
+    """
+    def __init__(self, coefficients, exponents, shape=None):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.exponents = np.asarray(exponents, dtype=int)
+
+        if shape is None:
+            shape = self.coefficients.shape[1:]
+
+        self.shape = tuple(shape)
+
+        # The variance is calculated from the approximation minus the mean,
+        # which needs a constant term
+        constant = np.all(self.exponents == 0, axis=1)
+        if not np.any(constant):
+            self.coefficients = np.concatenate([np.zeros((1, self.coefficients.shape[1])),
+                                                self.coefficients])
+            self.exponents = np.concatenate([np.zeros((1, self.exponents.shape[1]), dtype=int),
+                                             self.exponents])
+            constant = np.all(self.exponents == 0, axis=1)
+
+        self._constant = np.argmax(constant)
+
+
+    @classmethod
+    def from_poly(cls, poly, nr_uncertain_parameters):
+        """
+        Create the coefficient matrix representation of a polynomial.
+
+        Parameters
+        ----------
+        poly : chaospy.Poly
+            The polynomial approximation, with one polynomial for each
+            output.
+        nr_uncertain_parameters : int
+            The number of uncertain parameters (the dimension of the
+            distribution).
+
+        Returns
+        -------
+        expansion : PolynomialExpansion
+            The polynomial approximation.
+        """
+        poly = cp.set_dimensions(poly, nr_uncertain_parameters)
+
+        coefficients = np.array([np.asarray(coefficient, dtype=float).ravel()
+                                 for coefficient in poly.coefficients])
+
+        return cls(coefficients.reshape(len(poly.exponents), -1),
+                   poly.exponents,
+                   shape=poly.shape)
+
+
+    @property
+    def degree(self):
+        """
+        The highest exponent of each uncertain parameter.
+
+        Returns
+        -------
+        degree : numpy.ndarray
+            The highest exponent of each uncertain parameter.
+        """
+        return self.exponents.max(axis=0)
+
+
+    @staticmethod
+    def marginal_moments(distribution, degree):
+        """
+        Calculate the raw moments of the marginal distribution of each
+        uncertain parameter.
+
+        Parameters
+        ----------
+        distribution : chaospy.Dist
+            The independent multivariate distribution of the uncertain
+            parameters.
+        degree : int
+            The highest moment calculated. Must be at least twice the highest
+            exponent of the polynomial approximations.
+
+        Returns
+        -------
+        moments : numpy.ndarray
+            The moments, of shape ``(nr_uncertain_parameters, degree + 1)``,
+            where ``moments[j, d]`` is the expectation of ``x_j**d``.
+        """
+        nr_uncertain_parameters = len(distribution)
+
+        exponents = np.zeros((nr_uncertain_parameters, nr_uncertain_parameters*(degree + 1)), dtype=int)
+        for j in range(nr_uncertain_parameters):
+            exponents[j, j*(degree + 1):(j + 1)*(degree + 1)] = np.arange(degree + 1)
+
+        moments = np.asarray(distribution.mom(exponents), dtype=float).ravel()
+
+        return moments.reshape(nr_uncertain_parameters, degree + 1)
+
+
+    def _check_moments(self, moments):
+        """
+        Test that the moments are calculated to a high enough degree.
+        """
+        if moments.shape[1] <= 2*self.degree.max():
+            raise ValueError("moments must be calculated to at least degree {}, not {}".format(
+                2*self.degree.max(), moments.shape[1] - 1))
+
+
+    def _term_moments(self, moments, exponents):
+        """
+        The expectation of the monomials with the given exponents, of shape
+        ``exponents.shape[:-1]``, for independent uncertain parameters.
+        """
+        result = np.ones(exponents.shape[:-1])
+        for j in range(exponents.shape[-1]):
+            result *= moments[j][exponents[..., j]]
+
+        return result
+
+
+    def _centered(self, mean):
+        """
+        The coefficients of the polynomial approximation minus the mean.
+        """
+        coefficients = self.coefficients.copy()
+        coefficients[self._constant] -= mean
+
+        return coefficients
+
+
+    def _gram(self, moments):
+        """
+        The expectation of the product of each pair of monomials.
+        """
+        return self._term_moments(moments, self.exponents[:, np.newaxis] + self.exponents[np.newaxis])
+
+
+    def _quadratic(self, coefficients, gram):
+        """
+        The expectation of the square of each output, ``c^T G c``.
+        """
+        return np.sum(coefficients*np.dot(gram, coefficients), axis=0)
+
+
+    def mean(self, moments):
+        """
+        The mean of the polynomial approximation.
+
+        Parameters
+        ----------
+        moments : numpy.ndarray
+            The marginal moments, see ``marginal_moments``.
+
+        Returns
+        -------
+        mean : numpy.ndarray
+            The mean of each output, with shape `shape`.
+        """
+        return self._mean(moments).reshape(self.shape)
+
+
+    def _mean(self, moments):
+        return np.dot(self._term_moments(moments, self.exponents), self.coefficients)
+
+
+    def variance(self, moments):
+        """
+        The variance of the polynomial approximation.
+
+        Parameters
+        ----------
+        moments : numpy.ndarray
+            The marginal moments, see ``marginal_moments``.
+
+        Returns
+        -------
+        variance : numpy.ndarray
+            The variance of each output, with shape `shape`.
+        """
+        return self._variance(moments).reshape(self.shape)
+
+
+    def _variance(self, moments):
+        self._check_moments(moments)
+
+        coefficients = self._centered(self._mean(moments))
+
+        return self._quadratic(coefficients, self._gram(moments))
+
+
+    def sobol_first(self, moments):
+        """
+        The first order Sobol indices of the polynomial approximation, the
+        variance of the expectation conditioned on each uncertain parameter
+        divided by the variance.
+
+        Parameters
+        ----------
+        moments : numpy.ndarray
+            The marginal moments, see ``marginal_moments``.
+
+        Returns
+        -------
+        sobol_first : numpy.ndarray
+            The first order Sobol indices, of shape
+            ``(nr_uncertain_parameters,) + shape``. The indices of outputs
+            with zero variance are zero.
+        """
+        self._check_moments(moments)
+
+        coefficients = self._centered(self._mean(moments))
+        variance = self._quadratic(coefficients, self._gram(moments))
+        valids = variance != 0
+
+        sobol_first = np.zeros((len(moments),) + variance.shape)
+        for i in range(len(moments)):
+            # E[U | x_i] is a polynomial in x_i, where the other uncertain
+            # parameters are replaced by their moments
+            others = self.exponents.copy()
+            others[:, i] = 0
+            weights = self._term_moments(moments, others)
+
+            gram = np.outer(weights, weights)*moments[i][self.exponents[:, i][:, np.newaxis]
+                                                         + self.exponents[:, i][np.newaxis]]
+
+            sobol_first[i, valids] = self._quadratic(coefficients[:, valids], gram)/variance[valids]
+
+        return sobol_first.reshape((len(moments),) + self.shape)
+
+
+    def sobol_total(self, moments):
+        """
+        The total order Sobol indices of the polynomial approximation, one
+        minus the variance of the expectation conditioned on every uncertain
+        parameter except one divided by the variance.
+
+        Parameters
+        ----------
+        moments : numpy.ndarray
+            The marginal moments, see ``marginal_moments``.
+
+        Returns
+        -------
+        sobol_total : numpy.ndarray
+            The total order Sobol indices, of shape
+            ``(nr_uncertain_parameters,) + shape``. The indices of outputs
+            with zero variance are zero.
+        """
+        self._check_moments(moments)
+
+        coefficients = self._centered(self._mean(moments))
+        sums = self.exponents[:, np.newaxis] + self.exponents[np.newaxis]
+        variance = self._quadratic(coefficients, self._term_moments(moments, sums))
+        valids = variance != 0
+
+        sobol_total = np.zeros((len(moments),) + variance.shape)
+        for i in range(len(moments)):
+            # E[U | x_~i] is a polynomial in the other uncertain parameters,
+            # where x_i is replaced by its moments
+            own = moments[i][self.exponents[:, i]]
+
+            others = sums.copy()
+            others[:, :, i] = 0
+
+            gram = np.outer(own, own)*self._term_moments(moments, others)
+
+            conditional = self._quadratic(coefficients[:, valids], gram)
+            sobol_total[i, valids] = (variance[valids] - conditional)/variance[valids]
+
+        return sobol_total.reshape((len(moments),) + self.shape)
+
+
+    @staticmethod
+    def basis(samples, exponents):
+        """
+        Evaluate monomials at a set of samples.
+
+        Parameters
+        ----------
+        samples : array_like
+            The samples, of shape ``(nr_uncertain_parameters, nr_samples)``,
+            or ``(nr_samples,)`` for a single uncertain parameter.
+        exponents : array_like
+            The exponents of each monomial, of shape
+            ``(nr_terms, nr_uncertain_parameters)``.
+
+        Returns
+        -------
+        basis : numpy.ndarray
+            The monomials evaluated at the samples, of shape
+            ``(nr_samples, nr_terms)``.
+        """
+        samples = np.atleast_2d(np.asarray(samples, dtype=float))
+        exponents = np.asarray(exponents, dtype=int)
+
+        basis = np.ones((samples.shape[1], len(exponents)))
+        for j in range(len(samples)):
+            basis *= samples[j][:, np.newaxis]**exponents[:, j]
+
+        return basis
+
+
+    def aligned(self, exponents):
+        """
+        The coefficients of the terms in an exponent table that contains
+        every term of the polynomial approximation, used to evaluate several
+        polynomial approximations with a shared basis.
+
+        Parameters
+        ----------
+        exponents : array_like
+            The exponents of each term, of shape
+            ``(nr_terms, nr_uncertain_parameters)``.
+
+        Returns
+        -------
+        coefficients : numpy.ndarray
+            The coefficients, of shape ``(len(exponents), nr_outputs)``. The
+            coefficients of terms that are not in the polynomial
+            approximation are zero.
+
+        Raises
+        ------
+        ValueError
+            If a term of the polynomial approximation is not in `exponents`.
+        """
+        rows = {tuple(exponent): i for i, exponent in enumerate(np.asarray(exponents, dtype=int))}
+
+        coefficients = np.zeros((len(rows), self.coefficients.shape[1]))
+        for exponent, coefficient in zip(self.exponents, self.coefficients):
+            if tuple(exponent) not in rows:
+                raise ValueError("The term with exponents {} is not in exponents".format(tuple(exponent)))
+
+            coefficients[rows[tuple(exponent)]] += coefficient
+
+        return coefficients
+
+
+    def percentile(self, q, samples, exponents=None, max_size=10**7):
+        """
+        The percentiles of the polynomial approximation, estimated from the
+        approximation evaluated at a set of samples.
+
+        The outputs are sorted in blocks, and the values of each block are
+        evaluated in chunks of samples, so neither the values nor the
+        monomials evaluated at the samples (see ``basis``) have more than
+        `max_size` elements.
+
+        Parameters
+        ----------
+        q : {float, array_like}
+            The percentile(s) to calculate, between 0 and 100.
+        samples : array_like
+            The samples, of shape ``(nr_uncertain_parameters, nr_samples)``,
+            or ``(nr_samples,)`` for a single uncertain parameter.
+        exponents : {None, array_like}, optional
+            The exponents of the monomials the approximation is evaluated
+            with, shared by several polynomial approximations (see
+            ``aligned``). If None, the exponents of this polynomial
+            approximation are used. Default is None.
+        max_size : int, optional
+            The maximum number of values evaluated at the same time.
+            Default is 10**7.
+
+        Returns
+        -------
+        percentile : numpy.ndarray
+            The percentiles, of shape ``numpy.shape(q) + shape``.
+        """
+        if exponents is None:
+            exponents = self.exponents
+            coefficients = self.coefficients
+        else:
+            coefficients = self.aligned(exponents)
+
+        samples = np.atleast_2d(np.asarray(samples, dtype=float))
+
+        nr_samples = samples.shape[1]
+        nr_outputs = coefficients.shape[1]
+        chunk = max(1, max_size//max(1, len(coefficients)))
+        block = max(1, max_size//max(1, nr_samples))
+
+        # The monomials are evaluated once if they fit in a single chunk,
+        # and again for each block of outputs otherwise
+        basis = None
+        if chunk >= nr_samples:
+            basis = self.basis(samples, exponents)
+
+        percentile = np.empty((np.size(q), nr_outputs))
+        for start in range(0, nr_outputs, block):
+            block_coefficients = coefficients[:, start:start + block]
+
+            if basis is not None:
+                values = np.dot(basis, block_coefficients)
+            else:
+                values = np.empty((nr_samples, block_coefficients.shape[1]))
+                for sample in range(0, nr_samples, chunk):
+                    values[sample:sample + chunk] = np.dot(self.basis(samples[:, sample:sample + chunk], exponents),
+                                                           block_coefficients)
+
+            percentile[:, start:start + block] = np.percentile(values, np.ravel(q), axis=0)
+
+        return percentile.reshape(np.shape(q) + self.shape)
+
+
+    def __call__(self, *samples):
+        """
+        Evaluate the polynomial approximation.
+
+        Parameters
+        ----------
+        *samples : array_like
+            The values of each uncertain parameter, each of shape
+            ``(nr_samples,)``.
+
+        Returns
+        -------
+        values : numpy.ndarray
+            The polynomial approximation evaluated at the samples, of shape
+            ``shape + (nr_samples,)``.
+        """
+        samples = np.array([np.asarray(sample, dtype=float).ravel() for sample in samples])
+
+        values = np.dot(self.basis(samples, self.exponents), self.coefficients)
+
+        return values.T.reshape(self.shape + (samples.shape[1],))
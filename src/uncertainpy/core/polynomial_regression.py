@@ -0,0 +1,203 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+import chaospy as cp
+
+
+class PolynomialRegression(object):
+    """
+    Least squares fit of polynomial chaos expansions to model evaluations
+    at a fixed set of collocation nodes, shared by the model and every
+    feature.
+
+    The polynomials are evaluated at the nodes once, and the design matrix is
+    factorized (singular value decomposition) once for each set of nodes that
+    gave results. The model and features where the same nodes gave results
+    share the factorization, and every time point of a feature is solved in
+    a single multiple right hand side solve.
+
+    Parameters
+    ----------
+    P : chaospy.Poly
+        The orthogonal polynomials of the expansion.
+    nodes : array_like
+        The collocation nodes, of shape ``(nr_uncertain_parameters, nr_nodes)``
+        or ``(nr_nodes,)`` for a single uncertain parameter.
+
+    Attributes
+    ----------
+    P : chaospy.Poly
+        The orthogonal polynomials of the expansion.
+    design : numpy.ndarray
+        The polynomials evaluated at the nodes, of shape
+        ``(nr_nodes, nr_polynomials)``.
+
+    Notes
+    -----
+    The solution is the minimum norm least squares solution, the same as
+    ``chaospy.fit_regression`` gives.
+
+    Examples
+    --------
+    Fit the model and each feature::
+
+        regression = PolynomialRegression(P, nodes)
+
+        for feature in data:
+            masked_evaluations, mask = create_masked_evaluations(data, feature)
+            U_hat[feature] = regression.fit(masked_evaluations, mask)
+    """
+    def __init__(self, P, nodes):
+        self.P = P
+
+        nodes = np.atleast_2d(nodes)
+        self.design = np.asarray(P(*nodes), dtype=float).reshape(len(P), -1).T
+
+        self._factorizations = {}
+
+
+    def pseudo_inverse(self, mask=None):
+        """
+        The pseudo-inverse of the design matrix for the nodes that gave
+        results. It is calculated once for each mask.
+
+        Parameters
+        ----------
+        mask : {None, array_like}, optional
+            A boolean array that is True for the nodes that gave results.
+            If None, every node is used. Default is None.
+
+        Returns
+        -------
+        pseudo_inverse : numpy.ndarray
+            The pseudo-inverse, of shape ``(nr_polynomials, nr_masked_nodes)``.
+        """
+        if mask is None:
+            mask = np.ones(len(self.design), dtype=bool)
+
+        mask = np.asarray(mask, dtype=bool)
+        key = np.packbits(mask).tobytes()
+
+        if key not in self._factorizations:
+            design = self.design[mask]
+
+            U, s, Vt = np.linalg.svd(design, full_matrices=False)
+
+            # Same cutoff for small singular values as numpy.linalg.lstsq
+            cutoff = np.finfo(float).eps*max(design.shape)*(s[0] if len(s) else 0)
+            s_inv = np.zeros_like(s)
+            s_inv[s > cutoff] = 1/s[s > cutoff]
+
+            self._factorizations[key] = np.dot(Vt.T*s_inv, U.T)
+
+        return self._factorizations[key]
+
+
+    def coefficients(self, masked_evaluations, mask=None):
+        """
+        The expansion coefficients of the polynomial approximation.
+
+        Parameters
+        ----------
+        masked_evaluations : array_like
+            The evaluations at the nodes that gave results, with the nodes
+            along the first axis.
+        mask : {None, array_like}, optional
+            A boolean array that is True for the nodes that gave results.
+            If None, every node is used. Default is None.
+
+        Returns
+        -------
+        coefficients : numpy.ndarray
+            The coefficients, of shape ``(nr_polynomials,) + shape`` where
+            `shape` is the shape of a single evaluation.
+        """
+        masked_evaluations = np.asarray(masked_evaluations, dtype=float)
+        shape = masked_evaluations.shape[1:]
+
+        coefficients = np.dot(self.pseudo_inverse(mask),
+                              masked_evaluations.reshape(len(masked_evaluations), -1))
+
+        return coefficients.reshape((len(self.P),) + shape)
+
+
+    def fit(self, masked_evaluations, mask=None):
+        """
+        Fit the polynomial approximation to the evaluations.
+
+        Parameters
+        ----------
+        masked_evaluations : array_like
+            The evaluations at the nodes that gave results, with the nodes
+            along the first axis.
+        mask : {None, array_like}, optional
+            A boolean array that is True for the nodes that gave results.
+            If None, every node is used. Default is None.
+
+        Returns
+        -------
+        U_hat : chaospy.Poly
+            The polynomial approximation, with the shape of a single
+            evaluation.
+        """
+        coefficients = self.coefficients(masked_evaluations, mask)
+        shape = coefficients.shape[1:]
+
+        coefficients = coefficients.reshape(len(self.P), -1)
+
+        return cp.sum(self.P*coefficients.T, -1).reshape(shape)
+
+
+    def leave_one_out(self, masked_evaluations, mask=None):
+        """
+        The leave-one-out error of the polynomial approximation, relative to
+        the variance of the evaluations.
+
+        The leave-one-out residuals are calculated from a single fit, using the
+        diagonal of the hat matrix, ``(y_i - y_hat_i)/(1 - h_ii)``, so the
+        expansion is not refitted for each node that is left out.
+
+        Parameters
+        ----------
+        masked_evaluations : array_like
+            The evaluations at the nodes that gave results, with the nodes
+            along the first axis.
+        mask : {None, array_like}, optional
+            A boolean array that is True for the nodes that gave results.
+            If None, every node is used. Default is None.
+
+        Returns
+        -------
+        error : float
+            The mean squared leave-one-out residual divided by the variance of
+            the evaluations, summed over every value of an evaluation. If
+            the evaluations have no variance, the mean squared residual is
+            returned.
+        """
+        if mask is None:
+            mask = np.ones(len(self.design), dtype=bool)
+
+        mask = np.asarray(mask, dtype=bool)
+
+        masked_evaluations = np.asarray(masked_evaluations, dtype=float)
+        masked_evaluations = masked_evaluations.reshape(len(masked_evaluations), -1)
+
+        design = self.design[mask]
+        pseudo_inverse = self.pseudo_inverse(mask)
+
+        fitted = np.dot(design, np.dot(pseudo_inverse, masked_evaluations))
+        hat = np.sum(design*pseudo_inverse.T, axis=1)
+
+        # Nodes the fit interpolates exactly give an infinite error
+        with np.errstate(divide="ignore", invalid="ignore"):
+            residuals = (masked_evaluations - fitted)/(1 - hat[:, np.newaxis])
+
+        residuals[np.abs(1 - hat) < 10**-10] = np.inf
+
+        squared_error = np.sum(np.mean(residuals**2, axis=0))
+        variance = np.sum(np.var(masked_evaluations, axis=0))
+
+        if variance == 0:
+            return squared_error
+
+        return squared_error/variance
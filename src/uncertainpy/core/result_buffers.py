@@ -0,0 +1,253 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+class ResultBuffers(object):
+    """
+    Memory-mapped arrays shared between the current process and the worker
+    processes, where the workers write the values of regular model and
+    feature results directly, instead of sending them back with the result.
+
+    Each buffered model or feature has an array of shape
+    ``(nr_results,) + shape`` filled with numpy.nan, stored as a file in
+    `folder`. A result is written to the buffer if its values have the shape
+    of the buffer, and its time is the time of the buffer. The values and
+    time are then removed from the result, and replaced by
+    ``"buffered": True``.
+
+    Parameters
+    ----------
+    nr_results : int
+        The total number of results, the length of each buffer.
+    folder : {None, str}, optional
+        Name of the folder where the buffers are stored. If None, a temporary
+        folder is created, in shared memory (/dev/shm) if available.
+        Default is None.
+
+    Attributes
+    ----------
+    nr_results : int
+        The total number of results.
+    folder : str
+        Name of the folder where the buffers are stored.
+    buffers : dict
+        The ``(filename, shape, time)`` of each buffered model or feature.
+
+    Notes
+    -----
+    The buffers are shared through files mapped into memory, so the workers
+    must run on the same computer as the current process. The ResultBuffers
+    object itself only contains the file names, shapes and times, and is
+    cheap to send to the workers.
+    """
+    def __init__(self, nr_results, folder=None):
+        self.nr_results = nr_results
+
+        if folder is None:
+            shared_memory = "/dev/shm"
+            if not (os.path.isdir(shared_memory) and os.access(shared_memory, os.W_OK)):
+                shared_memory = None
+
+            folder = tempfile.mkdtemp(prefix="uncertainpy_buffers_", dir=shared_memory)
+
+        self.folder = folder
+        self.buffers = {}
+
+        self._arrays = {}
+
+
+    def __getstate__(self):
+        # The arrays are mapped again in each process
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+
+        return state
+
+
+    def __contains__(self, feature):
+        return feature in self.buffers
+
+
+    def add(self, feature, shape, time):
+        """
+        Create a buffer for a model or feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of the model or feature.
+        shape : tuple
+            The shape of the values of a single result.
+        time : {float, array_like}
+            The time of the results, shared by every result in the buffer.
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        filename = os.path.join(self.folder, "buffer_{}.dat".format(len(self.buffers)))
+        shape = tuple(shape)
+
+        array = np.memmap(filename, dtype=float, mode="w+", shape=(self.nr_results,) + shape)
+        array[:] = np.nan
+
+        self.buffers[feature] = (filename, shape, time)
+        self._arrays[feature] = array
+
+
+    def array(self, feature):
+        """
+        The buffer of a model or feature.
+
+        Parameters
+        ----------
+        feature : str
+            Name of the model or feature.
+
+        Returns
+        -------
+        array : numpy.memmap
+            The array of shape ``(nr_results,) + shape`` with the values of
+            each result.
+        """
+        if feature not in self._arrays:
+            filename, shape = self.buffers[feature][:2]
+            self._arrays[feature] = np.memmap(filename, dtype=float, mode="r+",
+                                              shape=(self.nr_results,) + shape)
+
+        return self._arrays[feature]
+
+
+    def fits(self, feature, values, time):
+        """
+        Test if a result of a model or feature can be written to its buffer.
+
+        Parameters
+        ----------
+        feature : str
+            Name of the model or feature.
+        values : array_like
+            The values of the result.
+        time : {float, array_like}
+            The time of the result.
+
+        Returns
+        -------
+        fits : bool
+            True if `feature` has a buffer, `values` is a numeric array with
+            the shape of the buffer, and `time` is the time of the buffer.
+        """
+        if feature not in self.buffers:
+            return False
+
+        filename, shape, buffer_time = self.buffers[feature]
+
+        if not isinstance(values, np.ndarray) or values.shape != shape:
+            return False
+
+        if not np.issubdtype(values.dtype, np.number) or np.iscomplexobj(values):
+            return False
+
+        try:
+            return np.shape(time) == np.shape(buffer_time) and \
+                np.array_equal(time, buffer_time, equal_nan=True)
+        except TypeError:
+            return False
+
+
+    def store(self, index, result):
+        """
+        Write the values of the buffered models and features of a result to
+        the buffers, and remove them from the result.
+
+        Parameters
+        ----------
+        index : int
+            The index of the node the result belongs to.
+        result : dict
+            The result dictionary of the model evaluation.
+
+        Returns
+        -------
+        result : dict
+            The result dictionary, where the buffered models and features have
+            ``"buffered": True`` instead of ``"values"`` and ``"time"``.
+        """
+        for feature in self.buffers:
+            if feature not in result or result[feature].get("buffered", False):
+                continue
+
+            values = result[feature]["values"]
+            time = result[feature]["time"]
+
+            if "interpolation" in result[feature] or not self.fits(feature, values, time):
+                continue
+
+            self.array(feature)[index] = values
+
+            del result[feature]["values"]
+            del result[feature]["time"]
+            result[feature]["buffered"] = True
+
+        return result
+
+
+    def load(self, index, result):
+        """
+        Put the values and time of the buffered models and features back into
+        a result. The values are views of the buffers, not copies.
+
+        Parameters
+        ----------
+        index : int
+            The index of the node the result belongs to.
+        result : dict
+            The result dictionary, as returned by ``store``.
+
+        Returns
+        -------
+        result : dict
+            The result dictionary with ``"values"`` and ``"time"`` for every
+            model and feature.
+        """
+        for feature in result:
+            if result[feature].pop("buffered", False):
+                result[feature]["values"] = self.array(feature)[index]
+                result[feature]["time"] = self.buffers[feature][2]
+
+        return result
+
+
+    def is_buffered(self, feature, values):
+        """
+        Test if `values` is a result stored in the buffer of `feature`.
+
+        Parameters
+        ----------
+        feature : str
+            Name of the model or feature.
+        values : array_like
+            The values of a result.
+
+        Returns
+        -------
+        is_buffered : bool
+            True if `values` is a view of the buffer of `feature`.
+        """
+        return feature in self.buffers and isinstance(values, np.ndarray) and \
+            np.may_share_memory(values, self.array(feature))
+
+
+    def close(self):
+        """
+        Remove the files of the buffers. Arrays that are still in use remain
+        valid until they are deleted.
+        """
+        self._arrays = {}
+        self.buffers = {}
+
+        shutil.rmtree(self.folder, ignore_errors=True)
@@ -0,0 +1,292 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import re
+import tempfile
+
+import dill
+
+from ..utils.logger import get_logger, setup_module_logger
+
+
+# The chunk files, and the temporary files they are written through
+chunk_pattern = re.compile(r"^chunk_(\d{6}\.pkl|.*\.tmp)$")
+
+
+class ResultStore(object):
+    """
+    A chunked on-disk store of model results, so the results of many model
+    evaluations do not have to be held in memory at the same time.
+
+    The results are written to the store as they are completed, in any
+    order, and are read back in the order of the nodes, one chunk at a time.
+    Chunk ``k`` contains the results of the nodes
+    ``k*chunk_size, ..., (k + 1)*chunk_size - 1``, and is written to disk as
+    soon as all its results are completed.
+
+    Parameters
+    ----------
+    folder : str
+        Name of the folder where the chunks are stored. The folder can be
+        shared with other files, since only the chunk files of the store are
+        removed by ``clear``.
+    nr_results : int
+        The total number of results in the store.
+    chunk_size : int, optional
+        The number of results in each chunk.
+        Default is 100.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+
+    Attributes
+    ----------
+    folder : str
+        Name of the folder where the chunks are stored.
+    nr_results : int
+        The total number of results in the store.
+    chunk_size : int
+        The number of results in each chunk.
+    nr_chunks : int
+        The number of chunks.
+
+    Notes
+    -----
+    The results are stored with dill, so results containing interpolation
+    objects can be stored. Only the chunks that are not yet completed, and
+    the last chunk that was read, are held in memory. Since results are
+    completed in approximately the order of the nodes, only a few chunks are
+    incomplete at the same time, and the memory used is bounded by the chunk
+    size rather than the number of nodes.
+
+    Examples
+    --------
+    Slices and indices read the results back from disk::
+
+        store = ResultStore("results", nr_results=1000, chunk_size=100)
+        for index, result in runmodel.iterate_nodes(nodes, uncertain_parameters):
+            store.append(index, result)
+
+        first_results = store[:10]
+        for result in store:
+            ...
+    """
+    def __init__(self, folder, nr_results, chunk_size=100, logger_level="info"):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer, not {}".format(chunk_size))
+
+        self.folder = folder
+        self.nr_results = nr_results
+        self.chunk_size = chunk_size
+
+        self._buffers = {}
+        self._counts = {}
+        self._loaded_chunk = None
+        self._loaded_results = None
+        self._created_folder = False
+
+        setup_module_logger(class_instance=self, level=logger_level)
+
+
+    @property
+    def nr_chunks(self):
+        """
+        The number of chunks.
+
+        Returns
+        -------
+        nr_chunks : int
+            The number of chunks.
+        """
+        return (self.nr_results + self.chunk_size - 1)//self.chunk_size
+
+
+    def chunk_length(self, chunk):
+        """
+        The number of results in a chunk. The last chunk can be shorter than
+        `chunk_size`.
+
+        Parameters
+        ----------
+        chunk : int
+            The number of the chunk.
+
+        Returns
+        -------
+        length : int
+            The number of results in the chunk.
+        """
+        return min(self.chunk_size, self.nr_results - chunk*self.chunk_size)
+
+
+    def filename(self, chunk):
+        """
+        The name of the file where a chunk is stored.
+
+        Parameters
+        ----------
+        chunk : int
+            The number of the chunk.
+
+        Returns
+        -------
+        filename : str
+            Name of the file.
+        """
+        return os.path.join(self.folder, "chunk_{:06d}.pkl".format(chunk))
+
+
+    def append(self, index, result):
+        """
+        Add the result of a model evaluation to the store. The chunk the
+        result belongs to is written to disk when all its results are added.
+
+        Parameters
+        ----------
+        index : int
+            The index of the node the result belongs to.
+        result : dict
+            The result dictionary of the model evaluation.
+
+        Raises
+        ------
+        IndexError
+            If `index` is outside the store.
+        """
+        if index < 0 or index >= self.nr_results:
+            raise IndexError("Result index {} out of range for a store with {} results".format(index, self.nr_results))
+
+        chunk = index//self.chunk_size
+
+        buffer = self._buffers.setdefault(chunk, [None]*self.chunk_length(chunk))
+        buffer[index - chunk*self.chunk_size] = result
+
+        self._counts[chunk] = self._counts.get(chunk, 0) + 1
+
+        if self._counts[chunk] == len(buffer):
+            self._write(chunk, buffer)
+
+            del self._buffers[chunk]
+            del self._counts[chunk]
+
+
+    def flush(self):
+        """
+        Write the chunks that are not yet completed to disk. Results that are
+        missing from these chunks are stored as None.
+        """
+        logger = get_logger(self)
+
+        for chunk in sorted(self._buffers):
+            self._write(chunk, self._buffers[chunk])
+
+            logger.warning("Chunk {} in {} was written with {} of {} results".format(
+                chunk, self.folder, self._counts[chunk], self.chunk_length(chunk)))
+
+        self._buffers = {}
+        self._counts = {}
+
+
+    def load(self, chunk):
+        """
+        Read a chunk of results from disk.
+
+        Parameters
+        ----------
+        chunk : int
+            The number of the chunk.
+
+        Returns
+        -------
+        results : list
+            The results in the chunk, in the order of the nodes.
+
+        Raises
+        ------
+        IOError
+            If the chunk is not written to disk.
+        """
+        if chunk != self._loaded_chunk:
+            # Release the previous chunk before the next is read
+            self._loaded_results = None
+
+            with open(self.filename(chunk), "rb") as f:
+                self._loaded_results = dill.load(f)
+
+            self._loaded_chunk = chunk
+
+        return self._loaded_results
+
+
+    def __len__(self):
+        return self.nr_results
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.nr_results))]
+
+        if index < 0:
+            index += self.nr_results
+
+        if index < 0 or index >= self.nr_results:
+            raise IndexError("Result index out of range")
+
+        chunk = index//self.chunk_size
+        return self.load(chunk)[index - chunk*self.chunk_size]
+
+
+    def __iter__(self):
+        for chunk in range(self.nr_chunks):
+            for result in self.load(chunk):
+                yield result
+
+
+    def clear(self):
+        """
+        Remove the chunk files of the stored results. Other files in the
+        folder are kept, and the folder itself is only removed if it was
+        created by the store and is empty.
+        """
+        self._buffers = {}
+        self._counts = {}
+        self._loaded_chunk = None
+        self._loaded_results = None
+
+        if not os.path.isdir(self.folder):
+            return
+
+        for name in os.listdir(self.folder):
+            if chunk_pattern.match(name):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+        if self._created_folder:
+            try:
+                os.rmdir(self.folder)
+            except OSError:
+                pass
+            else:
+                self._created_folder = False
+
+
+    def _write(self, chunk, results):
+        """
+        Write a chunk of results to disk.
+        """
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+            self._created_folder = True
+
+        handle, tmp_filename = tempfile.mkstemp(dir=self.folder, prefix="chunk_", suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            dill.dump(results, f)
+
+        os.replace(tmp_filename, self.filename(chunk))
+
+        if chunk == self._loaded_chunk:
+            self._loaded_chunk = None
+            self._loaded_results = None
@@ -1,12 +1,17 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import os
+import copy
+import time
 import warnings
+import hashlib
+import inspect
+import itertools
+import functools
+import traceback
+import collections
 import six
-
-try:
-    from itertools import imap
-except ImportError:
-    imap = map
+from six.moves import queue
 
 from tqdm import tqdm
 import numpy as np
@@ -21,8 +26,65 @@ except ImportError:
 from ..data import Data
 from ..utils.utility import lengths, contains_nan
 from ..utils.logger import get_logger
+from ..utils.timer import Timer
+from ..utils.threads import thread_limits
 from .base import ParameterBase
-from .parallel import Parallel
+from .parallel import Parallel, EvaluationError
+from .executors import SerialExecutor, ProcessExecutor, _parallel_state
+from .async_executor import AsyncExecutor
+from .runtime_predictor import RuntimePredictor
+from .checkpoint import Checkpoint
+from .evaluation_cache import EvaluationCache
+from .result_store import ResultStore
+from .result_buffers import ResultBuffers
+
+
+# Put in the queue of completed batches when the executor reports that a
+# batch has started, see RunModel._iterate_batches
+_BatchStarted = collections.namedtuple("_BatchStarted", ["time"])
+
+
+
+class ErrorBudgetExceeded(RuntimeError):
+    """
+    Raised when more model evaluations fail than the `error_budget` of
+    RunModel allows.
+
+    Parameters
+    ----------
+    message : str
+        The error message.
+    failed_evaluations : dict
+        The ``{"parameters": dict, "traceback": str}`` of each failed
+        evaluation, with the index of the node as key.
+    checkpoint : {None, str}, optional
+        Name of the checkpoint file the completed evaluations are saved in.
+        Default is None.
+
+    Attributes
+    ----------
+    failed_evaluations : dict
+        The model parameters and traceback of each failed evaluation.
+    checkpoint : {None, str}
+        Name of the checkpoint file the completed evaluations are saved in.
+        Run again with this `checkpoint` to resume from the completed
+        evaluations.
+    """
+    def __init__(self, message, failed_evaluations, checkpoint=None):
+        super(ErrorBudgetExceeded, self).__init__(message)
+
+        self.failed_evaluations = failed_evaluations
+        self.checkpoint = checkpoint
+
+
+    def __str__(self):
+        message = super(ErrorBudgetExceeded, self).__str__()
+
+        if self.checkpoint is not None:
+            message += ". The completed evaluations are saved in {checkpoint}, " \
+                       "run with checkpoint=\"{checkpoint}\" to resume".format(checkpoint=self.checkpoint)
+
+        return message
 
 
 
@@ -61,7 +123,146 @@ class RunModel(ParameterBase):
         If None, no multiprocessing is used.
         If "max", the maximum number of CPUs on the computer
         (multiprocess.cpu_count()) is used.
+        Ignored if an `executor` is given.
         Default is "max".
+    executor : {None, Executor}, optional
+        The executor used to evaluate the model and features, for example a
+        ThreadExecutor or MPIExecutor. If None, a ProcessExecutor with `CPUs`
+        worker processes is used, or a SerialExecutor if `CPUs` is None.
+        Models with a coroutine run function use an AsyncExecutor with
+        `max_concurrent` and `feature_workers`.
+        Default is None.
+    chunksize : {"auto", int}, optional
+        The number of model evaluations sent to a worker process at a time.
+        If "auto", the number of evaluations in each batch is adapted to the
+        measured time of each model evaluation, see ``batch_size``. Models
+        that implement ``run_batch`` evaluate each batch with a single
+        vectorized call.
+        Default is "auto".
+    checkpoint : {None, str}, optional
+        Name of a checkpoint file where the result of each model evaluation is
+        stored as soon as it is completed. Model parameters that already have
+        a result in the checkpoint file are not evaluated again.
+        If None, no checkpoint is used.
+        Default is None.
+    cache : {None, str, EvaluationCache}, optional
+        A persistent cache of model evaluations. Model parameters that already
+        are evaluated for the same model and features are read from the cache
+        instead of evaluating the model again. If a string, it is the name of
+        the folder where the cache is stored.
+        If None, no cache is used.
+        Default is None.
+    timeout : {None, float}, optional
+        The maximum wall time in seconds of each model evaluation when running
+        in parallel. Evaluations that take longer are stopped, their result
+        is set to numpy.nan, and they are counted as failed evaluations (see
+        `error_budget`). With a timeout the evaluations are sent one at a
+        time to idle workers, and the whole pool is restarted when an
+        evaluation times out, so it requires an executor that can stop the
+        running evaluations, such as the ProcessExecutor. The time is measured
+        from when the evaluation starts in a worker, so the time used to
+        restart the workers and set up the model is not counted. If None,
+        there is no time limit.
+        Default is None.
+    retries : int, optional
+        The number of times an evaluation that times out is tried again before
+        the result is set to numpy.nan.
+        Default is 0.
+    max_tasks_per_worker : {None, int}, optional
+        The number of batches of model evaluations each worker process
+        performs before it is replaced by a new worker process. Useful for
+        models that leak memory. If None, the worker processes are not
+        replaced. Only used by the default ProcessExecutor.
+        Default is None.
+    max_concurrent : int, optional
+        The maximum number of model evaluations running at the same time for
+        models with a coroutine run function. Only used by the default
+        AsyncExecutor.
+        Default is 32.
+    feature_workers : {None, int}, optional
+        The number of worker processes that postprocess the model results and
+        calculate the features for models with a coroutine run function. If
+        None, they are calculated in the event loop thread. Only used by the
+        default AsyncExecutor.
+        Default is None.
+    result_store : {None, str}, optional
+        Name of a folder where the results of the model evaluations are
+        streamed to disk as they are completed, instead of being held in
+        memory until every evaluation is finished. The results are read back
+        from the folder in chunks when the Data object is created, and the
+        chunk files are removed afterwards, while other files in the folder
+        are kept. If None, the results are held in memory.
+        Default is None.
+    result_chunk_size : int, optional
+        The number of results in each chunk of the `result_store`. The memory
+        used to hold the results is bounded by the chunk size instead of
+        the number of model evaluations.
+        Default is 100.
+    time_grid : {None, "pilot", array_like, dict}, optional
+        A fixed time grid the model and features that are interpolated are
+        resampled onto by the workers, so the workers return arrays of fixed
+        length instead of interpolation objects. Either a single time array
+        used for the model and every interpolated feature, a dictionary
+        ``{"model/feature name": time array}``, or "pilot" to use the time
+        arrays of a pilot evaluation of the first node, evaluated in the
+        current process before the other nodes are sent to the workers. The
+        pilot time grid is stored in the `checkpoint` and `cache`, so the
+        pilot is not evaluated again when the run is resumed. If None, the
+        interpolation objects are returned and evaluated when the Data
+        object is created.
+        Default is None.
+    shared_buffers : bool, optional
+        If True, the workers write the values of model and feature results
+        that have the same shape as the first result directly into
+        memory-mapped arrays shared with the current process, instead of
+        sending them back with the results. The arrays are used as the
+        evaluations of the Data object. Requires that the workers run on
+        the same computer.
+        Default is False.
+    timings : bool, optional
+        If True, a summary of the wall and CPU time used by each stage of
+        the model evaluations (see `timer`) is stored in ``data.timings``,
+        and saved with the data.
+        Default is False.
+    schedule : {"fifo", "longest_first"}, optional
+        The order the nodes are sent to the executor. If "fifo", the nodes
+        are evaluated in order. If "longest_first", the run time of the
+        remaining nodes is predicted from the run times of the completed
+        evaluations with a RuntimePredictor, and the nodes predicted to be
+        most expensive are sent first. The nodes are sorted again each time
+        the number of completed evaluations has grown by a quarter, in
+        windows of 32 nodes for each worker, so the nodes are still read as
+        they are sent. Evaluations that time out are recorded with the
+        timeout as their run time.
+        Default is "fifo".
+    error_budget : {None, int, float}, optional
+        The number of model evaluations that are allowed to fail. If an int,
+        the number of failed evaluations, and if a float between 0 and 1, the
+        fraction of the nodes. Evaluations that fail within the budget are set
+        to numpy.nan, and their traceback is stored in
+        ``data.failed_evaluations``. Failed evaluations are neither stored in
+        the checkpoint nor in the cache, so they are evaluated again when
+        resuming. When the budget is exceeded, the evaluations are stopped,
+        the completed evaluations are saved in `checkpoint`, or in
+        ``<model name>_partial.checkpoint`` in the current directory, and an
+        ErrorBudgetExceeded is raised. If None, the first evaluation that
+        fails raises its exception.
+        Default is None.
+    worker_threads : {"auto", None, int}, optional
+        The number of OpenMP and BLAS threads (OpenBLAS, MKL, ...) used by
+        each model evaluation running at the same time. If "auto", the CPUs
+        on the computer are divided between the workers. The limit is set
+        when each worker process starts, or only while the model is
+        evaluated when the model is evaluated in the current process. The
+        thread pools of libraries that already are loaded can only be
+        limited if threadpoolctl is installed. If None, the number
+        of threads is not limited.
+        Default is "auto".
+    pin_workers : {False, "core", "numa"}, optional
+        Pin each worker process to a distinct core ("core") or NUMA node
+        ("numa"). Only supported on Linux. If False, the workers are not
+        pinned.
+        Default is False.
 
 
     Attributes
@@ -74,6 +275,64 @@ class RunModel(ParameterBase):
         The features of the model to perform uncertainty quantification on.
     CPUs : int
         The number of CPUs used when calculating the model and features.
+    executor : Executor
+        The executor used to evaluate the model and features.
+    chunksize : {"auto", int}
+        The number of model evaluations sent to a worker process at a time.
+    checkpoint : {None, str}
+        Name of the checkpoint file.
+    cache : {None, EvaluationCache}
+        The persistent cache of model evaluations.
+    timeout : {None, float}
+        The maximum wall time in seconds of each model evaluation.
+    retries : int
+        The number of times an evaluation that times out is tried again.
+    max_tasks_per_worker : {None, int}
+        The number of batches each worker process performs before it is
+        replaced.
+    max_concurrent : int
+        The maximum number of coroutine model evaluations running at the same
+        time.
+    feature_workers : {None, int}
+        The number of worker processes calculating the features of coroutine
+        models.
+    result_store : {None, str}
+        Name of the folder where the results are streamed to disk.
+    result_chunk_size : int
+        The number of results in each chunk of the `result_store`.
+    time_grid : {None, "pilot", array, dict}
+        The fixed time grid the interpolated results are resampled onto.
+    shared_buffers : bool
+        If the workers write the regular results into shared buffers.
+    timings : bool
+        If a summary of the time used by each stage is stored in the data.
+    schedule : {"fifo", "longest_first"}
+        The order the nodes are sent to the executor.
+    error_budget : {None, int, float}
+        The number or fraction of model evaluations that are allowed to fail.
+    failed_evaluations : dict
+        The model parameters and traceback of each evaluation that failed in
+        the last model evaluations, with the index of the node as key.
+    worker_threads : {"auto", None, int}
+        The number of OpenMP and BLAS threads used by each model evaluation.
+    pin_workers : {False, "core", "numa"}
+        If the worker processes are pinned to cores or NUMA nodes.
+    timer : Timer
+        The wall and CPU time used by each stage of the last model
+        evaluations: the model evaluation, the postprocessing, the
+        preprocessing, each feature, the interpolation, and the creation of
+        the Data object. Results read from a checkpoint or the cache are not
+        timed.
+
+    Notes
+    -----
+    The model evaluations are sent in batches to an executor (see
+    ``uncertainpy.core.Executor``). The default ProcessExecutor starts a pool
+    of worker processes the first time it is needed, sends the model and
+    features to each worker and sets up the model (``Model.setup``) once,
+    and reuses the pool until ``close`` is called or the model or features
+    are changed. Use RunModel as a context manager to shut down the workers
+    when they are no longer needed.
 
     See Also
     --------
@@ -82,6 +341,7 @@ class RunModel(ParameterBase):
     uncertainpy.Parameters
     uncertainpy.models.Model
     uncertainpy.models.Model.run : Requirements for the model run function.
+    uncertainpy.core.Executor
     """
 
     def __init__(self,
@@ -89,13 +349,38 @@ class RunModel(ParameterBase):
                  parameters,
                  features=None,
                  logger_level="info",
-                 CPUs="max"):
-
-        if CPUs == "max":
-            import multiprocess
-
-            CPUs = multiprocess.cpu_count()
-
+                 CPUs="max",
+                 executor=None,
+                 chunksize="auto",
+                 checkpoint=None,
+                 cache=None,
+                 timeout=None,
+                 retries=0,
+                 max_tasks_per_worker=None,
+                 max_concurrent=32,
+                 feature_workers=None,
+                 result_store=None,
+                 result_chunk_size=100,
+                 time_grid=None,
+                 shared_buffers=False,
+                 timings=False,
+                 schedule="fifo",
+                 error_budget=None,
+                 worker_threads="auto",
+                 pin_workers=False):
+
+        self._executor = None
+        self._custom_executor = False
+        self._CPUs = None
+        self._cache = None
+        self._max_tasks_per_worker = None
+        self._max_concurrent = 32
+        self._feature_workers = None
+        self._time_grid = None
+        self._buffers = None
+
+        self.timer = Timer()
+        self.failed_evaluations = {}
 
         self._parallel = Parallel(model=model,
                                   features=features,
@@ -107,6 +392,28 @@ class RunModel(ParameterBase):
                                        logger_level=logger_level)
 
         self.CPUs = CPUs
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_concurrent = max_concurrent
+        self.feature_workers = feature_workers
+        self.chunksize = chunksize
+        self.checkpoint = checkpoint
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
+        self.result_store = result_store
+        self.result_chunk_size = result_chunk_size
+        self.time_grid = time_grid
+        self.shared_buffers = shared_buffers
+        self.timings = timings
+        self.schedule = schedule
+        self.error_budget = error_budget
+        self.worker_threads = worker_threads
+        self.pin_workers = pin_workers
+
+        if executor is not None:
+            self.executor = executor
+
+        self.target_batch_time = 0.1
 
 
     @ParameterBase.features.setter
@@ -118,10 +425,366 @@ class RunModel(ParameterBase):
 
     @ParameterBase.model.setter
     def model(self, new_model):
+        # The previous model is no longer evaluated in the current process
+        if self.model is not None and self.model is not new_model:
+            self.model._ensure_teardown()
+
         ParameterBase.model.fset(self, new_model)
 
         self._parallel.model = self.model
 
+        # Coroutine models use another default executor
+        if self._executor is not None and not self._custom_executor and self.model is not None \
+                and isinstance(self._executor, AsyncExecutor) != self.model.is_async:
+            self.executor = None
+
+
+    @property
+    def CPUs(self):
+        """
+        The number of CPUs used when calculating the model and features.
+
+        Parameters
+        ----------
+        new_CPUs : {int, None, "max"}
+            The number of CPUs to use when calculating the model and features.
+            If None, no multiprocessing is used.
+            If "max", the maximum number of CPUs on the computer
+            (multiprocess.cpu_count()) is used.
+
+        Returns
+        -------
+        CPUs : {int, None}
+            The number of CPUs used when calculating the model and features.
+
+        Notes
+        -----
+        Changing the number of CPUs closes the current executor, and replaces
+        it with the default executor for the new number of CPUs.
+        """
+        return self._CPUs
+
+
+    @CPUs.setter
+    def CPUs(self, new_CPUs):
+        if new_CPUs == "max":
+            import multiprocess
+
+            new_CPUs = multiprocess.cpu_count()
+
+        if new_CPUs != self._CPUs or self._executor is None:
+            self._CPUs = new_CPUs
+            self.executor = None
+
+
+    @property
+    def executor(self):
+        """
+        The executor used to evaluate the model and features.
+
+        Parameters
+        ----------
+        new_executor : {None, Executor}
+            The executor used to evaluate the model and features.
+            If None, a ProcessExecutor with `CPUs` worker processes is used,
+            or a SerialExecutor if `CPUs` is None. Models with a coroutine
+            run function use an AsyncExecutor with `max_concurrent` and
+            `feature_workers`.
+
+        Returns
+        -------
+        executor : Executor
+            The executor used to evaluate the model and features.
+
+        Notes
+        -----
+        Setting a new executor closes the current executor.
+
+        See Also
+        --------
+        uncertainpy.core.Executor
+        uncertainpy.core.SerialExecutor
+        uncertainpy.core.ProcessExecutor
+        uncertainpy.core.ThreadExecutor
+        uncertainpy.core.MPIExecutor
+        uncertainpy.core.AsyncExecutor
+        """
+        return self._executor
+
+
+    @executor.setter
+    def executor(self, new_executor):
+        self.close()
+
+        if new_executor is None:
+            self._custom_executor = False
+
+            if self.model is not None and self.model.is_async:
+                new_executor = AsyncExecutor(max_concurrent=self.max_concurrent,
+                                             feature_workers=self.feature_workers)
+            elif self.CPUs:
+                new_executor = ProcessExecutor(CPUs=self.CPUs,
+                                               max_tasks_per_worker=self.max_tasks_per_worker)
+            else:
+                new_executor = SerialExecutor()
+
+        else:
+            self._custom_executor = True
+
+        self._executor = new_executor
+
+
+    @property
+    def max_tasks_per_worker(self):
+        """
+        The number of batches of model evaluations each worker process
+        performs before it is replaced by a new worker process.
+
+        Parameters
+        ----------
+        new_max_tasks_per_worker : {None, int}
+            The number of batches each worker performs before it is replaced.
+            If None, the worker processes live as long as the pool.
+
+        Returns
+        -------
+        max_tasks_per_worker : {None, int}
+            The number of batches each worker performs before it is replaced.
+
+        Notes
+        -----
+        Replacing the worker processes regularly frees memory leaked by the
+        model. Only used by the default ProcessExecutor. Changing
+        `max_tasks_per_worker` closes the current pool of worker processes.
+        """
+        return self._max_tasks_per_worker
+
+
+    @max_tasks_per_worker.setter
+    def max_tasks_per_worker(self, new_max_tasks_per_worker):
+        changed = new_max_tasks_per_worker != self._max_tasks_per_worker
+
+        self._max_tasks_per_worker = new_max_tasks_per_worker
+
+        if changed and not self._custom_executor:
+            self.executor = None
+
+
+    @property
+    def max_concurrent(self):
+        """
+        The maximum number of model evaluations running at the same time for
+        models with a coroutine run function.
+
+        Parameters
+        ----------
+        new_max_concurrent : int
+            The maximum number of coroutine model evaluations running at the
+            same time.
+
+        Returns
+        -------
+        max_concurrent : int
+            The maximum number of coroutine model evaluations running at the
+            same time.
+
+        Notes
+        -----
+        Only used by the default AsyncExecutor. Changing `max_concurrent`
+        replaces the current executor.
+        """
+        return self._max_concurrent
+
+
+    @max_concurrent.setter
+    def max_concurrent(self, new_max_concurrent):
+        changed = new_max_concurrent != self._max_concurrent
+
+        self._max_concurrent = new_max_concurrent
+
+        if changed and not self._custom_executor:
+            self.executor = None
+
+
+    @property
+    def feature_workers(self):
+        """
+        The number of worker processes that postprocess the model results and
+        calculate the features for models with a coroutine run function.
+
+        Parameters
+        ----------
+        new_feature_workers : {None, int}
+            The number of feature worker processes. If None, the features are
+            calculated in the event loop thread.
+
+        Returns
+        -------
+        feature_workers : {None, int}
+            The number of feature worker processes.
+
+        Notes
+        -----
+        Only used by the default AsyncExecutor. Changing `feature_workers`
+        replaces the current executor.
+        """
+        return self._feature_workers
+
+
+    @feature_workers.setter
+    def feature_workers(self, new_feature_workers):
+        changed = new_feature_workers != self._feature_workers
+
+        self._feature_workers = new_feature_workers
+
+        if changed and not self._custom_executor:
+            self.executor = None
+
+
+    @property
+    def time_grid(self):
+        """
+        The fixed time grid the model and features that are interpolated are
+        resampled onto by the workers.
+
+        Parameters
+        ----------
+        new_time_grid : {None, "pilot", array_like, dict}
+            Either a single time array used for the model and every
+            interpolated feature, a dictionary
+            ``{"model/feature name": time array}``, or "pilot" to use the time
+            arrays of a pilot evaluation of the first node. If None, the
+            interpolation objects are returned by the workers.
+
+        Returns
+        -------
+        time_grid : {None, "pilot", array_like, dict}
+            The fixed time grid.
+        """
+        return self._time_grid
+
+
+    @time_grid.setter
+    def time_grid(self, new_time_grid):
+        self._time_grid = new_time_grid
+
+        # The pilot time grid is found when the model is evaluated
+        if isinstance(new_time_grid, six.string_types):
+            if new_time_grid != "pilot":
+                raise ValueError("time_grid must be None, \"pilot\", a time array or a dictionary, not {}".format(new_time_grid))
+
+            self._parallel.time_grid = None
+        else:
+            self._parallel.time_grid = new_time_grid
+
+
+    @property
+    def cache(self):
+        """
+        The persistent cache of model evaluations.
+
+        Parameters
+        ----------
+        new_cache : {None, str, EvaluationCache}
+            The cache of model evaluations. If a string, it is the name of the
+            folder where the cache is stored, and an EvaluationCache with the
+            default maximum size is created. If None, no cache is used.
+
+        Returns
+        -------
+        cache : {None, EvaluationCache}
+            The cache of model evaluations.
+
+        See Also
+        --------
+        uncertainpy.core.EvaluationCache
+        """
+        return self._cache
+
+
+    @cache.setter
+    def cache(self, new_cache):
+        if isinstance(new_cache, six.string_types):
+            new_cache = EvaluationCache(new_cache, logger_level=self._logger_level)
+
+        self._cache = new_cache
+
+
+    def batch_size(self, nr_remaining, evaluation_time=None):
+        """
+        Find the number of model evaluations to send to a worker process in
+        the next batch.
+
+        Parameters
+        ----------
+        nr_remaining : int
+            The number of model evaluations that have not yet been sent to
+            the workers.
+        evaluation_time : {float, None}, optional
+            The estimated wall time of a single model evaluation in seconds.
+            If None, no model evaluations have been timed yet.
+            Default is None.
+
+        Returns
+        -------
+        batch_size : int
+            The number of model evaluations in the next batch.
+
+        Raises
+        ------
+        ValueError
+            If chunksize is neither "auto" nor a positive integer.
+
+        Notes
+        -----
+        If `chunksize` is an integer, batches of `chunksize` evaluations are
+        used. If `chunksize` is "auto", a single evaluation is sent until the
+        evaluation time is known. Then the batch is sized to take
+        ``target_batch_time`` seconds, but never so large that there are
+        fewer than four batches per worker among the remaining evaluations.
+        """
+        if self.chunksize != "auto":
+            if int(self.chunksize) < 1:
+                raise ValueError("chunksize must be 'auto' or a positive integer, not {}".format(self.chunksize))
+
+            return min(int(self.chunksize), nr_remaining)
+
+        if evaluation_time is None:
+            return 1
+
+        max_size = int(np.ceil(nr_remaining/(4.*self.executor.nr_workers)))
+
+        if evaluation_time > 0:
+            size = int(self.target_batch_time/evaluation_time)
+        else:
+            size = max_size
+
+        return max(1, min(size, max_size))
+
+
+    def close(self):
+        """
+        Close the executor, and wait for the workers, if any, to exit.
+        The workers are started again the next time the model is evaluated.
+        The model is torn down in the workers and in the current process (see
+        ``Model.teardown``).
+        """
+        if self._executor is not None:
+            self._executor.close()
+
+        if self.model is not None:
+            self.model._ensure_teardown()
+
+        self._close_buffers()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
     def apply_interpolation(self, results, feature):
         """
@@ -130,9 +793,9 @@ class RunModel(ParameterBase):
 
         Parameters
         ----------
-        results : list
-            A list where each element is a result dictionary for each set
-            of model evaluations.
+        results : {list, ResultStore}
+            A list (or ResultStore) where each element is a result dictionary
+            for each set of model evaluations.
             An example:
 
             .. code-block:: Python
@@ -171,18 +834,30 @@ class RunModel(ParameterBase):
         Chooses the time array with the highest number of time points and use
         this time array to interpolate the model/feature results in each of
         those points. If an interpolation is None, gives numpy.nan instead.
+        Results that already are resampled onto a fixed time grid (see
+        `time_grid`) are used as they are.
         """
         logger = get_logger(self)
 
         time_lengths = []
         for result in results:
-            time_lengths.append(len(result[feature]["time"]))
+            # Evaluations that failed have numpy.nan as time
+            if np.ndim(result[feature]["time"]) == 0:
+                time_lengths.append(0)
+            else:
+                time_lengths.append(len(result[feature]["time"]))
 
         index_max_len = np.argmax(time_lengths)
         time = results[index_max_len][feature]["time"]
 
         interpolated_results = []
         for result in results:
+            # Results resampled onto a fixed time grid by the workers
+            # have no interpolation
+            if "interpolation" not in result[feature]:
+                interpolated_results.append(result[feature]["values"])
+                continue
+
             interpolation = result[feature]["interpolation"]
 
             if interpolation is None:
@@ -212,9 +887,9 @@ class RunModel(ParameterBase):
 
         Parameters
         ----------
-        results : list
-            A list where each element is a result dictionary for each set
-            of model evaluations.
+        results : {list, ResultStore}
+            A list (or ResultStore) where each element is a result dictionary
+            for each set of model evaluations.
             An example:
 
             .. code-block:: Python
@@ -301,11 +976,20 @@ class RunModel(ParameterBase):
         # Store all results in data, interpolate as needed
         # TODO: save raw result instead of interpolated result?
         for feature in data:
+            # Use the first evaluation with a result as reference, so evaluations
+            # that failed (numpy.nan) do not decide the shape and time
+            reference = results[0][feature]
+            for result in results:
+                values = result[feature]["values"]
+                if not (np.isscalar(values) and np.isnan(values)):
+                    reference = result[feature]
+                    break
+
             # Interpolate the data if it is irregular, and ignore the model if required
             if feature in self.features.interpolate or \
                     (feature == self.model.name and self.model.interpolate and not self.model.ignore):
                 # TODO implement interpolation of >= 2d data, part2
-                if np.ndim(results[0][feature]["values"]) >= 2:
+                if np.ndim(reference["values"]) >= 2:
                     # raise NotImplementedError("Feature: {feature},".format(feature=feature)
                     #                           + " no support for >= 2D interpolation")
                     logger.error("{feature}:".format(feature=feature)
@@ -314,16 +998,16 @@ class RunModel(ParameterBase):
                     add_results(results, data, feature)
 
 
-                elif np.ndim(results[0][feature]["values"]) == 1:
+                elif np.ndim(reference["values"]) == 1:
                     data[feature].time, data[feature].evaluations = self.apply_interpolation(results, feature)
 
                 # Interpolating a 0D result makes no sense, so if a 0D feature
                 # is supposed to be interpolated store it as normal
-                elif np.ndim(results[0][feature]["values"]) == 0:
+                elif np.ndim(reference["values"]) == 0:
                     logger.warning("{feature}: ".format(feature=feature) +
                                    "returns a 0D result. No interpolation is performed.")
 
-                    data[feature].time = results[0][feature]["time"]
+                    data[feature].time = reference["time"]
 
                     data[feature].evaluations = []
                     for result in results:
@@ -356,9 +1040,15 @@ class RunModel(ParameterBase):
                     #                  + " Try setting interpolate".format(feature))
 
 
+                elif self._is_buffered(results, feature):
+                    # Use the shared buffer directly, without copying
+                    # each evaluation into a list
+                    data[feature].time = reference["time"]
+                    data[feature].evaluations = np.asarray(self._buffers.array(feature))
+
                 else:
                     # Store data from results in a Data object
-                    data[feature].time = results[0][feature]["time"]
+                    data[feature].time = reference["time"]
 
                     data[feature].evaluations = []
                     for result in results:
@@ -413,107 +1103,1046 @@ class RunModel(ParameterBase):
         ImportError
             If xvfbwrapper is not installed.
         """
-        if self.model.suppress_graphics:
-            if not prerequisites:
-                raise ImportError("Running with suppress_graphics require: xvfbwrapper")
+        results = [None]*len(nodes.T)
 
-            vdisplay = Xvfb()
-            vdisplay.start()
-
-        results = []
-
-        model_parameters = self.create_model_parameters(nodes, uncertain_parameters)
-
-        if self.CPUs:
-            import multiprocess as mp
-
-            pool = mp.Pool(processes=self.CPUs)
-
-            # pool.map(self._parallel.run, model_parameters)
-            # chunksize = int(np.ceil(len(model_parameters)/self.CPUs))
-            chunksize = 1
-            for result in tqdm(pool.imap(self._parallel.run, model_parameters, chunksize),
-                               desc="Running model",
-                               total=len(nodes.T)):
-
-                results.append(result)
-
-            pool.close()
-
-        else:
-            for result in tqdm(imap(self._parallel.run, model_parameters),
-                               desc="Running model",
-                               total=len(nodes.T)):
-
-                results.append(result)
-
-
-
-        if self.model.suppress_graphics:
-            vdisplay.stop()
+        for index, result in self.iterate_nodes(nodes, uncertain_parameters):
+            results[index] = result
 
         return results
 
 
-
-    def create_model_parameters(self, nodes, uncertain_parameters):
+    def stream_nodes(self, nodes, uncertain_parameters):
         """
-        Combine nodes (values) with the uncertain parameter names to create a
-        list of dictionaries corresponding to the model values for each
-        model evaluation.
+        Evaluate the the model and calculate the features for the nodes
+        (values) for the uncertain parameters, and stream the results to disk
+        in `result_store` as they are completed.
 
         Parameters
         ----------
         nodes : array
-            A series of different set of parameters. The model and each feature is
-            evaluated for each set of parameters in the series.
+            The values for the uncertain parameters
+            to evaluate the model and features for.
         uncertain_parameters : list
-            A list of names of the uncertain parameters.
+            A list of the names of all uncertain parameters.
 
         Returns
         -------
-        model_parameters : list
-            A list where each element is a dictionary with the model parameters
-            for a single evaluation.
-            An example:
-
-            .. code-block:: Python
-
-                model_parameter = {"parameter 1": value 1, "parameter 2": value 2, ...}
-                model_parameters = [model_parameter 1, model_parameter 2, ...]
+        results : ResultStore
+            The store with the result dictionary of each model evaluation,
+            which can be indexed, sliced and iterated over like the list
+            returned by ``evaluate_nodes``.
 
+        Raises
+        ------
+        ValueError
+            If `result_store` is None.
+        ImportError
+            If xvfbwrapper is not installed.
         """
+        if self.result_store is None:
+            raise ValueError("result_store must be set to stream the results to disk")
 
-        model_parameters = []
-        for node in nodes.T:
-            if node.ndim == 0:
-                node = [node]
+        results = ResultStore(self.result_store,
+                              nr_results=len(nodes.T),
+                              chunk_size=self.result_chunk_size,
+                              logger_level=self._logger_level)
 
-            # New set parameters
-            parameters = {}
-            for j, parameter in enumerate(uncertain_parameters):
-                parameters[parameter] = node[j]
+        # Remove results from previous evaluations
+        results.clear()
 
-            for parameter in self.parameters:
-                if parameter.name not in parameters:
-                    parameters[parameter.name] = parameter.value
+        try:
+            for index, result in self.iterate_nodes(nodes, uncertain_parameters):
+                results.append(index, self._detach(result))
+        finally:
+            results.flush()
 
-            model_parameters.append(parameters)
-
-        return model_parameters
+        return results
 
 
-    def is_regular(self, results, feature):
+    def iterate_nodes(self, nodes, uncertain_parameters):
         """
-        Test if `feature` in `results` is regular or not, meaning it has a
-        varying number of values for each evaluation. Ignores results that
+        Evaluate the the model and calculate the features for the nodes
+        (values) for the uncertain parameters, and yield the results in the
+        order the evaluations are completed.
+
+        Parameters
+        ----------
+        nodes : array
+            The values for the uncertain parameters
+            to evaluate the model and features for.
+        uncertain_parameters : list
+            A list of the names of all uncertain parameters.
+
+        Yields
+        ------
+        index : int
+            The index of the node the result belongs to.
+        result : dict
+            The result dictionary for the model evaluation of the node.
+            See ``evaluate_nodes`` for the format.
+
+        Raises
+        ------
+        ImportError
+            If xvfbwrapper is not installed.
+
+        Notes
+        -----
+        When running in parallel, a slow model evaluation does not hold back
+        the results of the evaluations that finish after it. The results can
+        therefore be processed (for example written to disk) as soon as they
+        are available. ``evaluate_nodes`` uses the index to put the results
+        back in the order of the nodes.
+
+        With `shared_buffers`, the values of the regular model and feature
+        results are views of the shared buffers.
+        """
+        # Results from earlier evaluations keep their views of the buffers
+        self._close_buffers()
+        self.timer.clear()
+        self.failed_evaluations = {}
+
+        for index, result in self._iterate_results(nodes, uncertain_parameters):
+            if self.shared_buffers:
+                if self._buffers is None:
+                    self._buffers = self._create_buffers(result, len(nodes.T))
+
+                result = self._buffers.load(index, self._buffers.store(index, result))
+
+            yield index, result
+
+
+    def _iterate_results(self, nodes, uncertain_parameters):
+        """
+        Evaluate the nodes, or read them from the checkpoint or cache, and
+        yield the results in the order they are completed. See
+        ``iterate_nodes``.
+        """
+        if self.model.suppress_graphics:
+            if not prerequisites:
+                raise ImportError("Running with suppress_graphics require: xvfbwrapper")
+
+            vdisplay = Xvfb()
+            vdisplay.start()
+
+        # The fixed parameters are sent once with each batch, and the model
+        # parameters of each evaluation, with only the uncertain parameters,
+        # are created from the nodes as they are sent
+        self._parallel.fixed_parameters = self.fixed_parameters(uncertain_parameters)
+        all_parameters = self._parallel.all_parameters
+
+        nodes_T = nodes.T
+        nr_tasks = len(nodes_T)
+        tasks = enumerate(self.iterate_model_parameters(nodes, uncertain_parameters))
+
+        def parameters(index):
+            return all_parameters(self._node_parameters(nodes_T[index], uncertain_parameters))
+
+        checkpoint = None
+        if self.checkpoint is not None:
+            checkpoint = Checkpoint(self.checkpoint, logger_level=self._logger_level)
+
+        # The completed evaluations saved if the error budget is exceeded
+        salvage = None
+        if self.error_budget is not None and checkpoint is None:
+            salvage = []
+
+        try:
+            completed = None
+            if checkpoint is not None:
+                completed = checkpoint.load()
+
+            pilot = None
+            if isinstance(self.time_grid, six.string_types) and nr_tasks:
+                pilot = self._pilot(self._node_parameters(nodes_T[0], uncertain_parameters),
+                                    len(nodes_T), checkpoint=checkpoint, completed=completed)
+
+            # The cache identity depends on the time grid
+            if self.cache is not None:
+                identity = self._cache_identity()
+
+            if checkpoint is not None or self.cache is not None:
+                # Yield the evaluations found in the checkpoint or cache, and
+                # only keep their indices, so the model parameters of the
+                # remaining tasks are still created as they are sent
+                stored = set()
+                nr_checkpoint = 0
+
+                for index, model_parameters in tasks:
+                    model_parameters = all_parameters(model_parameters)
+
+                    result = None
+                    if checkpoint is not None:
+                        result = completed.get(checkpoint.key(model_parameters))
+
+                        if result is not None:
+                            nr_checkpoint += 1
+
+                    if result is None and self.cache is not None:
+                        result = self.cache.get(self.cache.key(identity, model_parameters))
+
+                        if result is not None and checkpoint is not None:
+                            checkpoint.append(model_parameters, self._detach(result))
+
+                    if result is not None:
+                        stored.add(index)
+                        yield index, result
+
+                logger = get_logger(self)
+                if nr_checkpoint:
+                    logger.info("Resuming from checkpoint {}: {} of {} model evaluations already completed".format(
+                        self.checkpoint, nr_checkpoint, nr_tasks))
+
+                if len(stored) > nr_checkpoint:
+                    logger.info("Found {} of {} model evaluations in the cache".format(
+                        len(stored) - nr_checkpoint, nr_tasks - nr_checkpoint))
+
+                tasks = ((index, model_parameters) for index, model_parameters
+                         in enumerate(self.iterate_model_parameters(nodes, uncertain_parameters))
+                         if index not in stored)
+                nr_tasks -= len(stored)
+
+            if pilot is not None and nr_tasks:
+                tasks = iter(tasks)
+                first = next(tasks)
+
+                if first[0] == 0:
+                    if 0 not in self.failed_evaluations:
+                        stored_pilot = self._detach(pilot)
+
+                        if checkpoint is not None:
+                            checkpoint.append(parameters(0), stored_pilot)
+
+                        if self.cache is not None:
+                            self.cache.set(self.cache.key(identity, parameters(0)), stored_pilot)
+
+                        if salvage is not None:
+                            salvage.append((parameters(0), stored_pilot))
+
+                    yield 0, pilot
+
+                    nr_tasks -= 1
+                else:
+                    tasks = itertools.chain([first], tasks)
+
+            elif pilot is not None:
+                # The first node was read from a checkpoint written without
+                # the time grid, so the failed pilot gave no result
+                self.failed_evaluations.pop(0, None)
+
+            try:
+                for index, result in self._iterate_executor(tasks, nodes, nr_tasks=nr_tasks):
+                    if index not in self.failed_evaluations:
+                        stored_result = self._detach(result)
+
+                        if checkpoint is not None:
+                            checkpoint.append(parameters(index), stored_result)
+
+                        if self.cache is not None:
+                            self.cache.set(self.cache.key(identity, parameters(index)), stored_result)
+
+                        if salvage is not None:
+                            salvage.append((parameters(index), stored_result))
+
+                    yield index, result
+
+            except ErrorBudgetExceeded as error:
+                if checkpoint is not None:
+                    error.checkpoint = self.checkpoint
+                elif salvage:
+                    error.checkpoint = self._save_partial(salvage)
+
+                raise
+
+        finally:
+            if self.model.suppress_graphics:
+                vdisplay.stop()
+
+
+    def _save_partial(self, completed):
+        """
+        Save completed evaluations in a checkpoint, so a run stopped by the
+        error budget can be resumed.
+
+        Parameters
+        ----------
+        completed : list
+            A list of ``(model_parameters, result)`` pairs.
+
+        Returns
+        -------
+        filename : str
+            Name of the checkpoint file.
+        """
+        filename = "{}_partial.checkpoint".format(self.model.name)
+
+        if os.path.exists(filename):
+            os.remove(filename)
+
+        checkpoint = Checkpoint(filename, logger_level=self._logger_level)
+        for model_parameters, result in completed:
+            checkpoint.append(model_parameters, result)
+
+        return filename
+
+
+    def _max_failures(self, nr_nodes):
+        """
+        The number of model evaluations that are allowed to fail.
+
+        Parameters
+        ----------
+        nr_nodes : int
+            The total number of nodes.
+
+        Returns
+        -------
+        max_failures : {None, int}
+            The number of evaluations allowed to fail, or None if there is no
+            error budget.
+
+        Raises
+        ------
+        ValueError
+            If `error_budget` is not None, a non-negative int, or a float
+            between 0 and 1.
+        """
+        if self.error_budget is None:
+            return None
+
+        if isinstance(self.error_budget, (bool, np.bool_)):
+            raise ValueError("error_budget must be None, an int or a float, not {}".format(self.error_budget))
+
+        if isinstance(self.error_budget, (six.integer_types, np.integer)):
+            if self.error_budget < 0:
+                raise ValueError("error_budget must be non-negative, not {}".format(self.error_budget))
+
+            return int(self.error_budget)
+
+        if not 0 <= self.error_budget <= 1:
+            raise ValueError("error_budget must be an int or a fraction between 0 and 1, not {}".format(self.error_budget))
+
+        return int(np.floor(self.error_budget*nr_nodes))
+
+
+    def _detach(self, result):
+        """
+        Copy a result for storing in the checkpoint, cache, result store or
+        the salvaged evaluations. With `shared_buffers`, the values that are
+        views of the shared buffers can not be pickled, and the result
+        dictionary is changed in place when it is stored in the buffers, so
+        the result is copied and the views are replaced by copies of the
+        values.
+        """
+        if not self.shared_buffers:
+            return result
+
+        detached = {}
+        for feature in result:
+            detached[feature] = dict(result[feature])
+
+            values = result[feature].get("values")
+            if self._buffers is not None and self._buffers.is_buffered(feature, values):
+                detached[feature]["values"] = np.array(values)
+
+        return detached
+
+
+    def _is_buffered(self, results, feature):
+        """
+        Test if the values of `feature` in every result are stored in the
+        shared buffer, or are numpy.nan. Evaluations that failed are numpy.nan
+        in the buffer.
+        """
+        if self._buffers is None or feature not in self._buffers:
+            return False
+
+        if len(results) != self._buffers.nr_results:
+            return False
+
+        for result in results:
+            values = result[feature]["values"]
+
+            if np.isscalar(values) and np.isnan(values):
+                continue
+
+            if not self._buffers.is_buffered(feature, values):
+                return False
+
+        return True
+
+
+    def _create_buffers(self, result, nr_nodes):
+        """
+        Create shared buffers for the model and features that have regular
+        array values in `result`. Models that are ignored and features that
+        are interpolated by the Data object are not buffered.
+        """
+        buffers = ResultBuffers(nr_nodes)
+
+        for feature in result:
+            values = result[feature]["values"]
+
+            if feature == self.model.name and self.model.ignore:
+                continue
+
+            if "interpolation" in result[feature]:
+                continue
+
+            if not isinstance(values, np.ndarray) or values.ndim == 0 \
+                    or not np.issubdtype(values.dtype, np.number) \
+                    or np.iscomplexobj(values):
+                continue
+
+            buffers.add(feature, values.shape, result[feature]["time"])
+
+        return buffers
+
+
+    def _close_buffers(self):
+        """
+        Remove the shared buffers of the previous evaluations.
+        """
+        if self._buffers is not None:
+            self._buffers.close()
+            self._buffers = None
+
+
+    def pilot_time_grid(self, model_parameters):
+        """
+        Evaluate the model and features for one set of model parameters in
+        the current process, and use the time arrays of the model and features
+        that are interpolated as the fixed time grid of the workers.
+
+        Parameters
+        ----------
+        model_parameters : dict
+            The model parameters of the pilot evaluation.
+
+        Returns
+        -------
+        result : dict
+            The result dictionary of the pilot evaluation, resampled onto the
+            time grid.
+        """
+        logger = get_logger(self)
+
+        self._parallel.time_grid = None
+        result = self._parallel.run(model_parameters, timer=self.timer)
+
+        time_grid = {}
+        for feature in result:
+            interpolation = result[feature].get("interpolation")
+
+            if interpolation is None or isinstance(interpolation, six.string_types):
+                if "interpolation" in result[feature]:
+                    logger.warning("{}: the pilot evaluation gave no result, ".format(feature) +
+                                   "the time grid is found when the Data object is created")
+                continue
+
+            time_grid[feature] = np.asarray(result[feature]["time"], dtype=float)
+
+        self._parallel.time_grid = time_grid
+
+        return self._parallel.resample(result)
+
+
+    def _pilot(self, model_parameters, nr_nodes, checkpoint=None, completed=None):
+        """
+        Find the pilot time grid, see ``pilot_time_grid``. The time grid is
+        stored in the checkpoint and cache next to the result of the pilot
+        evaluation, and the pilot evaluation is only performed if the time
+        grid is not found in them. A pilot evaluation that fails counts
+        against the error budget, and the time grid is then found when the
+        Data object is created.
+
+        Parameters
+        ----------
+        model_parameters : dict
+            The model parameters of the first node.
+        nr_nodes : int
+            The total number of nodes, used to find the error budget.
+        checkpoint : {None, Checkpoint}, optional
+            The checkpoint of the evaluations. Default is None.
+        completed : {None, dict}, optional
+            The evaluations loaded from the checkpoint. Default is None.
+
+        Returns
+        -------
+        pilot : {None, dict}
+            The result of the pilot evaluation, or None if the time grid was
+            found in the checkpoint or cache.
+
+        Raises
+        ------
+        ErrorBudgetExceeded
+            If the failed pilot evaluation exceeds the error budget.
+        """
+        # The time grid is stored with a marker, so it does not replace the
+        # result of the pilot evaluation
+        grid_parameters = dict(self._parallel.all_parameters(model_parameters))
+        grid_parameters["__time_grid__"] = 0
+
+        self._parallel.time_grid = None
+
+        # The cache key is found before the time grid is known
+        if self.cache is not None:
+            grid_key = self.cache.key(self._cache_identity(), grid_parameters)
+
+        time_grid = None
+        if completed is not None:
+            time_grid = completed.get(checkpoint.key(grid_parameters))
+
+        if time_grid is None and self.cache is not None:
+            time_grid = self.cache.get(grid_key)
+
+            if time_grid is not None and checkpoint is not None:
+                checkpoint.append(grid_parameters, time_grid)
+
+        if time_grid is not None:
+            self._parallel.time_grid = time_grid
+            return None
+
+        max_failures = self._max_failures(nr_nodes)
+
+        try:
+            pilot = self.pilot_time_grid(model_parameters)
+        except Exception:
+            if max_failures is None:
+                raise
+
+            self.failed_evaluations[0] = {"parameters": dict(self._parallel.all_parameters(model_parameters)),
+                                          "traceback": traceback.format_exc()}
+
+            if len(self.failed_evaluations) > max_failures:
+                raise ErrorBudgetExceeded("{} model evaluations failed, more than the error budget of {}".format(
+                    len(self.failed_evaluations), max_failures), self.failed_evaluations)
+
+            msg = "Model evaluation 0 failed"
+            logger = get_logger(self)
+            logger.warning("{}, the result is set to nan and the time grid is found when the Data object is created ".format(msg) +
+                           "({} of {} allowed failures):\n{}".format(
+                               len(self.failed_evaluations), max_failures, self.failed_evaluations[0]["traceback"]))
+
+            return self._nan_result(msg)
+
+        if checkpoint is not None:
+            checkpoint.append(grid_parameters, self._parallel.time_grid)
+
+        if self.cache is not None:
+            self.cache.set(grid_key, self._parallel.time_grid)
+
+        return pilot
+
+
+    def _cache_identity(self):
+        """
+        Create a string that identifies the model and features, used together
+        with the model parameters as the key of the evaluation cache.
+        It combines the hash of the model and features that are sent to the
+        workers with the source code of the model and feature classes.
+        The settings of how the model is evaluated, which do not change the
+        results, are not part of the identity.
+        """
+        parallel = copy.copy(self._parallel)
+        parallel.catch_errors = False
+        parallel.worker_threads = None
+        parallel.pin_workers = False
+
+        identity = hashlib.sha1(_parallel_state(parallel).encode("utf-8"))
+
+        for obj in [self.model, self.features]:
+            try:
+                source = inspect.getsource(type(obj))
+            except (TypeError, OSError, IOError):
+                source = type(obj).__name__
+
+            identity.update(source.encode("utf-8"))
+
+        return identity.hexdigest()
+
+
+    def _iterate_executor(self, tasks, nodes=None, nr_tasks=None):
+        """
+        Evaluate an iterable of ``(index, model_parameters)`` pairs in batches
+        with the executor, and yield the results tagged with their index as
+        each batch is completed. The tasks are read as they are sent to the
+        executor, so `nr_tasks`, the number of tasks, must be given if `tasks`
+        is not a list. The `nodes` are used to predict the run time of each
+        evaluation when `schedule` is "longest_first".
+        """
+        if self.schedule not in ["fifo", "longest_first"]:
+            raise ValueError("schedule must be 'fifo' or 'longest_first', not {}".format(self.schedule))
+
+        if nr_tasks is None:
+            tasks = list(tasks)
+            nr_tasks = len(tasks)
+
+        max_failures = self._max_failures(nr_tasks if nodes is None else len(nodes.T))
+        self._parallel.catch_errors = max_failures is not None
+
+        if self.pin_workers not in [False, None, "core", "numa"]:
+            raise ValueError("pin_workers must be False, 'core' or 'numa', not {}".format(self.pin_workers))
+
+        executor = self.executor
+        nr_threads = self.threads_per_worker(executor.nr_workers)
+
+        if executor.in_process:
+            self._parallel.worker_threads = None
+            self._parallel.pin_workers = False
+        else:
+            self._parallel.worker_threads = nr_threads
+            self._parallel.pin_workers = self.pin_workers
+
+        executor.start(self._parallel)
+
+        # Limit the threads of the current process while it evaluates the
+        # model, and restore them for the analysis afterwards
+        with thread_limits(nr_threads if executor.in_process else None):
+            for index, result in self._iterate_batches(executor, tasks, nr_tasks, nodes, max_failures):
+                yield index, result
+
+
+    def threads_per_worker(self, nr_workers):
+        """
+        The number of OpenMP and BLAS threads used by each worker.
+
+        Parameters
+        ----------
+        nr_workers : int
+            The number of model evaluations running at the same time.
+
+        Returns
+        -------
+        nr_threads : {None, int}
+            The number of threads of each worker, or None if the number of
+            threads is not limited.
+        """
+        if self.worker_threads != "auto":
+            return self.worker_threads
+
+        import multiprocess
+
+        return max(1, multiprocess.cpu_count()//max(1, nr_workers))
+
+
+    def _iterate_batches(self, executor, tasks, nr_tasks, nodes, max_failures):
+        """
+        Send the tasks to the executor in batches and yield the results, see
+        ``_iterate_executor``.
+        """
+        logger = get_logger(self)
+
+        timeout = self.timeout
+        if timeout is not None and not executor.can_terminate:
+            logger.warning("{} can not stop evaluations that are running, "
+                           "the timeout is ignored".format(executor.__class__.__name__))
+            timeout = None
+
+        # The executor calls back, possibly from a separate thread, as batches
+        # are completed. Each batch is tagged with a submission number, so
+        # results from batches that were abandoned when the workers were
+        # restarted are ignored.
+        completed = queue.Queue()
+        submissions = itertools.count()
+
+        # Keep a few batches queued for each worker. With a timeout the
+        # evaluations are sent one at a time and only to idle workers, and
+        # the deadline of each evaluation is set when the executor reports
+        # that it has started.
+        if timeout is None:
+            max_pending = 2*executor.nr_workers
+        else:
+            max_pending = executor.nr_workers
+
+        # Tasks that are sent back, or sorted, are put in waiting, in front of
+        # the tasks that are not yet read
+        tasks = iter(tasks)
+        nr_unread = nr_tasks
+        waiting = collections.deque()
+        pending = {}
+        nr_timeouts = {}
+        evaluation_time = None
+
+        predictor = None
+        if self.schedule == "longest_first" and nodes is not None:
+            coordinates = np.asarray(nodes, dtype=float).T
+            coordinates = coordinates.reshape(len(coordinates), -1)
+
+            predictor = RuntimePredictor(scale=np.ptp(coordinates, axis=0))
+            next_schedule = 2*executor.nr_workers
+
+            # Only a window of tasks is read ahead and sorted, so the tasks
+            # are still created as they are sent
+            window = 32*executor.nr_workers
+            scheduled = False
+
+        progress = tqdm(desc="Running model", total=nr_tasks)
+
+        try:
+            while waiting or nr_unread or pending:
+                while (waiting or nr_unread) and len(pending) < max_pending:
+                    if predictor is not None and scheduled and not waiting and nr_unread:
+                        nr_unread = self._read_ahead(waiting, tasks, nr_unread, window)
+                        waiting = self._longest_first(waiting, predictor, coordinates)
+
+                    if timeout is None:
+                        size = self.batch_size(len(waiting) + nr_unread, evaluation_time)
+                    else:
+                        size = 1
+
+                    batch = [waiting.popleft() for i in range(min(size, len(waiting)))]
+
+                    unread = list(itertools.islice(tasks, size - len(batch)))
+                    nr_unread = nr_unread - len(unread) if len(unread) == size - len(batch) else 0
+                    batch.extend(unread)
+
+                    if not batch:
+                        break
+
+                    submission = next(submissions)
+                    pending[submission] = (batch, None)
+
+                    if timeout is None:
+                        executor.submit(batch,
+                                        functools.partial(self._put_result, completed, submission),
+                                        buffers=self._buffers)
+                    else:
+                        executor.submit(batch,
+                                        functools.partial(self._put_result, completed, submission),
+                                        buffers=self._buffers,
+                                        started=functools.partial(self._put_started, completed, submission))
+
+                # Only the evaluations that have started have a deadline
+                deadlines = [deadline for batch, deadline in pending.values() if deadline is not None]
+                if deadlines:
+                    wait = max(0, min(deadlines) - time.time())
+                else:
+                    wait = None
+
+                try:
+                    submission, batch_result = completed.get(timeout=wait)
+                except queue.Empty:
+                    # Stop every worker, since a single worker can not be
+                    # stopped, and send the evaluations that were not
+                    # finished to the new workers
+                    executor.terminate()
+
+                    now = time.time()
+                    exceeded = False
+
+                    for submission, (batch, deadline) in sorted(pending.items(), reverse=True):
+                        if deadline is None or deadline > now:
+                            waiting.extendleft(reversed(batch))
+                            continue
+
+                        for index, parameters in batch:
+                            nr_timeouts[index] = nr_timeouts.get(index, 0) + 1
+
+                            if predictor is not None:
+                                predictor.add(coordinates[index], timeout)
+
+                            if nr_timeouts[index] <= self.retries:
+                                logger.warning("Model evaluation {} timed out after {} s, retrying ({}/{})".format(
+                                    index, timeout, nr_timeouts[index], self.retries))
+
+                                waiting.appendleft((index, parameters))
+                                continue
+
+                            # Timed out evaluations are failed evaluations, so
+                            # they are neither stored in the checkpoint nor in
+                            # the cache
+                            msg = "Model evaluation {} timed out after {} s".format(index, timeout)
+                            self.failed_evaluations[index] = {"parameters": dict(self._parallel.all_parameters(parameters)),
+                                                              "traceback": msg}
+
+                            if max_failures is not None and len(self.failed_evaluations) > max_failures:
+                                exceeded = True
+                                continue
+
+                            logger.error(msg + ", the result is set to nan")
+
+                            progress.update(1)
+                            yield index, self._nan_result(msg)
+
+                    pending.clear()
+
+                    if exceeded:
+                        raise ErrorBudgetExceeded("{} model evaluations failed, more than the error budget of {}".format(
+                            len(self.failed_evaluations), max_failures), self.failed_evaluations)
+
+                    continue
+
+                if submission not in pending:
+                    continue
+
+                if isinstance(batch_result, _BatchStarted):
+                    batch, deadline = pending[submission]
+                    pending[submission] = (batch, batch_result.time + timeout)
+                    continue
+
+                batch, deadline = pending.pop(submission)
+                batch_parameters = dict(batch)
+
+                if isinstance(batch_result, BaseException):
+                    # Stop the batches that are still pending before the
+                    # error is raised
+                    if executor.can_terminate:
+                        executor.terminate()
+                    else:
+                        executor.close()
+
+                    raise batch_result
+
+                batch_results, elapsed, timer = batch_result
+
+                self.timer.merge(timer)
+
+                time_per_evaluation = elapsed/len(batch_results)
+                if evaluation_time is None:
+                    evaluation_time = time_per_evaluation
+                else:
+                    evaluation_time = 0.7*evaluation_time + 0.3*time_per_evaluation
+
+                progress.update(len(batch_results))
+
+                exceeded = False
+
+                if predictor is not None:
+                    for index, result in batch_results:
+                        predictor.add(coordinates[index], time_per_evaluation)
+
+                    if (waiting or nr_unread) and len(predictor) >= next_schedule:
+                        nr_unread = self._read_ahead(waiting, tasks, nr_unread, max(0, window - len(waiting)))
+
+                        waiting = self._longest_first(waiting, predictor, coordinates)
+                        next_schedule = int(np.ceil(1.25*len(predictor)))
+                        scheduled = True
+
+                for index, result in batch_results:
+                    if isinstance(result, EvaluationError):
+                        self.failed_evaluations[index] = {"parameters": dict(self._parallel.all_parameters(batch_parameters[index])),
+                                                          "traceback": result.traceback}
+
+                        if len(self.failed_evaluations) > max_failures:
+                            exceeded = True
+                            continue
+
+                        msg = "Model evaluation {} failed".format(index)
+                        logger.warning("{}, the result is set to nan ({} of {} allowed failures):\n{}".format(
+                            msg, len(self.failed_evaluations), max_failures, result.traceback))
+
+                        yield index, self._nan_result(msg)
+                        continue
+
+                    if self._buffers is not None:
+                        result = self._buffers.load(index, result)
+
+                    yield index, result
+
+                if exceeded:
+                    # Stop the evaluations that are running, if possible
+                    if executor.can_terminate:
+                        executor.terminate()
+
+                    raise ErrorBudgetExceeded("{} model evaluations failed, more than the error budget of {}".format(
+                        len(self.failed_evaluations), max_failures), self.failed_evaluations)
+
+        finally:
+            progress.close()
+
+
+    @staticmethod
+    def _longest_first(waiting, predictor, coordinates):
+        """
+        Sort the waiting ``(index, model_parameters)`` pairs by their
+        predicted run time, the most expensive first.
+        """
+        waiting = list(waiting)
+
+        if not waiting:
+            return collections.deque()
+
+        runtimes = predictor.predict(coordinates[[index for index, parameters in waiting]])
+        order = np.argsort(-runtimes, kind="mergesort")
+
+        return collections.deque([waiting[i] for i in order])
+
+
+    @staticmethod
+    def _read_ahead(waiting, tasks, nr_unread, size):
+        """
+        Read up to `size` of the unread tasks into the waiting tasks, and
+        return the number of tasks that are still unread.
+        """
+        unread = list(itertools.islice(tasks, size))
+        waiting.extend(unread)
+
+        return nr_unread - len(unread) if len(unread) == size else 0
+
+
+    @staticmethod
+    def _put_result(completed, submission, result):
+        """
+        Put the result of a submitted batch in the queue of completed batches.
+        """
+        completed.put((submission, result))
+
+
+    @staticmethod
+    def _put_started(completed, submission, start_time):
+        """
+        Put the time a submitted batch started in the queue of completed
+        batches, so the deadline of the batch can be set.
+        """
+        completed.put((submission, _BatchStarted(start_time)))
+
+
+    def _nan_result(self, message):
+        """
+        Create a result dictionary for a model evaluation that did not give a
+        result, where the model and each feature is set to numpy.nan.
+
+        Parameters
+        ----------
+        message : str
+            The reason the evaluation failed. It is stored as the
+            interpolation of the model and each feature, so it is logged if
+            the results are interpolated.
+
+        Returns
+        -------
+        result : dict
+            The result dictionary for the evaluation.
+        """
+        result = {}
+        for name in [self.model.name] + list(self.features.features_to_run):
+            result[name] = {"values": np.nan,
+                            "time": np.nan,
+                            "interpolation": message}
+
+        return result
+
+
+
+    def fixed_parameters(self, uncertain_parameters):
+        """
+        The model parameters that are not uncertain, which have the same
+        value in every model evaluation.
+
+        Parameters
+        ----------
+        uncertain_parameters : list
+            A list of names of the uncertain parameters.
+
+        Returns
+        -------
+        fixed_parameters : dict
+            A dictionary with the fixed parameters,
+            ``{"parameter 1": value 1, "parameter 2": value 2, ...}``.
+        """
+        fixed_parameters = {}
+        for parameter in self.parameters:
+            if parameter.name not in uncertain_parameters:
+                fixed_parameters[parameter.name] = parameter.value
+
+        return fixed_parameters
+
+
+    @staticmethod
+    def _node_parameters(node, uncertain_parameters):
+        """
+        Create the dictionary with the uncertain parameters of a single node.
+        """
+        if np.ndim(node) == 0:
+            node = [node]
+
+        parameters = {}
+        for j, parameter in enumerate(uncertain_parameters):
+            parameters[parameter] = node[j]
+
+        return parameters
+
+
+    def iterate_model_parameters(self, nodes, uncertain_parameters):
+        """
+        Combine nodes (values) with the uncertain parameter names, and yield
+        a dictionary with the uncertain parameters for each model evaluation.
+
+        Unlike ``create_model_parameters``, the dictionaries are created when
+        they are needed, and contain only the uncertain parameters. The fixed
+        parameters (see ``fixed_parameters``) are sent once with each batch
+        of evaluations, instead of with each model evaluation.
+
+        Parameters
+        ----------
+        nodes : array
+            A series of different set of parameters. The model and each feature is
+            evaluated for each set of parameters in the series.
+        uncertain_parameters : list
+            A list of names of the uncertain parameters.
+
+        Yields
+        ------
+        model_parameters : dict
+            A dictionary with the uncertain parameters for a single
+            evaluation, ``{"parameter 1": value 1, "parameter 2": value 2, ...}``.
+        """
+        for node in nodes.T:
+            yield self._node_parameters(node, uncertain_parameters)
+
+
+    def create_model_parameters(self, nodes, uncertain_parameters):
+        """
+        Combine nodes (values) with the uncertain parameter names to create a
+        list of dictionaries corresponding to the model values for each
+        model evaluation.
+
+        Parameters
+        ----------
+        nodes : array
+            A series of different set of parameters. The model and each feature is
+            evaluated for each set of parameters in the series.
+        uncertain_parameters : list
+            A list of names of the uncertain parameters.
+
+        Returns
+        -------
+        model_parameters : list
+            A list where each element is a dictionary with the model parameters
+            for a single evaluation.
+            An example:
+
+            .. code-block:: Python
+
+                model_parameter = {"parameter 1": value 1, "parameter 2": value 2, ...}
+                model_parameters = [model_parameter 1, model_parameter 2, ...]
+
+        """
+
+        fixed_parameters = self.fixed_parameters(uncertain_parameters)
+
+        model_parameters = []
+        for parameters in self.iterate_model_parameters(nodes, uncertain_parameters):
+            all_parameters = fixed_parameters.copy()
+            all_parameters.update(parameters)
+
+            model_parameters.append(all_parameters)
+
+        return model_parameters
+
+
+    def is_regular(self, results, feature):
+        """
+        Test if `feature` in `results` is regular or not, meaning it has a
+        varying number of values for each evaluation. Ignores results that
         contains numpy.nan.
 
         Parameters
         ----------
-        results : list
-            A list where each element is a result dictionary for each set
-            of model evaluations.
+        results : {list, ResultStore}
+            A list (or ResultStore) where each element is a result dictionary
+            for each set of model evaluations.
             An example:
 
             .. code-block:: Python
@@ -543,24 +2172,25 @@ class RunModel(ParameterBase):
         bool
             True if the feature is regular or False if the feature is irregular.
         """
-        i = 0
+        # Iterate over the results once, so results streamed to disk
+        # are read one chunk at a time
+        values_prev = None
         for result in results:
-            i += 1
-            if not contains_nan(result[feature]["values"]):
-                values_prev = result[feature]["values"]
+            if values_prev is None:
+                if not contains_nan(result[feature]["values"]):
+                    values_prev = result[feature]["values"]
 
-                # If object array it is not regular
-                if isinstance(values_prev, np.ndarray):
-                    tmp_array = values_prev
-                else:
-                    tmp_array = np.array(values_prev)
+                    # If object array it is not regular
+                    if isinstance(values_prev, np.ndarray):
+                        tmp_array = values_prev
+                    else:
+                        tmp_array = np.array(values_prev)
 
-                if tmp_array.dtype is np.dtype("object"):
-                    return False
+                    if tmp_array.dtype is np.dtype("object"):
+                        return False
 
-                break
+                continue
 
-        for result in results[i:]:
             values = result[feature]["values"]
 
             # If object array it is not regular
@@ -605,7 +2235,10 @@ class RunModel(ParameterBase):
         -------
         data : Data object
             A Data object with time and (interpolated) results for
-            the model and each feature.
+            the model and each feature. With `timings`, ``data.timings``
+            contains a summary of the time used by each stage of the
+            evaluations. ``data.failed_evaluations`` contains the evaluations
+            that failed within the `error_budget`.
 
         See Also
         --------
@@ -615,13 +2248,64 @@ class RunModel(ParameterBase):
         if isinstance(uncertain_parameters, six.string_types):
             uncertain_parameters = [uncertain_parameters]
 
-        results = self.evaluate_nodes(nodes, uncertain_parameters)
+        if self.result_store is None:
+            results = self.evaluate_nodes(nodes, uncertain_parameters)
+
+            try:
+                with self.timer.stage("results_to_data"):
+                    data = self.results_to_data(results)
+            finally:
+                # The data keeps its views of the buffers
+                self._close_buffers()
+        else:
+            results = self.stream_nodes(nodes, uncertain_parameters)
+
+            try:
+                with self.timer.stage("results_to_data"):
+                    data = self.results_to_data(results)
+            finally:
+                results.clear()
+                self._close_buffers()
 
-        data = self.results_to_data(results)
         data.uncertain_parameters = uncertain_parameters
 
+        data.failed_evaluations = self.format_failed_evaluations(self.failed_evaluations)
+
+        if self.timings:
+            data.timings = self.timer.summary()
+
         return data
 
+    @staticmethod
+    def format_failed_evaluations(failed_evaluations):
+        """
+        Convert the failed evaluations to the list stored in
+        ``data.failed_evaluations``.
+
+        Parameters
+        ----------
+        failed_evaluations : dict
+            The failed evaluations, ``{index: {"parameters": ..., "traceback": ...}}``,
+            see `failed_evaluations`.
+
+        Returns
+        -------
+        failed_evaluations : list
+            A list with a dictionary with the index, parameters and traceback
+            of each failed evaluation, sorted by index.
+        """
+        formatted = []
+        for index in sorted(failed_evaluations):
+            parameters = failed_evaluations[index]["parameters"]
+
+            formatted.append({"index": int(index),
+                              "parameters": {name: value.item() if isinstance(value, np.generic) else value
+                                             for name, value in parameters.items()},
+                              "traceback": failed_evaluations[index]["traceback"]})
+
+        return formatted
+
+
     # Currently not needed
     def regularize_nan_results(self, results):
         """
@@ -0,0 +1,117 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import numpy as np
+
+
+class RuntimePredictor(object):
+    """
+    Predict the run time of model evaluations from the run times of earlier
+    evaluations, with a nearest neighbour regression on the node coordinates.
+
+    The predicted run time of a node is the geometric mean of the run times
+    of the `nr_neighbours` nearest evaluated nodes. The coordinates are
+    divided by `scale` before the distances are calculated, so uncertain
+    parameters with different units are weighted equally.
+
+    Parameters
+    ----------
+    nr_neighbours : int, optional
+        The number of nearest evaluated nodes used to predict the run time.
+        Default is 5.
+    scale : {None, array_like}, optional
+        The scale of each coordinate, typically the range of the nodes.
+        Coordinates with a scale of zero are ignored. If None, the
+        coordinates are not scaled. Default is None.
+
+    Attributes
+    ----------
+    nr_neighbours : int
+        The number of nearest evaluated nodes used to predict the run time.
+    scale : {None, numpy.ndarray}
+        The scale of each coordinate.
+
+    Notes
+    -----
+    The geometric mean is used since the run times of a model often vary by
+    orders of magnitude between regions of the parameter space.
+    """
+    def __init__(self, nr_neighbours=5, scale=None):
+        self.nr_neighbours = nr_neighbours
+
+        if scale is not None:
+            scale = np.array(scale, dtype=float).ravel()
+            scale[scale == 0] = np.inf
+
+        self.scale = scale
+
+        self._coordinates = []
+        self._runtimes = []
+
+
+    def __len__(self):
+        return len(self._runtimes)
+
+
+    def _scaled(self, coordinates):
+        coordinates = np.asarray(coordinates, dtype=float)
+        coordinates = coordinates.reshape(len(coordinates), -1)
+
+        if self.scale is not None:
+            coordinates = coordinates/self.scale
+
+        return coordinates
+
+
+    def add(self, coordinates, runtime):
+        """
+        Add the run time of an evaluated node.
+
+        Parameters
+        ----------
+        coordinates : array_like
+            The coordinates of the node.
+        runtime : float
+            The run time of the evaluation in seconds.
+        """
+        self._coordinates.append(np.ravel(np.asarray(coordinates, dtype=float)))
+        self._runtimes.append(runtime)
+
+
+    def predict(self, coordinates, chunk_size=1024):
+        """
+        Predict the run time of nodes.
+
+        Parameters
+        ----------
+        coordinates : array_like
+            The coordinates of the nodes, of shape ``(nr_nodes, nr_parameters)``.
+        chunk_size : int, optional
+            The number of nodes the distances are calculated for at a time,
+            which limits the memory used. Default is 1024.
+
+        Returns
+        -------
+        runtimes : numpy.ndarray
+            The predicted run time in seconds of each node. If no nodes have
+            been added, every run time is numpy.nan.
+        """
+        coordinates = self._scaled(coordinates)
+
+        if not self._runtimes:
+            return np.full(len(coordinates), np.nan)
+
+        evaluated = self._scaled(np.array(self._coordinates))
+        log_runtimes = np.log(np.maximum(np.array(self._runtimes, dtype=float), 1e-9))
+
+        k = min(self.nr_neighbours, len(evaluated))
+
+        predicted = np.empty(len(coordinates))
+        for start in range(0, len(coordinates), chunk_size):
+            chunk = coordinates[start:start + chunk_size]
+
+            distances = np.sum((chunk[:, np.newaxis, :] - evaluated[np.newaxis, :, :])**2, axis=2)
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+            predicted[start:start + chunk_size] = np.mean(log_runtimes[nearest], axis=1)
+
+        return np.exp(predicted)
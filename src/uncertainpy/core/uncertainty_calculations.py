@@ -9,6 +9,9 @@ from SALib.sample import saltelli
 from SALib.analyze.sobol import first_order, total_order
 
 from .run_model import RunModel
+from .polynomial_regression import PolynomialRegression
+from .polynomial_expansion import PolynomialExpansion
+from .expansion_cache import ExpansionCache
 from .base import ParameterBase
 from ..utils.utility import contains_nan
 from ..utils.logger import get_logger
@@ -65,6 +68,106 @@ class UncertaintyCalculations(ParameterBase):
         If "max", the maximum number of CPUs on the computer
         (multiprocess.cpu_count()) is used.
         Default is "max".
+    executor : {None, Executor}, optional
+        The executor used to evaluate the model and features, for example a
+        ``uncertainpy.core.ThreadExecutor`` or ``uncertainpy.core.MPIExecutor``.
+        If None, the model is evaluated in `CPUs` worker processes.
+        Default is None.
+    chunksize : {"auto", int}, optional
+        The number of model evaluations sent to a worker process at a time.
+        If "auto", the number of evaluations in each batch is adapted to the
+        measured time of each model evaluation, so cheap models are evaluated
+        in large batches while expensive models are evaluated one at a time.
+        Default is "auto".
+    cache : {None, str, EvaluationCache}, optional
+        A persistent cache of model evaluations, so model parameters that
+        already are evaluated for the same model and features are not
+        evaluated again, for example when the polynomial order or method is
+        changed. If a string, it is the name of the folder where the cache is
+        stored. If None, no cache is used.
+        Default is None.
+    timeout : {None, float}, optional
+        The maximum wall time in seconds of each model evaluation when running
+        in parallel. Evaluations that take longer are stopped, their result
+        is set to numpy.nan, and they are counted as failed evaluations (see
+        `error_budget`). If None, there is no time limit.
+        Default is None.
+    retries : int, optional
+        The number of times an evaluation that times out is tried again before
+        the result is set to numpy.nan.
+        Default is 0.
+    max_tasks_per_worker : {None, int}, optional
+        The number of batches of model evaluations each worker process
+        performs before it is replaced by a new worker process. Useful for
+        models that leak memory. If None, the worker processes are not
+        replaced.
+        Default is None.
+    max_concurrent : int, optional
+        The maximum number of model evaluations running at the same time for
+        models with a coroutine run function (``async def run``).
+        Default is 32.
+    feature_workers : {None, int}, optional
+        The number of worker processes that calculate the features for models
+        with a coroutine run function. If None, the features are calculated
+        in the event loop thread.
+        Default is None.
+    result_store : {None, str}, optional
+        Name of a folder where the results of the model evaluations are
+        streamed to disk as they are completed, and read back in chunks,
+        instead of being held in memory until every evaluation is finished.
+        If None, the results are held in memory.
+        Default is None.
+    result_chunk_size : int, optional
+        The number of results in each chunk of the `result_store`.
+        Default is 100.
+    time_grid : {None, "pilot", array_like, dict}, optional
+        A fixed time grid the model and features that are interpolated are
+        resampled onto by the workers. Either a single time array used for
+        the model and every interpolated feature, a dictionary
+        ``{"model/feature name": time array}``, or "pilot" to use the time
+        arrays of a pilot evaluation of the first node. If None, the results
+        are interpolated onto the longest time array after all model
+        evaluations are completed.
+        Default is None.
+    shared_buffers : bool, optional
+        If True, the workers write the values of regular model and feature
+        results directly into memory-mapped arrays shared with the current
+        process, instead of sending them back with the results. Requires
+        that the workers run on the same computer.
+        Default is False.
+    timings : bool, optional
+        If True, a summary of the wall and CPU time used by each stage of
+        the model evaluations and of the calculation of the statistical
+        metrics is stored in ``data.timings``, and saved with the data.
+        Default is False.
+    schedule : {"fifo", "longest_first"}, optional
+        The order the nodes are sent to the executor. If "longest_first",
+        the nodes predicted to have the longest run time, from the run times
+        of the completed evaluations, are evaluated first.
+        Default is "fifo".
+    error_budget : {None, int, float}, optional
+        The number (int) or fraction of the nodes (float) of model
+        evaluations that are allowed to fail. Failed evaluations within the
+        budget are set to numpy.nan, and their tracebacks are stored in
+        ``data.failed_evaluations``. Beyond the budget, the evaluations are
+        stopped and the completed evaluations are saved in a checkpoint.
+        If None, the first failed evaluation raises its exception.
+        Default is None.
+    worker_threads : {"auto", None, int}, optional
+        The number of OpenMP and BLAS threads used by each model evaluation
+        running at the same time. If "auto", the CPUs are divided between the
+        workers. If None, the number of threads is not limited.
+        Default is "auto".
+    pin_workers : {False, "core", "numa"}, optional
+        Pin each worker process to a distinct core or NUMA node.
+        Default is False.
+    expansion_cache : {None, str, ExpansionCache}, optional
+        A persistent cache of the orthogonal polynomials and quadrature rules
+        used by polynomial chaos, so they are loaded instead of recalculated
+        when the same distribution and polynomial order are used again. If a
+        string, it is the name of the folder where the cache is stored. If
+        None, no cache is used.
+        Default is None.
     logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed.
@@ -80,6 +183,8 @@ class UncertaintyCalculations(ParameterBase):
         The features of the model to perform uncertainty quantification on.
     runmodel : RunModel
         Runmodel object responsible for evaluating the model and calculating features.
+    expansion_cache : {None, ExpansionCache}
+        The persistent cache of orthogonal polynomials and quadrature rules.
 
     See Also
     --------
@@ -97,6 +202,24 @@ class UncertaintyCalculations(ParameterBase):
                  create_PCE_custom=None,
                  custom_uncertainty_quantification=None,
                  CPUs="max",
+                 executor=None,
+                 chunksize="auto",
+                 cache=None,
+                 timeout=None,
+                 retries=0,
+                 max_tasks_per_worker=None,
+                 max_concurrent=32,
+                 feature_workers=None,
+                 result_store=None,
+                 result_chunk_size=100,
+                 time_grid=None,
+                 shared_buffers=False,
+                 timings=False,
+                 schedule="fifo",
+                 error_budget=None,
+                 worker_threads="auto",
+                 pin_workers=False,
+                 expansion_cache=None,
                  logger_level="info"):
 
 
@@ -104,8 +227,24 @@ class UncertaintyCalculations(ParameterBase):
                                  parameters=parameters,
                                  features=features,
                                  logger_level=logger_level,
-                                 CPUs=CPUs)
-
+                                 CPUs=CPUs,
+                                 executor=executor,
+                                 chunksize=chunksize,
+                                 cache=cache,
+                                 timeout=timeout,
+                                 retries=retries,
+                                 max_tasks_per_worker=max_tasks_per_worker,
+                                 max_concurrent=max_concurrent,
+                                 feature_workers=feature_workers,
+                                 result_store=result_store,
+                                 result_chunk_size=result_chunk_size,
+                                 time_grid=time_grid,
+                                 shared_buffers=shared_buffers,
+                                 timings=timings,
+                                 schedule=schedule,
+                                 error_budget=error_budget,
+                                 worker_threads=worker_threads,
+                                 pin_workers=pin_workers)
 
         if create_PCE_custom is not None:
             self.create_PCE_custom = create_PCE_custom
@@ -118,6 +257,8 @@ class UncertaintyCalculations(ParameterBase):
                                                       features=features,
                                                       logger_level=logger_level)
 
+        self.expansion_cache = expansion_cache
+
 
     @ParameterBase.features.setter
     def features(self, new_features):
@@ -140,6 +281,107 @@ class UncertaintyCalculations(ParameterBase):
         self.runmodel.parameters = self.parameters
 
 
+    @property
+    def expansion_cache(self):
+        """
+        The persistent cache of orthogonal polynomials and quadrature rules.
+
+        Parameters
+        ----------
+        new_expansion_cache : {None, str, ExpansionCache}
+            The cache of orthogonal polynomials and quadrature rules. If a
+            string, it is the name of the folder where the cache is stored,
+            and an ExpansionCache with the default maximum size is created.
+            If None, no cache is used.
+
+        Returns
+        -------
+        expansion_cache : {None, ExpansionCache}
+            The cache of orthogonal polynomials and quadrature rules.
+
+        See Also
+        --------
+        uncertainpy.core.ExpansionCache
+        """
+        return self._expansion_cache
+
+
+    @expansion_cache.setter
+    def expansion_cache(self, new_expansion_cache):
+        if isinstance(new_expansion_cache, six.string_types):
+            new_expansion_cache = ExpansionCache(new_expansion_cache, logger_level=self._logger_level)
+
+        self._expansion_cache = new_expansion_cache
+
+
+    def orth_ttr(self, polynomial_order, distribution):
+        """
+        Create the orthogonal polynomials with the three terms recursion
+        (``chaospy.orth_ttr``), or load them from `expansion_cache`.
+
+        Parameters
+        ----------
+        polynomial_order : int
+            The polynomial order.
+        distribution : chaospy.Dist
+            The distribution the polynomials are orthogonal on.
+
+        Returns
+        -------
+        P : chaospy.Poly
+            The orthogonal polynomials.
+        """
+        if self.expansion_cache is None:
+            return cp.orth_ttr(polynomial_order, distribution)
+
+        return self.expansion_cache.orth_ttr(polynomial_order, distribution)
+
+
+    def generate_quadrature(self, quadrature_order, distribution, **kwargs):
+        """
+        Create the quadrature nodes and weights
+        (``chaospy.generate_quadrature``), or load them from `expansion_cache`.
+
+        Parameters
+        ----------
+        quadrature_order : int
+            The quadrature order.
+        distribution : chaospy.Dist
+            The distribution of the quadrature rule.
+        **kwargs
+            Keyword arguments of ``chaospy.generate_quadrature``.
+
+        Returns
+        -------
+        nodes : numpy.ndarray
+            The quadrature nodes.
+        weights : numpy.ndarray
+            The quadrature weights.
+        """
+        if self.expansion_cache is None:
+            return cp.generate_quadrature(quadrature_order, distribution, **kwargs)
+
+        return self.expansion_cache.generate_quadrature(quadrature_order, distribution, **kwargs)
+
+
+    def close(self):
+        """
+        Close the pool of worker processes used to evaluate the model.
+
+        See also
+        --------
+        uncertainpy.core.RunModel.close
+        """
+        self.runmodel.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 
     def convert_uncertain_parameters(self, uncertain_parameters=None):
@@ -265,11 +507,20 @@ class UncertaintyCalculations(ParameterBase):
 
         Returns
         -------
-        masked_evaluations : list
-            The evaluations that have results (not numpy.nan or None).
+        masked_evaluations : {list, array}
+            The evaluations that have results (not numpy.nan or None). An array
+            if `evaluations` is an array of floats, otherwise a list.
         mask : boolean array
             The mask itself, used to create the masked arrays.
         """
+        # Regular evaluations stored in a single array are masked without
+        # looping over each evaluation
+        if isinstance(evaluations, np.ndarray) and np.issubdtype(evaluations.dtype, np.floating) \
+                and evaluations.ndim > 0:
+            mask = ~np.isnan(evaluations.reshape(len(evaluations), -1)).any(axis=1)
+
+            return evaluations[mask], mask
+
         masked_evaluations = []
         mask = np.ones(len(evaluations), dtype=bool)
 
@@ -482,16 +733,16 @@ class UncertaintyCalculations(ParameterBase):
 
         distribution = self.create_distribution(uncertain_parameters=uncertain_parameters)
 
-        P = cp.orth_ttr(polynomial_order, distribution)
+        P = self.orth_ttr(polynomial_order, distribution)
 
         if quadrature_order is None:
             quadrature_order = polynomial_order + 2
 
 
-        nodes, weights = cp.generate_quadrature(quadrature_order,
-                                                distribution,
-                                                rule="J",
-                                                sparse=True)
+        nodes, weights = self.generate_quadrature(quadrature_order,
+                                                  distribution,
+                                                  rule="J",
+                                                  sparse=True)
 
         # Running the model
         data = self.runmodel.run(nodes, uncertain_parameters)
@@ -514,8 +765,9 @@ class UncertaintyCalculations(ParameterBase):
 
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_quadrature(P, masked_nodes,
-                                                   masked_weights, masked_evaluations)
+                with self.runmodel.timer.stage("fit " + feature):
+                    U_hat[feature] = cp.fit_quadrature(P, masked_nodes,
+                                                       masked_weights, masked_evaluations)
             elif not allow_incomplete:
                 logger.warning("{}: not all parameter combinations give results.".format(feature) +
                                " No uncertainty quantification is performed since allow_incomplete=False")
@@ -606,7 +858,9 @@ class UncertaintyCalculations(ParameterBase):
         `nr_collocation_nodes` collocation nodes with Hammersley sampling from
         the `distribution`. We evaluate the model and each feature in parallel,
         and solve the resulting set of linear equations with Tikhonov
-        regularization.
+        regularization. The polynomials are evaluated at the nodes once, and
+        the model and features that gave results for the same nodes share the
+        factorization of the linear equations (see ``PolynomialRegression``).
 
         See also
         --------
@@ -618,7 +872,7 @@ class UncertaintyCalculations(ParameterBase):
 
         distribution = self.create_distribution(uncertain_parameters=uncertain_parameters)
 
-        P = cp.orth_ttr(polynomial_order, distribution)
+        P = self.orth_ttr(polynomial_order, distribution)
         if nr_collocation_nodes is None:
             nr_collocation_nodes = 2*len(P) + 2
 
@@ -632,6 +886,9 @@ class UncertaintyCalculations(ParameterBase):
 
         logger = get_logger(self)
 
+        # The polynomials are evaluated at the nodes once for all features
+        regression = PolynomialRegression(P, nodes)
+
         U_hat = {}
         # Calculate PC for each feature
         for feature in tqdm(data,
@@ -640,11 +897,11 @@ class UncertaintyCalculations(ParameterBase):
             if feature == self.model.name and self.model.ignore:
                 continue
 
-            masked_evaluations, mask, masked_nodes = self.create_masked_nodes(data, feature, nodes)
+            masked_evaluations, mask = self.create_masked_evaluations(data, feature)
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_regression(P, masked_nodes,
-                                                   masked_evaluations)
+                with self.runmodel.timer.stage("fit " + feature):
+                    U_hat[feature] = regression.fit(masked_evaluations, mask)
             elif not allow_incomplete:
                 logger.warning("{}: not all parameter combinations give results.".format(feature) +
                                " No uncertainty quantification is performed since allow_incomplete=False")
@@ -762,15 +1019,15 @@ class UncertaintyCalculations(ParameterBase):
 
         dist_R = cp.J(*dist_R)
 
-        P = cp.orth_ttr(polynomial_order, dist_R)
+        P = self.orth_ttr(polynomial_order, dist_R)
 
         if quadrature_order is None:
             quadrature_order = polynomial_order + 2
 
-        nodes_R, weights_R = cp.generate_quadrature(quadrature_order,
-                                                    dist_R,
-                                                    rule="J",
-                                                    sparse=True)
+        nodes_R, weights_R = self.generate_quadrature(quadrature_order,
+                                                      dist_R,
+                                                      rule="J",
+                                                      sparse=True)
 
 
         nodes = distribution.inv(dist_R.fwd(nodes_R))
@@ -806,10 +1063,11 @@ class UncertaintyCalculations(ParameterBase):
                                                  weights_R)
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_quadrature(P,
-                                                   masked_nodes,
-                                                   masked_weights,
-                                                   masked_evaluations)
+                with self.runmodel.timer.stage("fit " + feature):
+                    U_hat[feature] = cp.fit_quadrature(P,
+                                                       masked_nodes,
+                                                       masked_weights,
+                                                       masked_evaluations)
             elif not allow_incomplete:
                 logger.warning("{}: not all parameter combinations give results.".format(feature) +
                                " No uncertainty quantification is performed since allow_incomplete=False")
@@ -924,7 +1182,7 @@ class UncertaintyCalculations(ParameterBase):
 
         dist_R = cp.J(*dist_R)
 
-        P = cp.orth_ttr(polynomial_order, dist_R)
+        P = self.orth_ttr(polynomial_order, dist_R)
 
         if nr_collocation_nodes is None:
             nr_collocation_nodes = 2*len(P) + 2
@@ -939,6 +1197,9 @@ class UncertaintyCalculations(ParameterBase):
 
         logger = get_logger(self)
 
+        # The polynomials are evaluated at the nodes once for all features
+        regression = PolynomialRegression(P, nodes_R)
+
         U_hat = {}
         # Calculate PC for each feature
         for feature in tqdm(data,
@@ -947,12 +1208,227 @@ class UncertaintyCalculations(ParameterBase):
             if feature == self.model.name and self.model.ignore:
                 continue
 
-            masked_evaluations, mask, masked_nodes = self.create_masked_nodes(data, feature, nodes_R)
+            masked_evaluations, mask = self.create_masked_evaluations(data, feature)
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                U_hat[feature] = cp.fit_regression(P,
-                                                   masked_nodes,
-                                                   masked_evaluations)
+                with self.runmodel.timer.stage("fit " + feature):
+                    U_hat[feature] = regression.fit(masked_evaluations, mask)
+            elif not allow_incomplete:
+                logger.warning("{}: not all parameter combinations give results.".format(feature) +
+                               " No uncertainty quantification is performed since allow_incomplete=False")
+
+            else:
+                logger.warning("{}: not all parameter combinations give results.".format(feature))
+
+            if not np.all(mask):
+                data.incomplete.append(feature)
+
+        return U_hat, dist_R, data
+
+
+    def create_PCE_adaptive(self,
+                            uncertain_parameters=None,
+                            polynomial_order=4,
+                            tolerance=10**-3,
+                            max_evaluations=None,
+                            rosenblatt=False,
+                            allow_incomplete=True):
+        """
+        Create the polynomial approximation `U_hat` using point collocation,
+        where the polynomial order is increased until the leave-one-out error
+        is below `tolerance`, reusing the model evaluations of the lower
+        orders.
+
+        Parameters
+        ----------
+        uncertain_parameters : {None, str, list}, optional
+            The uncertain parameter(s) to use when creating the polynomial
+            approximation. If None, all uncertain parameters are used.
+            Default is None.
+        polynomial_order : int, optional
+            The highest polynomial order of the polynomial approximation.
+            Default is 4.
+        tolerance : float, optional
+            The leave-one-out error, relative to the variance, the model and
+            every feature must be below to stop increasing the polynomial
+            order. Default is 10**-3.
+        max_evaluations : {None, int}, optional
+            The maximum number of model evaluations. If None, the number of
+            evaluations is only limited by `polynomial_order`.
+            Default is None.
+        rosenblatt : bool, optional
+            If the Rosenblatt transformation should be used. Required if the
+            uncertain parameters have dependent variables. Default is False.
+        allow_incomplete : bool, optional
+            If the polynomial approximation should be performed for features or
+            models with incomplete evaluations.
+            Default is True.
+
+        Returns
+        -------
+        U_hat : dict
+            A dictionary containing the polynomial approximations for the
+            model and each feature as chaospy.Poly objects.
+        distribution : chaospy.Dist
+            The multivariate distribution for the uncertain parameters, or the
+            independent normal distribution if the Rosenblatt transformation
+            is used.
+        data : Data
+            A data object containing the values from the model evaluation
+            and feature calculations.
+
+        Raises
+        ------
+        ValueError
+            If a common multivariate distribution is given in
+            Parameters.distribution and not all uncertain parameters are used.
+        ValueError
+            If `max_evaluations` is too low to create a first order
+            polynomial approximation.
+
+        Notes
+        -----
+        The returned `data` should contain (but not necessarily) the following:
+
+            1. ``data["model/features"].evaluations``
+            2. ``data["model/features"].time``
+            3. ``data["model/features"].labels``
+            4. ``data.model_name``
+            5. ``data.incomplete``
+            6. ``data.method``
+            7. ``data.errored``
+
+        We start with a first order polynomial approximation, and
+        ``2*number of expansion factors + 2`` collocation nodes from a Halton
+        sequence. The Halton sequence is nested, so when the polynomial order
+        is increased the nodes of the lower orders are the first nodes of the
+        sequence, and only the new nodes are evaluated. After each order the
+        leave-one-out error of the model and each feature is calculated
+        (see ``PolynomialRegression.leave_one_out``), and we stop when the
+        largest error is below `tolerance`, `polynomial_order` is reached or
+        `max_evaluations` would be exceeded. The polynomial approximation is
+        then created with the order with the lowest error, using every
+        evaluated node.
+
+        See also
+        --------
+        uncertainpy.Data
+        uncertainpy.Parameters
+        uncertainpy.core.PolynomialRegression.leave_one_out
+        uncertainpy.core.UncertaintyCalculations.create_PCE_collocation
+        """
+        uncertain_parameters = self.convert_uncertain_parameters(uncertain_parameters)
+
+        distribution = self.create_distribution(uncertain_parameters=uncertain_parameters)
+
+        if rosenblatt:
+            dist_R = cp.J(*[cp.Normal() for parameter in uncertain_parameters])
+        else:
+            dist_R = distribution
+
+        def nr_collocation_nodes(P):
+            nr_nodes = 2*len(P) + 2
+            if max_evaluations is not None:
+                nr_nodes = min(nr_nodes, max_evaluations)
+
+            return nr_nodes
+
+        def features(data):
+            return [feature for feature in data
+                    if not (feature == self.model.name and self.model.ignore)]
+
+        logger = get_logger(self)
+
+        results = []
+        failed_evaluations = {}
+
+        def evaluate(nr_nodes):
+            nodes_R = dist_R.sample(nr_nodes, "H")
+            nodes = distribution.inv(dist_R.fwd(nodes_R)) if rosenblatt else nodes_R
+
+            offset = len(results)
+            new_results = self.runmodel.evaluate_nodes(nodes[..., offset:], uncertain_parameters)
+
+            results.extend(new_results)
+            for index, failed_evaluation in self.runmodel.failed_evaluations.items():
+                failed_evaluations[index + offset] = failed_evaluation
+
+            with self.runmodel.timer.stage("results_to_data"):
+                data = self.runmodel.results_to_data(results)
+
+            return nodes_R, data
+
+        P = self.orth_ttr(1, dist_R)
+
+        if nr_collocation_nodes(P) <= len(P):
+            raise ValueError("max_evaluations={} is too low, ".format(max_evaluations) +
+                             "at least {} model evaluations are required".format(len(P) + 1))
+
+        errors = {}
+        order = 1
+        while True:
+            nodes_R, data = evaluate(nr_collocation_nodes(P))
+
+            regression = PolynomialRegression(P, nodes_R)
+
+            error = 0
+            for feature in features(data):
+                masked_evaluations, mask = self.create_mask(data[feature].evaluations)
+
+                if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
+                    error = max(error, regression.leave_one_out(masked_evaluations, mask))
+
+            errors[order] = error
+
+            logger.info("Polynomial order {}: leave-one-out error {:.3g} with {} model evaluations".format(
+                order, error, len(results)))
+
+            if error <= tolerance or order >= polynomial_order:
+                break
+
+            next_P = self.orth_ttr(order + 1, dist_R)
+            if nr_collocation_nodes(next_P) <= max(len(next_P), len(results)):
+                logger.warning("The maximum number of model evaluations is reached " +
+                               "before the leave-one-out error is below the tolerance")
+                break
+
+            P = next_P
+            order += 1
+
+        if errors[order] > tolerance and order >= polynomial_order:
+            logger.warning("The highest polynomial order is reached " +
+                           "before the leave-one-out error is below the tolerance")
+
+        # Use every evaluated node for the order with the lowest error
+        best_order = min(errors, key=errors.get)
+        if best_order != order:
+            P = self.orth_ttr(best_order, dist_R)
+            regression = PolynomialRegression(P, nodes_R)
+
+        data.uncertain_parameters = uncertain_parameters
+        data.failed_evaluations = self.runmodel.format_failed_evaluations(failed_evaluations)
+
+        if self.runmodel.timings:
+            data.timings = self.runmodel.timer.summary()
+
+        if rosenblatt:
+            method = "polynomial chaos expansion with adaptive point collocation and the Rosenblatt transformation"
+        else:
+            method = "polynomial chaos expansion with adaptive point collocation"
+
+        data.method = method + ". polynomial_order={}, nr_collocation_nodes={}, leave_one_out_error={:.3g}".format(
+            best_order, len(results), errors[best_order])
+
+        U_hat = {}
+        # Calculate PC for each feature
+        for feature in tqdm(features(data),
+                            desc="Calculating PC for each feature",
+                            total=len(features(data))):
+            masked_evaluations, mask = self.create_masked_evaluations(data, feature)
+
+            if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
+                with self.runmodel.timer.stage("fit " + feature):
+                    U_hat[feature] = regression.fit(masked_evaluations, mask)
             elif not allow_incomplete:
                 logger.warning("{}: not all parameter combinations give results.".format(feature) +
                                " No uncertainty quantification is performed since allow_incomplete=False")
@@ -1014,6 +1490,20 @@ class UncertaintyCalculations(ParameterBase):
             14. ``data["model/features"].sobol_first_average``, if more than 1 parameter
             15. ``data["model/features"].sobol_total_average``, if more than 1 parameter
 
+        If the uncertain parameters are independent, the polynomial
+        approximations are converted to a coefficient matrix (see
+        ``PolynomialExpansion``), and the mean, variance and Sobol indices of
+        every time point are calculated from the coefficients at once.
+        Otherwise they are calculated with Chaospy.
+
+        The percentiles are estimated from the polynomial approximations
+        evaluated at `nr_samples` samples, which are shared by the model and
+        all features. For independent uncertain parameters the percentiles
+        are calculated in blocks of time points, and the polynomial
+        approximations are evaluated in chunks of samples, so the memory used
+        is bounded regardless of the number of samples and terms (see
+        ``PolynomialExpansion.percentile``).
+
         See also
         --------
         uncertainpy.Data
@@ -1023,29 +1513,62 @@ class UncertaintyCalculations(ParameterBase):
             logger = get_logger(self)
             logger.info("Only 1 uncertain parameter. Sensitivities are not calculated")
 
-        U_mc = {}
+        # One set of samples is used to estimate the percentiles of the model
+        # and every feature
+        samples = distribution.sample(nr_samples, "M")
+
+        # For independent uncertain parameters the statistical metrics are
+        # calculated from the coefficients of the polynomial approximations
+        independent = not self.dependent(distribution)
+
+        expansions = {}
+        if independent:
+            for feature in data:
+                if feature in U_hat:
+                    expansions[feature] = PolynomialExpansion.from_poly(U_hat[feature], len(distribution))
+
+        if expansions:
+            degree = max(expansion.degree.max() for expansion in expansions.values())
+            moments = PolynomialExpansion.marginal_moments(distribution, 2*degree)
+
         for feature in tqdm(data,
                             desc="Calculating statistics from PCE",
                             total=len(data)):
-            if feature in U_hat:
-                data[feature].mean = cp.E(U_hat[feature], distribution)
-                data[feature].variance = cp.Var(U_hat[feature], distribution)
+            if feature in expansions:
+                with self.runmodel.timer.stage("analyse " + feature):
+                    expansion = expansions[feature]
+
+                    data[feature].mean = expansion.mean(moments)
+                    data[feature].variance = expansion.variance(moments)
+
+                    if len(data.uncertain_parameters) > 1:
+                        data[feature].sobol_first = expansion.sobol_first(moments)
+                        data[feature].sobol_total = expansion.sobol_total(moments)
+
+                    percentiles = expansion.percentile([5, 95], samples)
+                    data[feature].percentile_5 = percentiles[0]
+                    data[feature].percentile_95 = percentiles[1]
+
+            elif feature in U_hat:
+                with self.runmodel.timer.stage("analyse " + feature):
+                    data[feature].mean = cp.E(U_hat[feature], distribution)
+                    data[feature].variance = cp.Var(U_hat[feature], distribution)
 
-                samples = distribution.sample(nr_samples, "M")
+                    if len(data.uncertain_parameters) > 1:
+                        U_mc = U_hat[feature](*samples)
 
-                if len(data.uncertain_parameters) > 1:
-                    U_mc[feature] = U_hat[feature](*samples)
+                        data[feature].sobol_first = cp.Sens_m(U_hat[feature], distribution)
+                        data[feature].sobol_total = cp.Sens_t(U_hat[feature], distribution)
 
-                    data[feature].sobol_first = cp.Sens_m(U_hat[feature], distribution)
-                    data[feature].sobol_total = cp.Sens_t(U_hat[feature], distribution)
-                    data = self.average_sensitivity(data, sensitivity="sobol_first")
-                    data = self.average_sensitivity(data, sensitivity="sobol_total")
+                    else:
+                        U_mc = U_hat[feature](samples)
 
-                else:
-                    U_mc[feature] = U_hat[feature](samples)
+                    data[feature].percentile_5 = np.percentile(U_mc, 5, -1)
+                    data[feature].percentile_95 = np.percentile(U_mc, 95, -1)
 
-                data[feature].percentile_5 = np.percentile(U_mc[feature], 5, -1)
-                data[feature].percentile_95 = np.percentile(U_mc[feature], 95, -1)
+        if len(data.uncertain_parameters) > 1:
+            data = self.average_sensitivity(data, sensitivity="sobol_first")
+            data = self.average_sensitivity(data, sensitivity="sobol_total")
 
         return data
 
@@ -1194,6 +1717,8 @@ class UncertaintyCalculations(ParameterBase):
                          nr_pc_mc_samples=10**4,
                          allow_incomplete=True,
                          seed=None,
+                         tolerance=10**-3,
+                         max_evaluations=None,
                          **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -1201,11 +1726,12 @@ class UncertaintyCalculations(ParameterBase):
 
         Parameters
         ----------
-        method : {"collocation", "spectral", "custom"}, optional
+        method : {"collocation", "spectral", "adaptive", "custom"}, optional
             The method to use when creating the polynomial chaos approximation.
             "collocation" is the point collocation method "spectral" is
-            pseudo-spectral projection, and "custom" is the custom polynomial
-            method.
+            pseudo-spectral projection, "adaptive" is point collocation where
+            the polynomial order is increased until the leave-one-out error is
+            below `tolerance`, and "custom" is the custom polynomial method.
             Default is "collocation".
         rosenblatt : {"auto", bool}, optional
             If the Rosenblatt transformation should be used. The Rosenblatt
@@ -1218,7 +1744,8 @@ class UncertaintyCalculations(ParameterBase):
             approximation. If None, all uncertain parameters are used.
             Default is None.
         polynomial_order : int, optional
-            The polynomial order of the polynomial approximation.
+            The polynomial order of the polynomial approximation, or the
+            highest polynomial order if the adaptive method is used.
             Default is 4.
         nr_collocation_nodes : {int, None}, optional
             The number of collocation nodes to choose, if point collocation is
@@ -1237,6 +1764,14 @@ class UncertaintyCalculations(ParameterBase):
             Default is True.
         seed : int, optional
             Set a random seed. If None, no seed is set. Default is None.
+        tolerance : float, optional
+            The leave-one-out error, relative to the variance, where the
+            polynomial order is no longer increased, if the adaptive method is
+            used. Default is 10**-3.
+        max_evaluations : {None, int}, optional
+            The maximum number of model evaluations, if the adaptive method is
+            used. If None, the number of evaluations is only limited by
+            `polynomial_order`. Default is None.
 
         Returns
         -------
@@ -1250,7 +1785,8 @@ class UncertaintyCalculations(ParameterBase):
             If a common multivariate distribution is given in
             Parameters.distribution and not all uncertain parameters are used.
         ValueError
-            If `method` not one of "collocation", "spectral" or "custom".
+            If `method` not one of "collocation", "spectral", "adaptive" or
+            "custom".
         NotImplementedError
             If "custom" is chosen and have not been implemented.
 
@@ -1299,6 +1835,13 @@ class UncertaintyCalculations(ParameterBase):
         and solve the resulting set of linear equations with Tikhonov
         regularization.
 
+        With the adaptive method, we start with a first order polynomial
+        approximation and nested collocation nodes from a Halton sequence.
+        The polynomial order is increased, and only the new collocation nodes
+        are evaluated, until the leave-one-out error is below `tolerance`,
+        `polynomial_order` is reached or `max_evaluations` would be exceeded
+        (see ``create_PCE_adaptive``).
+
         Pseudo-spectral projection is based on least squares minimization and
         finds the expansion coefficients through numerical integration. The
         integration uses a quadrature scheme with weights and nodes. We use Leja
@@ -1367,6 +1910,15 @@ class UncertaintyCalculations(ParameterBase):
                                              quadrature_order=quadrature_order,
                                              allow_incomplete=allow_incomplete)
 
+        elif method == "adaptive":
+            U_hat, distribution, data = \
+                self.create_PCE_adaptive(uncertain_parameters=uncertain_parameters,
+                                         polynomial_order=polynomial_order,
+                                         tolerance=tolerance,
+                                         max_evaluations=max_evaluations,
+                                         rosenblatt=rosenblatt,
+                                         allow_incomplete=allow_incomplete)
+
         elif method == "custom":
             U_hat, distribution, data = \
                 self.create_PCE_custom(uncertain_parameters, **custom_kwargs)
@@ -1384,6 +1936,9 @@ class UncertaintyCalculations(ParameterBase):
 
         data.seed = seed
 
+        if self.runmodel.timings:
+            data.timings = self.runmodel.timer.summary()
+
         return data
 
 
@@ -1522,40 +2077,41 @@ class UncertaintyCalculations(ParameterBase):
             logger = get_logger(self)
 
             if (np.all(mask) or allow_incomplete) and sum(mask) > 0:
-                data[feature].mean = np.mean(masked_evaluations, 0)
-                data[feature].variance = np.var(masked_evaluations, 0)
-
-                data[feature].percentile_5 = np.percentile(masked_evaluations, 5, 0)
-                data[feature].percentile_95 = np.percentile(masked_evaluations, 95, 0)
-
-                if len(data.uncertain_parameters) > 1:
-                    # Results cannot be removed when calculating the sensitivity.
-                    # Instead NaN results are set to the mean.
-                    # see https://github.com/SALib/SALib/issues/134
-                    _, mask = self.create_mask(data[feature].evaluations)
-                    masked_mean_evaluations = data[feature].evaluations
-
-                    # masked_mean_evaluations[~mask] = data[feature].mean
-                    indices = np.where(mask == 0)[0]
-
-                    for i in indices:
-                        masked_mean_evaluations[i] = data[feature].mean
-
-                    if not np.all(mask):
-                        logger.warning("{}: only yields ".format(feature) +
-                                       "results for {}/{} ".format(sum(mask), len(mask)) +
-                                       "parameter combinations." +
-                                       "numpy.nan results are set to the mean when calculating the Sobol indices. " +
-                                       "This might affect the Sobol indices.")
-
-
-                    sobol_first, sobol_total = self.mc_calculate_sobol(masked_mean_evaluations,
-                                                                       len(uncertain_parameters),
-                                                                       nr_sobol_samples)
-                    data[feature].sobol_first = sobol_first
-                    data[feature].sobol_total = sobol_total
-                    data = self.average_sensitivity(data, sensitivity="sobol_first")
-                    data = self.average_sensitivity(data, sensitivity="sobol_total")
+                with self.runmodel.timer.stage("analyse " + feature):
+                    data[feature].mean = np.mean(masked_evaluations, 0)
+                    data[feature].variance = np.var(masked_evaluations, 0)
+
+                    data[feature].percentile_5 = np.percentile(masked_evaluations, 5, 0)
+                    data[feature].percentile_95 = np.percentile(masked_evaluations, 95, 0)
+
+                    if len(data.uncertain_parameters) > 1:
+                        # Results cannot be removed when calculating the sensitivity.
+                        # Instead NaN results are set to the mean.
+                        # see https://github.com/SALib/SALib/issues/134
+                        _, mask = self.create_mask(data[feature].evaluations)
+                        masked_mean_evaluations = data[feature].evaluations
+
+                        # masked_mean_evaluations[~mask] = data[feature].mean
+                        indices = np.where(mask == 0)[0]
+
+                        for i in indices:
+                            masked_mean_evaluations[i] = data[feature].mean
+
+                        if not np.all(mask):
+                            logger.warning("{}: only yields ".format(feature) +
+                                           "results for {}/{} ".format(sum(mask), len(mask)) +
+                                           "parameter combinations." +
+                                           "numpy.nan results are set to the mean when calculating the Sobol indices. " +
+                                           "This might affect the Sobol indices.")
+
+
+                        sobol_first, sobol_total = self.mc_calculate_sobol(masked_mean_evaluations,
+                                                                           len(uncertain_parameters),
+                                                                           nr_sobol_samples)
+                        data[feature].sobol_first = sobol_first
+                        data[feature].sobol_total = sobol_total
+                        data = self.average_sensitivity(data, sensitivity="sobol_first")
+                        data = self.average_sensitivity(data, sensitivity="sobol_total")
 
             elif not allow_incomplete:
                 logger.warning("{}: not all parameter combinations give results.".format(feature) +
@@ -1567,6 +2123,8 @@ class UncertaintyCalculations(ParameterBase):
             if not np.all(mask):
                 data.incomplete.append(feature)
 
+        if self.runmodel.timings:
+            data.timings = self.runmodel.timer.summary()
 
         return data
 
@@ -1604,7 +2162,7 @@ class UncertaintyCalculations(ParameterBase):
         https://github.com/SALib/SALib/blob/master/SALib/analyze/sobol.py
         """
 
-        evaluations = np.array(evaluations)
+        evaluations = np.asarray(evaluations)
 
         shape = (nr_samples, nr_uncertain_parameters) + evaluations[0].shape
         step = nr_uncertain_parameters + 2
@@ -2,6 +2,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import six
 import os
+import json
 import collections
 
 import numpy as np
@@ -334,6 +335,14 @@ class Data(collections.MutableMapping):
         quantification.
     data : dictionary
         A dictionary with a DataFeature for each model/feature.
+    timings : dictionary
+        Summary statistics of the wall and CPU time used by each stage of the
+        uncertainty quantification, see ``timing_report``.
+    failed_evaluations : list
+        The model evaluations that failed and were set to numpy.nan, each a
+        dictionary ``{"index": int, "parameters": dict, "traceback": str}``
+        with the index of the node, the model parameters and the traceback
+        of the exception.
     data_information : list
         List of attributes containing additional information.
 
@@ -390,6 +399,8 @@ class Data(collections.MutableMapping):
         self.method = ""
         self.model_ignore = False
         self._seed = ""
+        self.timings = {}
+        self.failed_evaluations = []
         self.backend = backend
 
         self.version = __version__
@@ -473,9 +484,56 @@ class Data(collections.MutableMapping):
         self.method = ""
         self._seed = ""
         self.model_ignore = False
+        self.timings = {}
+        self.failed_evaluations = []
         self.version = __version__
 
 
+    def timing_report(self):
+        """
+        Create a table of the time used by each stage of the uncertainty
+        quantification, sorted by the total wall time.
+
+        Returns
+        -------
+        str
+            A human readable table with the number of times each stage was
+            run, the total, mean and maximum wall time, and the total CPU
+            time of each stage, in seconds.
+
+        Notes
+        -----
+        The stages are ``"evaluate"``, ``"postprocess"``, ``"preprocess"``,
+        ``"feature <feature name>"`` and ``"interpolation"`` for each model
+        evaluation, ``"results_to_data"`` for creating the Data object, and
+        ``"fit <feature name>"`` and ``"analyse <feature name>"`` for the
+        calculation of the statistical metrics of each model/feature. The
+        evaluations run in parallel, so the total time of the stages can be
+        larger than the wall time of the uncertainty quantification.
+        """
+        if not self.timings:
+            return "No timings recorded"
+
+        width = max(len("stage"), max(len(stage) for stage in self.timings))
+
+        row = "{:<{width}}  {:>7}  {:>12}  {:>12}  {:>12}  {:>12}\n"
+        output_str = row.format("stage", "count", "wall total", "wall mean",
+                                "wall max", "cpu total", width=width)
+
+        stages = sorted(self.timings, key=lambda stage: self.timings[stage]["wall_total"], reverse=True)
+        for stage in stages:
+            timing = self.timings[stage]
+            output_str += row.format(stage,
+                                     timing["count"],
+                                     "{:.4g}".format(timing["wall_total"]),
+                                     "{:.4g}".format(timing["wall_mean"]),
+                                     "{:.4g}".format(timing["wall_max"]),
+                                     "{:.4g}".format(timing["cpu_total"]),
+                                     width=width)
+
+        return output_str.rstrip()
+
+
     def ndim(self, feature):
         """
         Get the number of dimensions of a `feature`.
@@ -693,6 +751,12 @@ class Data(collections.MutableMapping):
         f.attrs["seed"] = self.seed
         f.attrs["model ignore"] = self.model_ignore
 
+        if self.timings:
+            f.attrs["timings"] = json.dumps(self.timings)
+
+        if self.failed_evaluations:
+            f.attrs["failed evaluations"] = json.dumps(self.failed_evaluations, default=str)
+
 
         for feature in self.data:
             group = f.create_group(feature)
@@ -810,6 +874,20 @@ class Data(collections.MutableMapping):
         if "model ignore" in f.attrs:
             self.model_ignore = f.attrs["model ignore"]
 
+        if "timings" in f.attrs:
+            timings = f.attrs["timings"]
+            if isinstance(timings, bytes):
+                timings = timings.decode("utf8")
+
+            self.timings = json.loads(timings)
+
+        if "failed evaluations" in f.attrs:
+            failed_evaluations = f.attrs["failed evaluations"]
+            if isinstance(failed_evaluations, bytes):
+                failed_evaluations = failed_evaluations.decode("utf8")
+
+            self.failed_evaluations = json.loads(failed_evaluations)
+
 
         for feature in f:
             self.add_features(str(feature))
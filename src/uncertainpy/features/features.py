@@ -4,6 +4,7 @@ import numpy as np
 import six
 
 from ..utils.logger import setup_module_logger
+from ..utils.timer import Timer
 
 class Features(object):
     """
@@ -443,7 +444,7 @@ class Features(object):
 
 
 
-    def calculate_features(self, *model_results):
+    def calculate_features(self, *model_results, timer=None):
         """
         Calculate all features in ``features_to_run``.
 
@@ -453,6 +454,10 @@ class Features(object):
             Variable length argument list. Is the values that ``model.run()``
             returns. By default it contains `time` and `values`, and then any number of
             optional `info` values.
+        timer : {None, Timer}, optional
+            A timer the wall and CPU time of the ``"preprocess"`` stage and
+            of each ``"feature <feature name>"`` stage is added to.
+            Default is None.
 
         Returns
         -------
@@ -474,11 +479,16 @@ class Features(object):
         --------
         uncertainpy.features.Features.calculate_feature : Method for calculating a single feature.
         """
-        preprocess_results = self.preprocess(*model_results)
+        if timer is None:
+            timer = Timer()
+
+        with timer.stage("preprocess"):
+            preprocess_results = self.preprocess(*model_results)
 
         results = {}
         for feature in self.features_to_run:
-            time_feature, values_feature = self.calculate_feature(feature, *preprocess_results)
+            with timer.stage("feature " + feature):
+                time_feature, values_feature = self.calculate_feature(feature, *preprocess_results)
 
             results[feature] = {"time": time_feature, "values": values_feature}
 
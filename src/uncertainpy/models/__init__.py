@@ -5,12 +5,15 @@ A module that contains different model classes. The main class is ``Model``,
 for storing the model to perform uncertainty quantification and sensitivity
 analysis on. This class does not implement any specific models itself, but
 contain all common methods used by models. Then there are two class for specific
-simulators: NEURON (``NeuronModel``) and Nest (``NestModel``).
+simulators: NEURON (``NeuronModel``) and Nest (``NestModel``), and a class for
+simulators run as an external program configured by a parameter file
+(``ExternalProcessModel``).
 """
 
-__all__ = ["Model", "NeuronModel", "NestModel"]
+__all__ = ["Model", "NeuronModel", "NestModel", "ExternalProcessModel"]
 
 from .model import Model
 from .neuron_model import NeuronModel
 from .nest_model import NestModel
+from .external_process_model import ExternalProcessModel
 
@@ -0,0 +1,469 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import re
+import shlex
+import shutil
+import tempfile
+import threading
+import subprocess
+
+import six
+
+from .model import Model
+
+
+# The ``name = number`` assignments replaced in a parameter template,
+# the same format as Parameter.set_parameter_file
+assignment_pattern = r"(\A|\b)({names})(\s*=\s*)((([+-]?\d+[.]?\d*)|([+-]?\d*[.]?\d+))([eE][+-]?\d+)*)($|\b)"
+
+
+class ExternalProcessModel(Model):
+    """
+    Class for models run by an external simulator that is configured through
+    a parameter file.
+
+    For each model evaluation a scratch directory is created, the parameter
+    template is rendered into it with the values of the parameters, the
+    simulator `command` is run in the directory, and the output files are
+    parsed by the ``parse`` method. Each evaluation has its own directory, so
+    evaluations running in parallel do not share files.
+
+    Parameters
+    ----------
+    command : {list, str}
+        The command that runs the simulator, as a list of arguments or a
+        string split with shlex. The command is run with the scratch directory
+        as working directory. The ``{name}`` placeholders of the model
+        parameters and ``directory`` in each argument are replaced by their
+        values, so ``"{a}"`` is replaced by the value of the parameter ``a``,
+        and ``"{a:.3f}"`` by the value formatted with ``.3f``. Other braces
+        are left as they are.
+    template : {None, str}, optional
+        Name of the parameter template file. Each ``name = number``
+        assignment of a model parameter in the template is replaced by the
+        value of the parameter, and the rendered file is written to the
+        scratch directory with the same base name. If None, no parameter file
+        is written. Default is None.
+    parse : {None, callable}, optional
+        A function that reads the output files of the simulator in a scratch
+        directory and returns the model result. See the ``parse`` method for
+        requirements of the function. Default is None.
+    files : {None, list}, optional
+        Names of additional input files that are copied into each scratch
+        directory before the simulator is run. Default is None.
+    scratch_dir : {None, str}, optional
+        Name of the folder the scratch directories are created in. If None,
+        the temporary folder of the system is used. Default is None.
+    reuse_directories : bool, optional
+        If True, each thread in each process reuses the same scratch directory
+        for every evaluation, and the output files of the previous evaluation
+        are removed before the next. The directories are removed when the
+        model is torn down, unless `keep_directories` is True.
+        Default is False.
+    keep_directories : {False, True, "failed"}, optional
+        If True, the scratch directories are not removed after the
+        evaluation. If "failed", only the directories of evaluations that
+        failed are kept, for debugging. Default is False.
+    timeout : {None, float}, optional
+        The maximum wall time in seconds of the simulator. If the simulator
+        runs longer it is killed and the evaluation fails. Default is None.
+    interpolate : bool, optional
+        True if the model is irregular, meaning it has a varying number of
+        return values between different model evaluations, and
+        an interpolation of the results is performed. Default is False.
+    labels : list, optional
+        A list of label names for the axes when plotting the model.
+        On the form ``["x-axis", "y-axis", "z-axis"]``, with the number of axes
+        that is correct for the model output. Default is an empty list.
+    postprocess : {None, callable}, optional
+        A function that implements the postprocessing of the model.
+        Default is None.
+    ignore : bool, optional
+        Ignore the model results when calculating uncertainties, which means the
+        uncertainty is not calculated for the model. Default is False.
+    logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
+        Set the threshold for the logging level. Logging messages less severe
+        than this level is ignored. If None, no logging to file is performed.
+        Default logger level is "info".
+    **model_kwargs
+        Any number of arguments that are set in the parameter template and
+        command together with the uncertain parameters.
+
+    Attributes
+    ----------
+    command : list
+        The command that runs the simulator.
+    template : {None, str}
+        Name of the parameter template file.
+    files : list
+        Names of the input files copied into each scratch directory.
+    scratch_dir : {None, str}
+        Name of the folder the scratch directories are created in.
+    reuse_directories : bool
+        If each thread reuses its scratch directory.
+    keep_directories : {False, True, "failed"}
+        Which scratch directories that are kept after the evaluation.
+    timeout : {None, float}
+        The maximum wall time in seconds of the simulator.
+
+    Notes
+    -----
+    The template is read and the patterns that replace the parameters are
+    compiled once in each process (see ``Model.setup``), and every parameter
+    is replaced in a single pass over the template. The original template is
+    never modified, unlike ``Parameters.set_parameters_file``.
+
+    The output of the simulator is written to ``stdout.txt`` and
+    ``stderr.txt`` in the scratch directory. If the simulator exits with a
+    nonzero exit code, the evaluation fails with a RuntimeError containing
+    the end of ``stderr.txt``.
+
+    The simulator runs in a separate process and does not hold the GIL, so
+    ``uncertainpy.core.ThreadExecutor`` can run many simulators at the same
+    time from a single Python process.
+
+    Examples
+    --------
+    ::
+
+        def parse(directory):
+            time, values = np.loadtxt(os.path.join(directory, "output.txt"))
+            return time, values
+
+        model = un.ExternalProcessModel(command=["simulator", "model.cfg"],
+                                        template="model.cfg",
+                                        parse=parse)
+
+    See Also
+    --------
+    uncertainpy.models.ExternalProcessModel.parse
+    uncertainpy.models.ExternalProcessModel.render
+    """
+    def __init__(self,
+                 command,
+                 template=None,
+                 parse=None,
+                 files=None,
+                 scratch_dir=None,
+                 reuse_directories=False,
+                 keep_directories=False,
+                 timeout=None,
+                 interpolate=False,
+                 labels=[],
+                 postprocess=None,
+                 ignore=False,
+                 logger_level="info",
+                 **model_kwargs):
+
+        super(ExternalProcessModel, self).__init__(interpolate=interpolate,
+                                                   labels=labels,
+                                                   postprocess=postprocess,
+                                                   ignore=ignore,
+                                                   logger_level=logger_level,
+                                                   **model_kwargs)
+
+        if isinstance(command, six.string_types):
+            command = shlex.split(command)
+
+        if keep_directories not in [False, True, "failed"]:
+            raise ValueError("keep_directories must be False, True or 'failed', not {}".format(keep_directories))
+
+        self.command = list(command)
+        self.template = template
+        self.files = [] if files is None else list(files)
+        self.scratch_dir = scratch_dir
+        self.reuse_directories = reuse_directories
+        self.keep_directories = keep_directories
+        self.timeout = timeout
+
+        if parse is not None:
+            self.parse = parse
+
+        self._template_text = None
+        self._patterns = {}
+        self._directories = {}
+
+
+    def __getstate__(self):
+        # The scratch directories belong to the process that created them
+        state = super(ExternalProcessModel, self).__getstate__()
+        state["_directories"] = {}
+
+        return state
+
+
+    def setup(self):
+        """
+        Read the parameter template. Run once in each process.
+        """
+        if self.template is not None:
+            with open(self.template) as template_file:
+                self._template_text = template_file.read()
+
+
+    def teardown(self):
+        """
+        Remove the reused scratch directories created by the current process,
+        unless `keep_directories` is True.
+        """
+        pid = os.getpid()
+
+        for key in list(self._directories):
+            if key[0] == pid:
+                directory = self._directories.pop(key)
+
+                if self.keep_directories is not True:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+        self._template_text = None
+
+
+    @property
+    def parse(self):
+        """
+        Read the output files of the simulator and return the model result.
+
+        This method must either be implemented or set to a function.
+
+        Parameters
+        ----------
+        directory : str
+            Name of the scratch directory the simulator was run in.
+
+        Returns
+        -------
+        time : {None, numpy.nan, array_like}
+            Time values of the model, if no time values returns None or
+            numpy.nan.
+        values : array_like
+            Result of the model.
+        info, optional
+            Any number of info objects that is passed on to feature
+            calculations.
+
+        Raises
+        ------
+        NotImplementedError
+            If no parse method have been implemented or set to a function.
+
+        Notes
+        -----
+        The ``parse`` function has the same output requirements as the
+        ``run`` function of a regular model, see ``Model.run``. The scratch
+        directory may be removed after ``parse`` returns, so the results must
+        be read into memory.
+        """
+        return self._parse
+
+
+    def _parse(self, directory):
+        raise NotImplementedError("No parse method implemented or set in {class_name}".format(class_name=self.__class__.__name__))
+
+
+    @parse.setter
+    def parse(self, new_parse_function):
+        if not callable(new_parse_function):
+            raise TypeError("parse function must be callable")
+
+        self._parse = new_parse_function
+
+
+    def _pattern(self, names):
+        """
+        The compiled pattern that matches the assignments of the parameters
+        `names`. Compiled once for each set of parameter names.
+        """
+        key = tuple(sorted(names))
+
+        if key not in self._patterns:
+            # Longest names first, so a name is not matched by a shorter prefix
+            escaped = [re.escape(name) for name in sorted(key, key=len, reverse=True)]
+            self._patterns[key] = re.compile(assignment_pattern.format(names="|".join(escaped)),
+                                             re.MULTILINE)
+
+        return self._patterns[key]
+
+
+    def _format_argument(self, argument, values):
+        """
+        Replace the ``{name}`` and ``{name:format_spec}`` placeholders of the
+        names in `values` in a command argument. Other braces, for example in
+        a JSON argument, are left as they are.
+        """
+        # Longest names first, so a name is not matched by a shorter prefix
+        escaped = [re.escape(name) for name in sorted(values, key=len, reverse=True)]
+        pattern = re.compile(r"\{(" + "|".join(escaped) + r")(?::([^{}]*))?\}")
+
+        return pattern.sub(lambda match: format(values[match.group(1)], match.group(2) or ""),
+                           str(argument))
+
+
+    def render(self, parameters):
+        """
+        Render the parameter template with the values of the parameters.
+
+        Parameters
+        ----------
+        parameters : dict
+            The values of the model parameters.
+
+        Returns
+        -------
+        text : str
+            The template where each ``name = number`` assignment of a
+            parameter in `parameters` is replaced with
+            ``name = parameters[name]``.
+
+        Raises
+        ------
+        ValueError
+            If no parameter template is set.
+        """
+        self._ensure_setup()
+
+        if self._template_text is None:
+            raise ValueError("No parameter template is set in {}".format(self.name))
+
+        if not parameters:
+            return self._template_text
+
+        def replace(match):
+            return match.group(1) + match.group(2) + match.group(3) + str(parameters[match.group(2)])
+
+        return self._pattern(parameters.keys()).sub(replace, self._template_text)
+
+
+    def _acquire_directory(self):
+        """
+        Create a scratch directory, or clean and return the reused scratch
+        directory of the current thread.
+        """
+        key = (os.getpid(), threading.current_thread().ident)
+
+        if self.reuse_directories and key in self._directories:
+            directory = self._directories[key]
+            input_files = set(os.path.basename(filename) for filename in self.files)
+
+            # Remove the output of the previous evaluation
+            for name in os.listdir(directory):
+                if name not in input_files:
+                    path = os.path.join(directory, name)
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+
+            return directory
+
+        if self.scratch_dir is not None and not os.path.isdir(self.scratch_dir):
+            try:
+                os.makedirs(self.scratch_dir)
+            except OSError:
+                # Created by another worker at the same time
+                if not os.path.isdir(self.scratch_dir):
+                    raise
+
+        directory = tempfile.mkdtemp(prefix=self.name + "_", dir=self.scratch_dir)
+
+        for filename in self.files:
+            shutil.copy2(filename, directory)
+
+        if self.reuse_directories:
+            self._directories[key] = directory
+
+        return directory
+
+
+    def _release_directory(self, directory, success):
+        """
+        Remove or keep a scratch directory after an evaluation.
+        """
+        keep = self.keep_directories is True or (self.keep_directories == "failed" and not success)
+
+        if self.reuse_directories:
+            if not success and keep:
+                # Keep the failed directory, and use a new one for the next evaluation
+                self._directories.pop((os.getpid(), threading.current_thread().ident), None)
+
+        elif not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+    def _launch(self, directory, parameters):
+        """
+        Run the simulator in `directory`.
+        """
+        values = dict(parameters, directory=directory)
+        command = [self._format_argument(argument, values) for argument in self.command]
+
+        stdout_name = os.path.join(directory, "stdout.txt")
+        stderr_name = os.path.join(directory, "stderr.txt")
+
+        with open(stdout_name, "w") as stdout, open(stderr_name, "w") as stderr:
+            process = subprocess.Popen(command, cwd=directory, stdout=stdout, stderr=stderr)
+
+            try:
+                returncode = process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+                raise RuntimeError("{command} did not finish in {timeout} s".format(command=" ".join(command),
+                                                                                   timeout=self.timeout))
+
+        if returncode != 0:
+            with open(stderr_name) as stderr:
+                message = stderr.read()[-2000:]
+
+            raise RuntimeError("{command} failed with exit code {code}:\n{message}".format(command=" ".join(command),
+                                                                                         code=returncode,
+                                                                                         message=message))
+
+
+    def run(self, **parameters):
+        """
+        Render the parameter template into a scratch directory, run the
+        simulator and parse the output.
+
+        Parameters
+        ----------
+        **parameters : A number of named arguments (name=value).
+            The parameters of the model, set in the parameter template and the
+            command.
+
+        Returns
+        -------
+        time : {None, numpy.nan, array_like}
+            Time values of the model, as returned by ``parse``.
+        values : array_like
+            Result of the model, as returned by ``parse``.
+        info, optional
+            Any number of info objects, as returned by ``parse``.
+
+        Raises
+        ------
+        RuntimeError
+            If the simulator fails or times out.
+        """
+        self._ensure_setup()
+
+        directory = self._acquire_directory()
+        success = False
+
+        try:
+            if self.template is not None:
+                filename = os.path.join(directory, os.path.basename(self.template))
+
+                with open(filename, "w") as parameter_file:
+                    parameter_file.write(self.render(parameters))
+
+            self._launch(directory, parameters)
+            model_result = self.parse(directory)
+
+            success = True
+
+        finally:
+            self._release_directory(directory, success)
+
+        return model_result
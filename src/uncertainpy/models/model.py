@@ -1,10 +1,18 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import inspect
+import threading
+
 import six
 import numpy as np
 
 from ..utils.logger import setup_module_logger, get_logger
 
+
+# Serializes the setup of models shared between threads
+_setup_lock = threading.RLock()
+
+
 class Model(object):
     """
     Class for storing the model to perform uncertainty quantification and
@@ -15,7 +23,9 @@ class Model(object):
     If you want to calculate features directly from the original model results,
     but still need to postprocess the model results to perform the
     uncertainty quantification, you can implement the postprocessing in the
-    ``postprocess`` method.
+    ``postprocess`` method. Expensive initialization of a simulator can be
+    implemented in the ``setup`` method, which is only run once in each
+    process.
 
     Parameters
     ----------
@@ -39,6 +49,10 @@ class Model(object):
         uncertainty is not calculated for the model. Default is False.
     suppress_graphics : bool, optional
         Suppress all graphics created by the model. Default is False.
+    run_batch : {None, callable}, optional
+        A vectorized function that implements the model for a block of
+        parameter sets at once. See the ``run_batch`` method for
+        requirements of the function. Default is None.
     logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed.
@@ -69,8 +83,13 @@ class Model(object):
     See Also
     --------
     uncertainpy.models.Model.run
+    uncertainpy.models.Model.run_batch
     uncertainpy.models.Model.postprocess
+    uncertainpy.models.Model.setup
     """
+    _run_batch = None
+    _is_setup = False
+
     def __init__(self,
                  run=None,
                  interpolate=False,
@@ -78,6 +97,7 @@ class Model(object):
                  postprocess=None,
                  ignore=False,
                  suppress_graphics=False,
+                 run_batch=None,
                  logger_level="info",
                  **model_kwargs):
 
@@ -98,6 +118,17 @@ class Model(object):
         if postprocess is not None:
             self.postprocess = postprocess
 
+        if run_batch is not None:
+            self.run_batch = run_batch
+
+
+    def __getstate__(self):
+        # A copy of the model sent to another process is set up again there
+        state = self.__dict__.copy()
+        state.pop("_is_setup", None)
+
+        return state
+
 
     @property
     def run(self):
@@ -219,6 +250,29 @@ class Model(object):
         raise NotImplementedError("No run method implemented or set in {class_name}".format(class_name=__name__))
 
 
+    @property
+    def is_async(self):
+        """
+        If the run function of the model is a coroutine function
+        (``async def run``).
+
+        Returns
+        -------
+        is_async : bool
+            True if ``run`` is a coroutine function.
+
+        Notes
+        -----
+        Models with a coroutine run function are evaluated concurrently in an
+        asyncio event loop by ``uncertainpy.core.AsyncExecutor``, which
+        RunModel uses by default for these models. Elsewhere, the coroutine is
+        run to completion in a new event loop.
+        """
+        iscoroutinefunction = getattr(inspect, "iscoroutinefunction", None)
+
+        return iscoroutinefunction is not None and iscoroutinefunction(self.run)
+
+
     def evaluate(self, **parameters):
         """
         Run the model with parameters and default model_kwargs options,
@@ -251,15 +305,193 @@ class Model(object):
         --------
         uncertainpy.models.Model.run : Requirements for the model run function.
         """
+        self._ensure_setup()
+
         all_parameters = self.model_kwargs.copy()
         all_parameters.update(parameters)
 
         model_result = self.run(**all_parameters)
 
+        if self.is_async:
+            import asyncio
+
+            loop = asyncio.new_event_loop()
+            try:
+                model_result = loop.run_until_complete(model_result)
+            finally:
+                loop.close()
+
         self.validate_run(model_result)
 
         return model_result
 
+    @property
+    def run_batch(self):
+        """
+        Run the model for a block of parameter sets at once, and return the
+        time and the model result for each parameter set.
+
+        This method is optional. If it is implemented or set to a function,
+        it is used instead of ``run`` to evaluate blocks of parameter sets,
+        which is much faster for models that can be vectorized (for example
+        models implemented with NumPy).
+
+        Parameters
+        ----------
+        **parameters : A number of named arguments (name=array).
+            The parameters of the model. Each parameter is a one dimensional
+            array with one value for each parameter set in the block.
+
+        Returns
+        -------
+        time : {None, numpy.nan, array_like}
+            Time values of the model, shared by all parameter sets.
+            If no time values returns None or numpy.nan.
+        values : array_like
+            Result of the model, where ``values[i]`` is the result for
+            parameter set ``i``.
+        info, optional
+            Any number of info objects, where ``info[i]`` is the info object
+            for parameter set ``i``.
+
+        Notes
+        -----
+        The result for each parameter set must follow the requirements of the
+        ``run`` method, and is postprocessed and used to calculate the features
+        in the same way as the result of ``run``. Since the time is shared by
+        all parameter sets, ``run_batch`` is only suitable for models that
+        return the same time values for all parameters.
+
+        If ``run_batch`` is None (the default), the model is evaluated one
+        parameter set at a time with ``run``.
+
+        See also
+        --------
+        uncertainpy.models.Model.run : Requirements for the model run function.
+        """
+        return self._run_batch
+
+
+    @run_batch.setter
+    def run_batch(self, new_run_batch):
+        if new_run_batch is not None and not callable(new_run_batch):
+            raise TypeError("run_batch function must be callable")
+
+        self._run_batch = new_run_batch
+
+
+    def evaluate_batch(self, **parameters):
+        """
+        Run the model for a block of parameter sets with ``run_batch`` and the
+        default model_kwargs options, validate the result, and split it into
+        one model result for each parameter set.
+
+        Parameters
+        ----------
+        **parameters : A number of named arguments (name=array).
+            The parameters of the model. Each parameter is a one dimensional
+            array with one value for each parameter set in the block.
+
+        Returns
+        -------
+        model_results : list
+            A list with one model result, ``(time, values, info, ...)``,
+            for each parameter set. Each model result is on the same form as
+            the result of ``evaluate``.
+
+        Raises
+        ------
+        ValueError
+            If ``run_batch`` does not return one result for each parameter set.
+
+        See also
+        --------
+        uncertainpy.models.Model.run_batch : Requirements for the model run_batch function.
+        """
+        self._ensure_setup()
+
+        nr_nodes = max([len(np.atleast_1d(value)) for value in parameters.values()] + [1])
+
+        all_parameters = self.model_kwargs.copy()
+        all_parameters.update(parameters)
+
+        model_result = self.run_batch(**all_parameters)
+
+        self.validate_run_batch(model_result, nr_nodes)
+
+        time, values = model_result[:2]
+        info = model_result[2:]
+
+        model_results = []
+        for i in range(nr_nodes):
+            model_results.append((time, values[i]) + tuple(item[i] for item in info))
+
+        return model_results
+
+    def setup(self):
+        """
+        Prepare the model for being run, for example by loading a simulator
+        and the model files.
+
+        No setup is performed by default. This method can be implemented in
+        subclasses to perform expensive initialization that is shared by all
+        model evaluations in a process, instead of repeating it in ``run``.
+
+        Notes
+        -----
+        ``setup`` is run once in each process that evaluates the model,
+        before the first model evaluation: once in each worker process when
+        the worker is started, and once in the current process the first
+        time the model is evaluated there. Each model evaluation must
+        still start from the same state, so ``run`` must reset the state of
+        the simulator that is changed by the previous evaluation.
+
+        See also
+        --------
+        uncertainpy.models.Model.teardown
+        """
+        pass
+
+
+    def teardown(self):
+        """
+        Release what was prepared by ``setup``.
+
+        No teardown is performed by default. This method can be implemented
+        in subclasses together with ``setup``. ``teardown`` is run when a
+        worker process exits, and when the RunModel evaluating the model in
+        the current process is closed.
+
+        See also
+        --------
+        uncertainpy.models.Model.setup
+        """
+        pass
+
+
+    def _ensure_setup(self):
+        """
+        Run ``setup`` if the model is not set up in the current process.
+        """
+        if self._is_setup:
+            return
+
+        with _setup_lock:
+            if not self._is_setup:
+                self.setup()
+                self._is_setup = True
+
+
+    def _ensure_teardown(self):
+        """
+        Run ``teardown`` if the model is set up in the current process.
+        """
+        with _setup_lock:
+            if self._is_setup:
+                self._is_setup = False
+                self.teardown()
+
+
     @property
     def postprocess(self, *model_result):
         """
@@ -422,6 +654,40 @@ class Model(object):
 
 
 
+    def validate_run_batch(self, model_result, nr_nodes):
+        """
+        Validate the results from ``run_batch``.
+
+        This method ensures ``run_batch`` returns `time`, `values`, and optional
+        info objects, with one result in `values` and each info object for each
+        parameter set.
+
+        Parameters
+        ----------
+        model_results
+            Any type of model results returned by ``run_batch``.
+        nr_nodes : int
+            The number of parameter sets ``run_batch`` was called with.
+
+        Raises
+        ------
+        ValueError
+            If the model result does not fit the requirements.
+        TypeError
+            If the model result does not fit the requirements.
+
+        See Also
+        --------
+        uncertainpy.models.Model.run_batch
+        """
+        self.validate_run(model_result)
+
+        for name, item in zip(["values"] + ["info"]*(len(model_result) - 2), model_result[1:]):
+            if len(item) != nr_nodes:
+                raise ValueError("model.run_batch() must return {} with one element for each "
+                                 "of the {} parameter sets, not {}".format(name, nr_nodes, len(item)))
+
+
     def validate_postprocess(self, postprocess_result):
         """
         Validate the results from ``postprocess``.
@@ -89,6 +89,11 @@ class NeuronModel(Model):
     Notes
     -----
     Measures the voltage in the section with name ``soma``.
+
+    The Neuron simulation file is loaded once in each process, by ``setup``,
+    and reused by every model evaluation in that process. Neuron
+    reinitializes the state of the simulation at the start of each
+    ``h.run()``, and the uncertain parameters are set before each run.
     """
     def __init__(self,
                  file="mosinit.hoc",
@@ -128,13 +133,60 @@ class NeuronModel(Model):
         if name:
             self.name = name
 
+        self.h = None
         self.time = None
         self.V = None
         self.rec_section = record_from
 
+        self._model_function = None
+
         setup_module_logger(class_instance=self, level=logger_level)
 
 
+    def __getstate__(self):
+        # Neuron objects can not be sent to other processes, and are loaded
+        # again by setup
+        state = super(NeuronModel, self).__getstate__()
+        state["h"] = None
+        state["time"] = None
+        state["_model_function"] = None
+
+        return state
+
+
+    def setup(self):
+        """
+        Load the Neuron simulation, either the ``.hoc`` file or the Python
+        function, once in the current process. Nothing is loaded if a custom
+        run function is used.
+
+        Raises
+        ------
+        ValueError
+            If the file is neither a ``.hoc`` nor a ``.py`` file.
+        """
+        if "_run" in vars(self):
+            return
+
+        if self.file.endswith(".hoc"):
+            self.h = self.load_neuron(self.path, self.file)
+
+        elif self.file.endswith(".py"):
+            self._model_function = self.load_python(self.path, self.file, self.name)
+
+        else:
+            raise ValueError("Unknown fileformat on file: {}".format(self.file))
+
+
+    def teardown(self):
+        """
+        Release the loaded Neuron simulation and the recordings.
+        """
+        self.h = None
+        self.time = None
+        self._model_function = None
+
+
 
     def load_neuron(self, path, file):
         """
@@ -349,8 +401,9 @@ class NeuronModel(Model):
 
     def run_neuron(self, **parameters):
         """
-        Load and run a Neuron simulation from a ``.hoc`` file and return the
-        model voltage in soma.
+        Run a Neuron simulation from a ``.hoc`` file and return the
+        model voltage in soma. The file is loaded by ``setup`` the first time
+        the model is run.
 
         Parameters
         ----------
@@ -383,8 +436,7 @@ class NeuronModel(Model):
         --------
         uncertainpy.models.Model.run : Requirements for the model run function.
         """
-
-        self.h = self.load_neuron(self.path, self.file)
+        self._ensure_setup()
 
         self.set_parameters(parameters)
 
@@ -402,9 +454,10 @@ class NeuronModel(Model):
 
     def run_python(self, **parameters):
         """
-        Load and run a Python function that contains a Neuron simulation and
+        Run a Python function that contains a Neuron simulation and
         return the model result. The Python neuron simulation is located in
-        a function in `path`/`file` and name `name`.
+        a function in `path`/`file` and name `name`, and is imported by
+        ``setup`` the first time the model is run.
 
         Parameters
         ----------
@@ -435,10 +488,9 @@ class NeuronModel(Model):
         --------
         uncertainpy.models.Model.run : Requirements for the model run function.
         """
+        self._ensure_setup()
 
-        model = self.load_python(self.path, self.file, self.name)
-
-        result = model(**parameters)
+        result = self._model_function(**parameters)
 
         result = list(result)
         # Update info dict if it exists.
@@ -5,6 +5,7 @@ import platform
 import numpy as np
 
 from .core.uncertainty_calculations import UncertaintyCalculations
+from .core.checkpoint import Checkpoint
 from .plotting.plot_uncertainty import PlotUncertainty
 from .utils.logger import get_logger, add_file_handler
 from .data import Data
@@ -57,6 +58,106 @@ class UncertaintyQuantification(ParameterBase):
         If "max", the maximum number of CPUs on the computer
         (multiprocess.cpu_count()) is used.
         Default is "max".
+    executor : {None, Executor}, optional
+        The executor used to evaluate the model and features, for example a
+        ``uncertainpy.core.ThreadExecutor`` or ``uncertainpy.core.MPIExecutor``.
+        If None, the model is evaluated in `CPUs` worker processes.
+        Default is None.
+    chunksize : {"auto", int}, optional
+        The number of model evaluations sent to a worker process at a time.
+        If "auto", the number of evaluations in each batch is adapted to the
+        measured time of each model evaluation, so cheap models are evaluated
+        in large batches while expensive models are evaluated one at a time.
+        Default is "auto".
+    cache : {None, str, EvaluationCache}, optional
+        A persistent cache of model evaluations, so model parameters that
+        already are evaluated for the same model and features are not
+        evaluated again, for example when the polynomial order or method is
+        changed. If a string, it is the name of the folder where the cache is
+        stored. If None, no cache is used.
+        Default is None.
+    timeout : {None, float}, optional
+        The maximum wall time in seconds of each model evaluation when running
+        in parallel. Evaluations that take longer are stopped, their result
+        is set to numpy.nan, and they are counted as failed evaluations (see
+        `error_budget`). If None, there is no time limit.
+        Default is None.
+    retries : int, optional
+        The number of times an evaluation that times out is tried again before
+        the result is set to numpy.nan.
+        Default is 0.
+    max_tasks_per_worker : {None, int}, optional
+        The number of batches of model evaluations each worker process
+        performs before it is replaced by a new worker process. Useful for
+        models that leak memory. If None, the worker processes are not
+        replaced.
+        Default is None.
+    max_concurrent : int, optional
+        The maximum number of model evaluations running at the same time for
+        models with a coroutine run function (``async def run``).
+        Default is 32.
+    feature_workers : {None, int}, optional
+        The number of worker processes that calculate the features for models
+        with a coroutine run function. If None, the features are calculated
+        in the event loop thread.
+        Default is None.
+    result_store : {None, str}, optional
+        Name of a folder where the results of the model evaluations are
+        streamed to disk as they are completed, and read back in chunks,
+        instead of being held in memory until every evaluation is finished.
+        If None, the results are held in memory.
+        Default is None.
+    result_chunk_size : int, optional
+        The number of results in each chunk of the `result_store`.
+        Default is 100.
+    time_grid : {None, "pilot", array_like, dict}, optional
+        A fixed time grid the model and features that are interpolated are
+        resampled onto by the workers. Either a single time array used for
+        the model and every interpolated feature, a dictionary
+        ``{"model/feature name": time array}``, or "pilot" to use the time
+        arrays of a pilot evaluation of the first node. If None, the results
+        are interpolated onto the longest time array after all model
+        evaluations are completed.
+        Default is None.
+    shared_buffers : bool, optional
+        If True, the workers write the values of regular model and feature
+        results directly into memory-mapped arrays shared with the current
+        process, instead of sending them back with the results. Requires
+        that the workers run on the same computer.
+        Default is False.
+    timings : bool, optional
+        If True, a summary of the wall and CPU time used by each stage of
+        the model evaluations and of the calculation of the statistical
+        metrics is stored in ``data.timings``, and saved with the data.
+        Default is False.
+    schedule : {"fifo", "longest_first"}, optional
+        The order the nodes are sent to the executor. If "longest_first",
+        the nodes predicted to have the longest run time, from the run times
+        of the completed evaluations, are evaluated first.
+        Default is "fifo".
+    error_budget : {None, int, float}, optional
+        The number (int) or fraction of the nodes (float) of model
+        evaluations that are allowed to fail. Failed evaluations within the
+        budget are set to numpy.nan, and their tracebacks are stored in
+        ``data.failed_evaluations``. Beyond the budget, the evaluations are
+        stopped and the completed evaluations are saved in a checkpoint.
+        If None, the first failed evaluation raises its exception.
+        Default is None.
+    worker_threads : {"auto", None, int}, optional
+        The number of OpenMP and BLAS threads used by each model evaluation
+        running at the same time. If "auto", the CPUs are divided between the
+        workers. If None, the number of threads is not limited.
+        Default is "auto".
+    pin_workers : {False, "core", "numa"}, optional
+        Pin each worker process to a distinct core or NUMA node.
+        Default is False.
+    expansion_cache : {None, str, ExpansionCache}, optional
+        A persistent cache of the orthogonal polynomials and quadrature rules
+        used by polynomial chaos, so they are loaded instead of recalculated
+        when the same distribution and polynomial order are used again. If a
+        string, it is the name of the folder where the cache is stored. If
+        None, no cache is used.
+        Default is None.
     logger_level : {"info", "debug", "warning", "error", "critical", None}, optional
         Set the threshold for the logging level. Logging messages less severe
         than this level is ignored. If None, no logging to file is performed
@@ -110,6 +211,24 @@ class UncertaintyQuantification(ParameterBase):
                  create_PCE_custom=None,
                  custom_uncertainty_quantification=None,
                  CPUs="max",
+                 executor=None,
+                 chunksize="auto",
+                 cache=None,
+                 timeout=None,
+                 retries=0,
+                 max_tasks_per_worker=None,
+                 max_concurrent=32,
+                 feature_workers=None,
+                 result_store=None,
+                 result_chunk_size=100,
+                 time_grid=None,
+                 shared_buffers=False,
+                 timings=False,
+                 schedule="fifo",
+                 error_budget=None,
+                 worker_threads="auto",
+                 pin_workers=False,
+                 expansion_cache=None,
                  logger_level="info",
                  logger_filename="uncertainpy.log",
                  backend="auto"):
@@ -134,6 +253,24 @@ class UncertaintyQuantification(ParameterBase):
                 create_PCE_custom=create_PCE_custom,
                 custom_uncertainty_quantification=custom_uncertainty_quantification,
                 CPUs=CPUs,
+                executor=executor,
+                chunksize=chunksize,
+                cache=cache,
+                timeout=timeout,
+                retries=retries,
+                max_tasks_per_worker=max_tasks_per_worker,
+                max_concurrent=max_concurrent,
+                feature_workers=feature_workers,
+                result_store=result_store,
+                result_chunk_size=result_chunk_size,
+                time_grid=time_grid,
+                shared_buffers=shared_buffers,
+                timings=timings,
+                schedule=schedule,
+                error_budget=error_budget,
+                worker_threads=worker_threads,
+                pin_workers=pin_workers,
+                expansion_cache=expansion_cache,
                 logger_level=logger_level,
             )
         else:
@@ -208,6 +345,30 @@ class UncertaintyQuantification(ParameterBase):
         self.uncertainty_calculations.model = self.model
 
 
+    def close(self):
+        """
+        Close the pool of worker processes used to evaluate the model.
+
+        The pool is started the first time the model is evaluated in parallel,
+        and is reused by every later uncertainty quantification performed with
+        this object, for example when running ``quantify`` for several sets of
+        parameters after each other.
+
+        See also
+        --------
+        uncertainpy.core.RunModel.close
+        """
+        self.uncertainty_calculations.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
     # TODO add features_to_run as argument to this function
     def quantify(self,
                  method="pc",
@@ -228,6 +389,10 @@ class UncertaintyQuantification(ParameterBase):
                  save=True,
                  data_folder="data",
                  filename=None,
+                 checkpoint=False,
+                 timing_report=False,
+                 tolerance=10**-3,
+                 max_evaluations=None,
                  **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -241,10 +406,12 @@ class UncertaintyQuantification(ParameterBase):
             "pc" is polynomial chaos method, "mc" is the quasi-Monte Carlo
             method and "custom" are custom uncertainty quantification methods.
             Default is "pc".
-        pc_method : {"collocation", "spectral", "custom"}, optional
+        pc_method : {"collocation", "spectral", "adaptive", "custom"}, optional
             The method to use when creating the polynomial chaos approximation,
             if the polynomial chaos method is chosen. "collocation" is the
             point collocation method "spectral" is pseudo-spectral projection,
+            "adaptive" is point collocation where the polynomial order is
+            increased until the leave-one-out error is below `tolerance`,
             and "custom" is the custom polynomial method.
             Default is "collocation".
         rosenblatt : {"auto", bool}, optional
@@ -258,7 +425,8 @@ class UncertaintyQuantification(ParameterBase):
             quantification. If None, all uncertain parameters are used.
             Default is None.
         polynomial_order : int, optional
-            The polynomial order of the polynomial approximation.
+            The polynomial order of the polynomial approximation, or the
+            highest polynomial order if the adaptive method is used.
             Default is 4.
         nr_collocation_nodes : {int, None}, optional
             The number of collocation nodes to choose, if polynomial chaos with
@@ -315,6 +483,30 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        checkpoint : bool, optional
+            If the result of each model evaluation should be stored in a
+            checkpoint file (``filename.checkpoint`` in `data_folder`) as soon
+            as it is completed. If the uncertainty quantification is
+            interrupted, running it again with the same nodes (for example
+            by using the same `seed`) skips the model evaluations that already
+            are completed. The checkpoint file is removed when the uncertainty
+            quantification is finished.
+            Default is False.
+        timing_report : bool, optional
+            If a table of the wall and CPU time used by each stage of the
+            uncertainty quantification (the model evaluation, postprocessing,
+            each feature, the interpolation and the calculation of the
+            statistical metrics) should be printed when the uncertainty
+            quantification is finished. Turns on `timings` for this
+            uncertainty quantification. Default is False.
+        tolerance : float, optional
+            The leave-one-out error, relative to the variance, where the
+            polynomial order is no longer increased, if polynomial chaos with
+            the adaptive method is used. Default is 10**-3.
+        max_evaluations : {None, int}, optional
+            The maximum number of model evaluations, if polynomial chaos with
+            the adaptive method is used. If None, the number of evaluations is
+            only limited by `polynomial_order`. Default is None.
         **custom_kwargs
             Any number of arguments for either the custom polynomial chaos method,
             ``create_PCE_custom``, or the custom uncertainty quantification,
@@ -392,79 +584,114 @@ class UncertaintyQuantification(ParameterBase):
         """
         uncertain_parameters = self.uncertainty_calculations.convert_uncertain_parameters(uncertain_parameters)
 
-        if method.lower() == "pc":
-            if single:
-                data = self.polynomial_chaos_single(uncertain_parameters=uncertain_parameters,
-                                                    method=pc_method,
-                                                    rosenblatt=rosenblatt,
-                                                    polynomial_order=polynomial_order,
-                                                    nr_collocation_nodes=nr_collocation_nodes,
-                                                    quadrature_order=quadrature_order,
-                                                    nr_pc_mc_samples=nr_pc_mc_samples,
-                                                    allow_incomplete=allow_incomplete,
-                                                    seed=seed,
-                                                    plot=plot,
-                                                    figure_folder=figure_folder,
-                                                    figureformat=figureformat,
-                                                    save=save,
-                                                    data_folder=data_folder,
-                                                    filename=filename,
-                                                    **custom_kwargs)
+        # A checkpoint set on the RunModel is only replaced while the
+        # uncertainty quantification runs with checkpoint=True
+        previous_checkpoint = self.uncertainty_calculations.runmodel.checkpoint
+
+        checkpoint_file = None
+        if checkpoint:
+            name = self.model.name if filename is None else os.path.splitext(filename)[0]
+            checkpoint_file = os.path.join(data_folder, name + ".checkpoint")
+
+            self.uncertainty_calculations.runmodel.checkpoint = checkpoint_file
+
+        timings = self.uncertainty_calculations.runmodel.timings
+        if timing_report:
+            self.uncertainty_calculations.runmodel.timings = True
+
+        try:
+            if method.lower() == "pc":
+                if single:
+                    data = self.polynomial_chaos_single(uncertain_parameters=uncertain_parameters,
+                                                        method=pc_method,
+                                                        rosenblatt=rosenblatt,
+                                                        polynomial_order=polynomial_order,
+                                                        nr_collocation_nodes=nr_collocation_nodes,
+                                                        quadrature_order=quadrature_order,
+                                                        nr_pc_mc_samples=nr_pc_mc_samples,
+                                                        allow_incomplete=allow_incomplete,
+                                                        seed=seed,
+                                                        tolerance=tolerance,
+                                                        max_evaluations=max_evaluations,
+                                                        plot=plot,
+                                                        figure_folder=figure_folder,
+                                                        figureformat=figureformat,
+                                                        save=save,
+                                                        data_folder=data_folder,
+                                                        filename=filename,
+                                                        **custom_kwargs)
+
+                else:
+                    data = self.polynomial_chaos(uncertain_parameters=uncertain_parameters,
+                                                 method=pc_method,
+                                                 rosenblatt=rosenblatt,
+                                                 polynomial_order=polynomial_order,
+                                                 nr_collocation_nodes=nr_collocation_nodes,
+                                                 quadrature_order=quadrature_order,
+                                                 nr_pc_mc_samples=nr_pc_mc_samples,
+                                                 allow_incomplete=allow_incomplete,
+                                                 seed=seed,
+                                                 tolerance=tolerance,
+                                                 max_evaluations=max_evaluations,
+                                                 plot=plot,
+                                                 figure_folder=figure_folder,
+                                                 figureformat=figureformat,
+                                                 save=save,
+                                                 data_folder=data_folder,
+                                                 filename=filename,
+                                                 **custom_kwargs)
+
+            elif method.lower() == "mc":
+                if single:
+                    data = self.monte_carlo_single(uncertain_parameters=uncertain_parameters,
+                                                   nr_samples=nr_mc_samples,
+                                                   plot=plot,
+                                                   figure_folder=figure_folder,
+                                                   figureformat=figureformat,
+                                                   save=save,
+                                                   data_folder=data_folder,
+                                                   filename=filename,
+                                                   seed=seed)
+
+
+                else:
+                    data = self.monte_carlo(uncertain_parameters=uncertain_parameters,
+                                            nr_samples=nr_mc_samples,
+                                            plot=plot,
+                                            figure_folder=figure_folder,
+                                            figureformat=figureformat,
+                                            save=save,
+                                            data_folder=data_folder,
+                                            filename=filename,
+                                            seed=seed)
+
+
+            elif method.lower() == "custom":
+                data = self.custom_uncertainty_quantification(plot=plot,
+                                                              figure_folder=figure_folder,
+                                                              figureformat=figureformat,
+                                                              save=save,
+                                                              data_folder=data_folder,
+                                                              filename=filename,
+                                                              **custom_kwargs)
 
             else:
-                data = self.polynomial_chaos(uncertain_parameters=uncertain_parameters,
-                                             method=pc_method,
-                                             rosenblatt=rosenblatt,
-                                             polynomial_order=polynomial_order,
-                                             nr_collocation_nodes=nr_collocation_nodes,
-                                             quadrature_order=quadrature_order,
-                                             nr_pc_mc_samples=nr_pc_mc_samples,
-                                             allow_incomplete=allow_incomplete,
-                                             seed=seed,
-                                             plot=plot,
-                                             figure_folder=figure_folder,
-                                             figureformat=figureformat,
-                                             save=save,
-                                             data_folder=data_folder,
-                                             filename=filename,
-                                             **custom_kwargs)
-
-        elif method.lower() == "mc":
-            if single:
-                data = self.monte_carlo_single(uncertain_parameters=uncertain_parameters,
-                                               nr_samples=nr_mc_samples,
-                                               plot=plot,
-                                               figure_folder=figure_folder,
-                                               figureformat=figureformat,
-                                               save=save,
-                                               data_folder=data_folder,
-                                               filename=filename,
-                                               seed=seed)
+                raise ValueError("No method with name {}".format(method))
 
+        finally:
+            self.uncertainty_calculations.runmodel.timings = timings
+            self.uncertainty_calculations.runmodel.checkpoint = previous_checkpoint
 
-            else:
-                data = self.monte_carlo(uncertain_parameters=uncertain_parameters,
-                                        nr_samples=nr_mc_samples,
-                                        plot=plot,
-                                        figure_folder=figure_folder,
-                                        figureformat=figureformat,
-                                        save=save,
-                                        data_folder=data_folder,
-                                        filename=filename,
-                                        seed=seed)
-
-
-        elif method.lower() == "custom":
-            data = self.custom_uncertainty_quantification(plot=plot,
-                                                          figure_folder=figure_folder,
-                                                          figureformat=figureformat,
-                                                          save=save,
-                                                          data_folder=data_folder,
-                                                          filename=filename,
-                                                          **custom_kwargs)
+        if checkpoint_file is not None:
+            Checkpoint(checkpoint_file, logger_level=self._logger_level).remove()
 
-        else:
-            raise ValueError("No method with name {}".format(method))
+        if timing_report:
+            if isinstance(data, Data):
+                print(data.timing_report())
+            else:
+                for uncertain_parameter in data:
+                    print("Timings for {}:".format(uncertain_parameter))
+                    print(data[uncertain_parameter].timing_report())
 
         return data
 
@@ -567,6 +794,8 @@ class UncertaintyQuantification(ParameterBase):
                          save=True,
                          data_folder="data",
                          filename=None,
+                         tolerance=10**-3,
+                         max_evaluations=None,
                          **custom_kwargs):
         """
         Perform an uncertainty quantification and sensitivity analysis
@@ -574,10 +803,12 @@ class UncertaintyQuantification(ParameterBase):
 
         Parameters
         ----------
-        method : {"collocation", "spectral", "custom"}, optional
+        method : {"collocation", "spectral", "adaptive", "custom"}, optional
             The method to use when creating the polynomial chaos approximation,
             if the polynomial chaos method is chosen. "collocation" is the
             point collocation method "spectral" is pseudo-spectral projection,
+            "adaptive" is point collocation where the polynomial order is
+            increased until the leave-one-out error is below `tolerance`,
             and "custom" is the custom polynomial method.
             Default is "collocation".
         rosenblatt : {"auto", bool}, optional
@@ -591,7 +822,8 @@ class UncertaintyQuantification(ParameterBase):
             quantification. If None, all uncertain parameters are used.
             Default is None.
         polynomial_order : int, optional
-            The polynomial order of the polynomial approximation.
+            The polynomial order of the polynomial approximation, or the
+            highest polynomial order if the adaptive method is used.
             Default is 4.
         nr_collocation_nodes : {int, None}, optional
             The number of collocation nodes to choose, if polynomial chaos with
@@ -638,6 +870,14 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        tolerance : float, optional
+            The leave-one-out error, relative to the variance, where the
+            polynomial order is no longer increased, if polynomial chaos with
+            the adaptive method is used. Default is 10**-3.
+        max_evaluations : {None, int}, optional
+            The maximum number of model evaluations, if polynomial chaos with
+            the adaptive method is used. If None, the number of evaluations is
+            only limited by `polynomial_order`. Default is None.
         **custom_kwargs
             Any number of arguments for the custom polynomial chaos method,
             ``create_PCE_custom``.
@@ -709,6 +949,8 @@ class UncertaintyQuantification(ParameterBase):
             nr_pc_mc_samples=nr_pc_mc_samples,
             allow_incomplete=allow_incomplete,
             seed=seed,
+            tolerance=tolerance,
+            max_evaluations=max_evaluations,
             **custom_kwargs
             )
 
@@ -864,17 +1106,21 @@ class UncertaintyQuantification(ParameterBase):
                                 figureformat=".png",
                                 save=True,
                                 data_folder="data",
-                                filename=None):
+                                filename=None,
+                                tolerance=10**-3,
+                                max_evaluations=None):
         """
         Perform an uncertainty quantification and sensitivity analysis for a
         single parameter at the time using polynomial chaos expansions.
 
         Parameters
         ----------
-        method : {"collocation", "spectral", "custom"}, optional
+        method : {"collocation", "spectral", "adaptive", "custom"}, optional
             The method to use when creating the polynomial chaos approximation,
             if the polynomial chaos method is chosen. "collocation" is the
             point collocation method "spectral" is pseudo-spectral projection,
+            "adaptive" is point collocation where the polynomial order is
+            increased until the leave-one-out error is below `tolerance`,
             and "custom" is the custom polynomial method.
             Default is "collocation".
         rosenblatt : {"auto", bool}, optional
@@ -888,7 +1134,8 @@ class UncertaintyQuantification(ParameterBase):
             quantification for. If None, all uncertain parameters are used.
             Default is None.
         polynomial_order : int, optional
-            The polynomial order of the polynomial approximation.
+            The polynomial order of the polynomial approximation, or the
+            highest polynomial order if the adaptive method is used.
             Default is 4.
         nr_collocation_nodes : {int, None}, optional
             The number of collocation nodes to choose, if polynomial chaos with
@@ -935,6 +1182,14 @@ class UncertaintyQuantification(ParameterBase):
         filename : {None, str}, optional
             Name of the data file. If None the model name is used.
             Default is None.
+        tolerance : float, optional
+            The leave-one-out error, relative to the variance, where the
+            polynomial order is no longer increased, if polynomial chaos with
+            the adaptive method is used. Default is 10**-3.
+        max_evaluations : {None, int}, optional
+            The maximum number of model evaluations, if polynomial chaos with
+            the adaptive method is used. If None, the number of evaluations is
+            only limited by `polynomial_order`. Default is None.
         **custom_kwargs
             Any number of arguments for the custom polynomial chaos method,
             ``create_PCE_custom``.
@@ -1017,6 +1272,8 @@ class UncertaintyQuantification(ParameterBase):
                 quadrature_order=quadrature_order,
                 nr_pc_mc_samples=nr_pc_mc_samples,
                 allow_incomplete=allow_incomplete,
+                tolerance=tolerance,
+                max_evaluations=max_evaluations
             )
 
             data.backend = self.backend
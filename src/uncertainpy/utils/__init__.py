@@ -7,10 +7,13 @@ Small utility functions for various purposes.
 __all__ = ["lengths", "none_to_nan", "contains_nan", "is_regular",
             "MyFormatter", "TqdmLoggingHandler", "MultiprocessLoggingHandler",
             "setup_module_logger", "setup_logger",
-           "has_handlers", "add_file_handler", "add_screen_handler"]
+           "has_handlers", "add_file_handler", "add_screen_handler", "Timer",
+           "limit_threads", "restore_threads", "thread_limits", "pin_process"]
 
 from .logger import setup_module_logger, setup_logger
 from .logger import has_handlers, add_file_handler, add_screen_handler
 from .logger import MyFormatter, TqdmLoggingHandler, MultiprocessLoggingHandler
 from .utility import lengths, none_to_nan, contains_nan
 from .utility import is_regular, set_nan
+from .timer import Timer
+from .threads import limit_threads, restore_threads, thread_limits, pin_process
@@ -0,0 +1,202 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import glob
+import contextlib
+
+
+# Environment variables read by OpenMP and the BLAS libraries used by numpy
+# and scipy when they start their thread pools
+thread_variables = ["OMP_NUM_THREADS",
+                    "OPENBLAS_NUM_THREADS",
+                    "MKL_NUM_THREADS",
+                    "VECLIB_MAXIMUM_THREADS",
+                    "NUMEXPR_NUM_THREADS"]
+
+
+def limit_threads(nr_threads):
+    """
+    Limit the number of threads used by OpenMP and the BLAS libraries
+    (OpenBLAS, MKL, ...) in the current process.
+
+    The thread environment variables are set, which limits libraries that are
+    loaded later and child processes. If threadpoolctl is installed, the
+    thread pools of the libraries that already are loaded are limited as well.
+
+    Parameters
+    ----------
+    nr_threads : int
+        The maximum number of threads.
+
+    Returns
+    -------
+    state : tuple
+        The previous thread limits, used by ``restore_threads``.
+
+    Notes
+    -----
+    Without threadpoolctl, the limits only affect libraries that are loaded
+    after the limits are set. Numpy is normally already loaded, so
+    threadpoolctl is required to limit the BLAS threads of numpy and scipy.
+    """
+    environment = {name: os.environ.get(name) for name in thread_variables}
+
+    for name in thread_variables:
+        os.environ[name] = str(nr_threads)
+
+    try:
+        from threadpoolctl import threadpool_limits
+
+        controller = threadpool_limits(limits=nr_threads)
+    except ImportError:
+        controller = None
+
+    return environment, controller
+
+
+def restore_threads(state):
+    """
+    Restore the thread limits that were replaced by ``limit_threads``.
+
+    Parameters
+    ----------
+    state : tuple
+        The previous thread limits, as returned by ``limit_threads``.
+    """
+    environment, controller = state
+
+    for name, value in environment.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+    if controller is not None:
+        controller.restore_original_limits()
+
+
+@contextlib.contextmanager
+def thread_limits(nr_threads):
+    """
+    Limit the number of threads used by OpenMP and the BLAS libraries inside
+    a with statement, see ``limit_threads``.
+
+    Parameters
+    ----------
+    nr_threads : {None, int}
+        The maximum number of threads. If None, the threads are not limited.
+    """
+    if nr_threads is None:
+        yield
+        return
+
+    state = limit_threads(nr_threads)
+    try:
+        yield
+    finally:
+        restore_threads(state)
+
+
+def cpu_sets(pin="core"):
+    """
+    The sets of CPUs the current process can run on, grouped by core or by
+    NUMA node.
+
+    Parameters
+    ----------
+    pin : {"core", "numa"}, optional
+        If "core", each set contains a single CPU. If "numa", each set
+        contains the CPUs of a NUMA node. Default is "core".
+
+    Returns
+    -------
+    cpu_sets : list
+        A list of sets of CPU numbers. If the NUMA nodes are unknown, a
+        single set with every CPU is returned for "numa".
+
+    Raises
+    ------
+    ValueError
+        If `pin` is not "core" or "numa".
+    """
+    if hasattr(os, "sched_getaffinity"):
+        available = os.sched_getaffinity(0)
+    else:
+        import multiprocess
+
+        available = set(range(multiprocess.cpu_count()))
+
+    if pin == "core":
+        return [set([cpu]) for cpu in sorted(available)]
+
+    if pin != "numa":
+        raise ValueError("pin must be 'core' or 'numa', not {}".format(pin))
+
+    nodes = []
+    for filename in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        with open(filename) as cpulist:
+            cpus = parse_cpulist(cpulist.read()) & available
+
+        if cpus:
+            nodes.append(cpus)
+
+    return nodes if nodes else [set(available)]
+
+
+def parse_cpulist(cpulist):
+    """
+    Parse a Linux CPU list, such as ``"0-3,8,10-11"``.
+
+    Parameters
+    ----------
+    cpulist : str
+        The CPU list.
+
+    Returns
+    -------
+    cpus : set
+        The CPU numbers in the list.
+    """
+    cpus = set()
+    for part in cpulist.strip().split(","):
+        if not part:
+            continue
+
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+
+    return cpus
+
+
+def pin_process(worker_number, pin="core"):
+    """
+    Pin the current process to one of the CPU sets returned by
+    ``cpu_sets``, so the workers run on distinct cores or NUMA nodes.
+
+    Parameters
+    ----------
+    worker_number : int
+        The number of the worker. Worker ``i`` is pinned to CPU set
+        ``i % len(cpu_sets(pin))``.
+    pin : {"core", "numa"}, optional
+        Pin the process to a single core or to a NUMA node.
+        Default is "core".
+
+    Returns
+    -------
+    cpus : {None, set}
+        The CPUs the process is pinned to, or None if pinning is not
+        supported on the platform.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+
+    sets = cpu_sets(pin)
+    cpus = sets[worker_number % len(sets)]
+
+    os.sched_setaffinity(0, cpus)
+
+    return cpus
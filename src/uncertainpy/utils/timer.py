@@ -0,0 +1,128 @@
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import time
+import contextlib
+
+import numpy as np
+
+try:
+    process_time = time.process_time
+except AttributeError:
+    process_time = time.clock
+
+
+class Timer(object):
+    """
+    Record the wall time and CPU time used by each stage of the uncertainty
+    quantification, such as the model evaluation, postprocessing and each
+    feature.
+
+    Each time a stage is timed, a sample ``(wall time, CPU time)`` is added to
+    the stage, so a stage timed once for every node has one sample per node.
+
+    Attributes
+    ----------
+    samples : dict
+        A dictionary with a list of ``(wall time, CPU time)`` samples in
+        seconds for each stage.
+
+    Notes
+    -----
+    The CPU time is the CPU time of the process the stage runs in. When
+    stages run in several threads of the same process at the same time, the
+    CPU time of a stage includes the CPU time of the other threads.
+
+    Examples
+    --------
+    ::
+
+        timer = Timer()
+        with timer.stage("evaluate"):
+            model.run(**parameters)
+
+        timer.summary()["evaluate"]["wall_mean"]
+    """
+    def __init__(self):
+        self.samples = {}
+
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time the code run inside the with statement as a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        """
+        wall_start = time.time()
+        cpu_start = process_time()
+
+        try:
+            yield
+        finally:
+            self.add(name, time.time() - wall_start, process_time() - cpu_start)
+
+
+    def add(self, name, wall, cpu):
+        """
+        Add a sample to a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        wall : float
+            The wall time in seconds.
+        cpu : float
+            The CPU time in seconds.
+        """
+        self.samples.setdefault(name, []).append((wall, cpu))
+
+
+    def merge(self, timer):
+        """
+        Add the samples of another timer, for example a timer from a worker
+        process, to this timer.
+
+        Parameters
+        ----------
+        timer : Timer
+            The timer with the samples to add.
+        """
+        for name in timer.samples:
+            self.samples.setdefault(name, []).extend(timer.samples[name])
+
+
+    def clear(self):
+        """
+        Remove all samples.
+        """
+        self.samples = {}
+
+
+    def summary(self):
+        """
+        Summary statistics of the samples of each stage.
+
+        Returns
+        -------
+        summary : dict
+            A dictionary with the statistics of each stage, on the form
+            ``{"count": int, "wall_total": float, "wall_mean": float,
+            "wall_max": float, "cpu_total": float, "cpu_mean": float}``,
+            with times in seconds.
+        """
+        summary = {}
+        for name in self.samples:
+            wall, cpu = np.array(self.samples[name], dtype=float).T
+
+            summary[name] = {"count": len(wall),
+                             "wall_total": float(np.sum(wall)),
+                             "wall_mean": float(np.mean(wall)),
+                             "wall_max": float(np.max(wall)),
+                             "cpu_total": float(np.sum(cpu)),
+                             "cpu_mean": float(np.mean(cpu))}
+
+        return summary
@@ -81,20 +81,24 @@ testing_base = [TestBase, TestParameterBase]
 testing_data = [TestData, TestDataFeature]
 
 testing_utils = [TestLogger, TestNoneToNan, TestLengths, TestContainsNoneOrNan,
-                 TestIsRegular, TestSetNan]
+                 TestIsRegular, TestSetNan, TestTimer, TestThreads]
 
 # TODO: several tests crashes when several tests with Xvfb is run one after another
 testing_models = [TestTestingModel0d, TestTestingModel1d, TestTestingModel2d,
                   TestModel, TestHodgkinHuxleyModel, TestCoffeeCupModel,
                   TestIzhikevichModel, TestNestModel, TestNeuronModel,
-                  TestRunModel, TestParallel]
+                  TestExternalProcessModel,
+                  TestRunModel, TestParallel, TestCheckpoint,
+                  TestEvaluationCache, TestExpansionCache, TestExecutor, TestResultStore,
+                  TestResultBuffers, TestRuntimePredictor]
 
 testing_parameters = [TestParameter, TestParameters]
 
 testing_exact = testing_spikes + [TestUncertainty, TestPlotUncertainpy]
 
 testing_all = testing_parameters + testing_models + testing_base\
-              + testing_features + testing_data + [TestUncertaintyCalculations, TestDistribution]\
+              + testing_features + testing_data + [TestUncertaintyCalculations, TestDistribution,
+                                                    TestPolynomialRegression, TestPolynomialExpansion]\
               + testing_utils
 
 testing_complete = testing_all + [TestExamples]
@@ -265,6 +269,51 @@ def run_model():
     run(TestRunModel)
 
 
+@cli.command()
+def checkpoint():
+    run(TestCheckpoint)
+
+
+@cli.command()
+def evaluation_cache():
+    run(TestEvaluationCache)
+
+
+@cli.command()
+def expansion_cache():
+    run(TestExpansionCache)
+
+
+@cli.command()
+def executors():
+    run(TestExecutor)
+
+
+@cli.command()
+def result_store():
+    run(TestResultStore)
+
+
+@cli.command()
+def result_buffers():
+    run(TestResultBuffers)
+
+
+@cli.command()
+def runtime_predictor():
+    run(TestRuntimePredictor)
+
+
+@cli.command()
+def polynomial_regression():
+    run(TestPolynomialRegression)
+
+
+@cli.command()
+def polynomial_expansion():
+    run(TestPolynomialExpansion)
+
+
 @cli.command()
 def model():
     run(TestModel)
@@ -279,6 +328,11 @@ def neuron_model():
     run(TestNeuronModel)
 
 
+@cli.command()
+def external_process_model():
+    run(TestExternalProcessModel)
+
+
 @cli.command()
 def models():
     run(testing_models)
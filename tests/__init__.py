@@ -6,7 +6,7 @@ from .test_logger import TestLogger
 
 from .test_models import TestModel, TestHodgkinHuxleyModel, TestCoffeeCupModel, TestNestModel
 from .test_models import TestIzhikevichModel, TestTestingModel0d, TestTestingModel1d
-from .test_models import TestTestingModel2d, TestNeuronModel
+from .test_models import TestTestingModel2d, TestNeuronModel, TestExternalProcessModel
 
 from .test_parameters import TestParameter, TestParameters
 from .test_plot_uncertainty import TestPlotUncertainpy
@@ -17,7 +17,16 @@ from .test_data import TestData, TestDataFeature
 from .test_run_model import TestRunModel
 from .test_uncertainty_calculations import TestUncertaintyCalculations
 from .test_parallel import TestParallel
+from .test_checkpoint import TestCheckpoint
+from .test_evaluation_cache import TestEvaluationCache
+from .test_expansion_cache import TestExpansionCache
+from .test_executors import TestExecutor
+from .test_result_store import TestResultStore
+from .test_result_buffers import TestResultBuffers
+from .test_runtime_predictor import TestRuntimePredictor
+from .test_polynomial_regression import TestPolynomialRegression
+from .test_polynomial_expansion import TestPolynomialExpansion
 from .test_examples import TestExamples
 from .test_base import TestBase, TestParameterBase
 from .test_utility import TestLengths, TestNoneToNan, TestContainsNoneOrNan
-from .test_utility import TestIsRegular, TestSetNan
\ No newline at end of file
+from .test_utility import TestIsRegular, TestSetNan, TestTimer, TestThreads
\ No newline at end of file
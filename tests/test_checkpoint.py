@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from uncertainpy.core import Checkpoint
+
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.filename = os.path.join(self.output_test_dir, "TestingModel1d.checkpoint")
+        self.checkpoint = Checkpoint(self.filename, logger_level="error")
+
+        self.result = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                          "time": np.arange(0, 10)}}
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        self.assertEqual(self.checkpoint.filename, self.filename)
+
+
+    def test_key(self):
+        key = Checkpoint.key({"b": np.float64(1), "a": 0})
+
+        self.assertEqual(key, (("a", 0.0), ("b", 1.0)))
+        self.assertEqual(key, Checkpoint.key({"a": 0.0, "b": 1.0}))
+
+
+    def test_load_no_file(self):
+        self.assertEqual(self.checkpoint.load(), {})
+
+
+    def test_append_load(self):
+        self.checkpoint.append({"a": 0, "b": 1}, self.result)
+        self.checkpoint.append({"a": 1, "b": 2}, {"TestingModel1d": {"values": 2, "time": np.nan}})
+
+        results = self.checkpoint.load()
+
+        self.assertEqual(len(results), 2)
+
+        result = results[Checkpoint.key({"a": 0, "b": 1})]
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], np.arange(0, 10)))
+
+        result = results[Checkpoint.key({"a": 1, "b": 2})]
+        self.assertEqual(result["TestingModel1d"]["values"], 2)
+
+
+    def test_load_truncated(self):
+        self.checkpoint.append({"a": 0, "b": 1}, self.result)
+        size = os.path.getsize(self.filename)
+        self.checkpoint.append({"a": 1, "b": 2}, self.result)
+
+        with open(self.filename, "ab") as f:
+            f.truncate(os.path.getsize(self.filename) - 5)
+
+        results = self.checkpoint.load()
+
+        self.assertEqual(list(results.keys()), [Checkpoint.key({"a": 0, "b": 1})])
+        self.assertEqual(os.path.getsize(self.filename), size)
+
+        # New records are readable after the incomplete record is removed
+        self.checkpoint.append({"a": 2, "b": 3}, self.result)
+        self.assertEqual(len(self.checkpoint.load()), 2)
+
+
+    def test_remove(self):
+        self.checkpoint.append({"a": 0, "b": 1}, self.result)
+        self.checkpoint.remove()
+
+        self.assertFalse(os.path.isfile(self.filename))
+
+        # Removing a missing checkpoint does nothing
+        self.checkpoint.remove()
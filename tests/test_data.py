@@ -401,6 +401,8 @@ class TestData(unittest.TestCase):
         self.assertEqual(self.data.incomplete, [])
         self.assertEqual(self.data.method, "")
         self.assertEqual(self.data.seed, "")
+        self.assertEqual(self.data.timings, {})
+        self.assertEqual(self.data.failed_evaluations, [])
 
 
     def test_get_labels(self):
@@ -535,6 +537,61 @@ class TestData(unittest.TestCase):
 
 
 
+    def test_save_load_timings(self):
+        self.setup_mock_data(self.data)
+        self.data.timings = {"evaluate": {"count": 2,
+                                          "wall_total": 4.,
+                                          "wall_mean": 2.,
+                                          "wall_max": 3.,
+                                          "cpu_total": 2.,
+                                          "cpu_mean": 1.}}
+
+        filename = os.path.join(self.output_test_dir, "test_save_timings.h5")
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.timings, self.data.timings)
+
+
+    def test_save_load_failed_evaluations(self):
+        self.setup_mock_data(self.data)
+        self.data.failed_evaluations = [{"index": 3,
+                                         "parameters": {"a": 1.5, "b": 2},
+                                         "traceback": "Traceback:\nRuntimeError: model error"}]
+
+        filename = os.path.join(self.output_test_dir, "test_save_failed_evaluations.h5")
+        self.data.save(filename)
+
+        new_data = Data(filename, logger_level="error")
+
+        self.assertEqual(new_data.failed_evaluations, self.data.failed_evaluations)
+
+
+    def test_timing_report(self):
+        self.assertEqual(self.data.timing_report(), "No timings recorded")
+
+        self.data.timings = {"evaluate": {"count": 2,
+                                          "wall_total": 4.,
+                                          "wall_mean": 2.,
+                                          "wall_max": 3.,
+                                          "cpu_total": 2.,
+                                          "cpu_mean": 1.},
+                             "feature feature1d": {"count": 2,
+                                                   "wall_total": 8.,
+                                                   "wall_mean": 4.,
+                                                   "wall_max": 5.,
+                                                   "cpu_total": 8.,
+                                                   "cpu_mean": 4.}}
+
+        lines = self.data.timing_report().split("\n")
+
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("stage"))
+        self.assertTrue(lines[1].startswith("feature feature1d"))
+        self.assertTrue(lines[2].startswith("evaluate"))
+
+
     def test_clear(self):
         self.data.uncertain_parameters = -1
         self.data.model_name = -1
@@ -542,9 +599,13 @@ class TestData(unittest.TestCase):
         self.data.incomplete = -1
         self.data.method = -1
         self.data.seed = -1
+        self.data.timings = -1
+        self.data.failed_evaluations = -1
 
         self.data.clear()
 
+        self.assertEqual(self.data.failed_evaluations, [])
+
         self.assertEqual(self.data.model_name, "")
         self.assertEqual(self.data.data, {})
         self.assertEqual(self.data.uncertain_parameters, [])
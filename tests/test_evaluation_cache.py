@@ -0,0 +1,125 @@
+import unittest
+import os
+import shutil
+import time
+
+import numpy as np
+
+from uncertainpy.core import EvaluationCache
+
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.folder = os.path.join(self.output_test_dir, "cache")
+        self.cache = EvaluationCache(self.folder, logger_level="error")
+
+        self.result = {"TestingModel1d": {"values": np.arange(0, 10) + 1,
+                                          "time": np.arange(0, 10)}}
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        self.assertEqual(self.cache.folder, self.folder)
+        self.assertEqual(self.cache.max_size, 10**9)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 0)
+
+
+    def test_key(self):
+        key = EvaluationCache.key("model", {"a": 0, "b": np.float64(1)})
+
+        self.assertEqual(key, EvaluationCache.key("model", {"b": 1.0, "a": 0.0}))
+        self.assertNotEqual(key, EvaluationCache.key("other model", {"a": 0, "b": 1}))
+        self.assertNotEqual(key, EvaluationCache.key("model", {"a": 0, "b": 1 + 1e-15}))
+
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.misses, 1)
+
+
+    def test_set_get(self):
+        key = EvaluationCache.key("model", {"a": 0, "b": 1})
+        self.cache.set(key, self.result)
+
+        result = self.cache.get(key)
+
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], np.arange(0, 10)))
+        self.assertEqual(self.cache.hits, 1)
+
+        # The cache is persistent
+        cache = EvaluationCache(self.folder, logger_level="error")
+        self.assertIsNotNone(cache.get(key))
+
+
+    def test_evict(self):
+        for i in range(3):
+            self.cache.set(str(i), self.result)
+            os.utime(self.cache.filename(str(i)), (time.time() + i, time.time() + i))
+
+        # Using an evaluation makes it the most recently used
+        os.utime(self.cache.filename("0"), (time.time() + 10, time.time() + 10))
+
+        size = os.path.getsize(self.cache.filename("0"))
+        self.cache.evict(2*size)
+
+        self.assertIsNotNone(self.cache.get("0"))
+        self.assertIsNone(self.cache.get("1"))
+        self.assertIsNotNone(self.cache.get("2"))
+
+
+    def test_max_size(self):
+        self.cache.set("0", self.result)
+        size = self.cache.size()
+
+        self.cache.max_size = size
+        self.cache.set("1", self.result)
+
+        self.assertEqual(self.cache.size(), size)
+
+
+    def test_set_size(self):
+        self.cache.set("0", self.result)
+        size = self.cache.size()
+
+        # The folder is only scanned to find the size the first time
+        entries = self.cache._entries
+        scans = []
+        def count_entries():
+            scans.append(1)
+            return entries()
+
+        self.cache._entries = count_entries
+
+        self.cache.set("1", self.result)
+        self.cache.set("1", self.result)
+
+        self.assertEqual(scans, [])
+        self.assertEqual(self.cache._size, 2*size)
+
+        # Eviction scans the folder and updates the size
+        self.cache.max_size = size
+        self.cache.set("2", self.result)
+
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(self.cache._size, size)
+        self.assertEqual(entries()[0][0], self.cache.filename("2"))
+
+
+    def test_clear(self):
+        self.cache.set("0", self.result)
+        self.cache.clear()
+
+        self.assertEqual(self.cache.size(), 0)
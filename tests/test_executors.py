@@ -0,0 +1,252 @@
+import unittest
+
+import numpy as np
+from six.moves import queue
+
+from uncertainpy.core import Parallel, Executor, SerialExecutor, ThreadExecutor
+from uncertainpy.core import ProcessExecutor, MPIExecutor, AsyncExecutor
+from uncertainpy.models import Model
+
+from .testing_classes import TestingFeatures, TestingModel1d, TestingModel2d, TestingModelAsync
+
+try:
+    from mpi4py import MPI
+
+    mpi_size = MPI.COMM_WORLD.Get_size()
+except ImportError:
+    mpi_size = 0
+
+
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.parallel = Parallel(model=TestingModel1d(),
+                                 features=TestingFeatures(features_to_run=["feature0d"]),
+                                 logger_level="error")
+
+        self.batch = [(3, {"a": 0, "b": 1}), (1, {"a": 1, "b": 2})]
+
+
+    def evaluate(self, executor, batch=None):
+        completed = queue.Queue()
+
+        executor.start(self.parallel)
+        executor.submit(self.batch if batch is None else batch, completed.put)
+
+        return completed.get(timeout=60)
+
+
+    def assert_batch_result(self, batch_result, model_name="TestingModel1d"):
+        results, elapsed, timer = batch_result
+
+        self.assertEqual([index for index, result in results], [3, 1])
+        self.assertTrue(np.array_equal(results[0][1][model_name]["values"],
+                                       np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(results[1][1][model_name]["values"],
+                                       np.arange(0, 10) + 3))
+        self.assertEqual(results[0][1]["feature0d"]["values"], 1)
+        self.assertGreaterEqual(elapsed, 0)
+        self.assertEqual(len(timer.samples["evaluate"]), 2)
+
+
+    def test_executor(self):
+        executor = Executor()
+
+        self.assertEqual(executor.nr_workers, 1)
+        self.assertFalse(executor.can_terminate)
+
+        with self.assertRaises(NotImplementedError):
+            executor.submit(self.batch, print)
+
+        with self.assertRaises(NotImplementedError):
+            executor.terminate()
+
+
+    def test_serial(self):
+        with SerialExecutor() as executor:
+            self.assertEqual(executor.nr_workers, 1)
+            self.assert_batch_result(self.evaluate(executor))
+
+
+    def test_serial_error(self):
+        def error_model(a, b):
+            raise RuntimeError("model error")
+
+        self.parallel.model = Model(error_model, logger_level="error")
+
+        result = self.evaluate(SerialExecutor())
+
+        self.assertIsInstance(result, RuntimeError)
+
+
+    def test_thread(self):
+        with ThreadExecutor(workers=2) as executor:
+            self.assertEqual(executor.nr_workers, 2)
+            self.assertFalse(executor.can_terminate)
+
+            self.assert_batch_result(self.evaluate(executor))
+
+        self.assertIsNone(executor._pool)
+
+
+    def test_thread_max(self):
+        import multiprocess
+
+        self.assertEqual(ThreadExecutor().nr_workers, multiprocess.cpu_count())
+
+
+    def test_process(self):
+        with ProcessExecutor(CPUs=2) as executor:
+            self.assertEqual(executor.nr_workers, 2)
+            self.assertTrue(executor.can_terminate)
+
+            self.assert_batch_result(self.evaluate(executor))
+            pool = executor._pool
+
+            # The pool is reused
+            self.assert_batch_result(self.evaluate(executor))
+            self.assertIs(executor._pool, pool)
+
+        self.assertIsNone(executor._pool)
+
+
+    def test_process_restarted(self):
+        executor = ProcessExecutor(CPUs=2)
+
+        self.evaluate(executor)
+        pool = executor._pool
+
+        self.parallel.model = TestingModel2d()
+        results, elapsed, timer = self.evaluate(executor)
+
+        self.assertIsNot(executor._pool, pool)
+        self.assertIn("TestingModel2d", results[0][1])
+
+        executor.close()
+
+
+    def test_process_fixed_parameters(self):
+        executor = ProcessExecutor(CPUs=2)
+
+        self.parallel.fixed_parameters = {"b": 10}
+        results, elapsed, timer = self.evaluate(executor, [(0, {"a": 0})])
+        pool = executor._pool
+
+        self.assertTrue(np.array_equal(results[0][1]["TestingModel1d"]["values"],
+                                       np.arange(0, 10) + 10))
+
+        # A new set of fixed parameters reuses the worker processes
+        self.parallel.fixed_parameters = {"b": 20}
+        results, elapsed, timer = self.evaluate(executor, [(0, {"a": 0})])
+
+        self.assertIs(executor._pool, pool)
+        self.assertTrue(np.array_equal(results[0][1]["TestingModel1d"]["values"],
+                                       np.arange(0, 10) + 20))
+
+        executor.close()
+
+
+    def test_process_terminate(self):
+        executor = ProcessExecutor(CPUs=2)
+
+        self.evaluate(executor)
+        executor.terminate()
+
+        self.assertIsNone(executor._pool)
+        self.assert_batch_result(self.evaluate(executor))
+
+        executor.close()
+
+
+    def test_process_max_tasks_per_worker(self):
+        with ProcessExecutor(CPUs=2, max_tasks_per_worker=1) as executor:
+            self.assertEqual(executor.max_tasks_per_worker, 1)
+
+            self.assert_batch_result(self.evaluate(executor))
+            self.assertEqual(executor.pool._maxtasksperchild, 1)
+
+
+    def test_process_pin_workers(self):
+        def slot_model(a, b):
+            from uncertainpy.core import parallel
+
+            return np.arange(0, 2), np.array([parallel._worker_slot, parallel._worker_slot])
+
+        self.parallel.model = Model(slot_model, logger_level="error")
+        self.parallel.features = None
+        self.parallel.pin_workers = "core"
+
+        # Replaced workers reuse the pinning slots of the workers they replace
+        with ProcessExecutor(CPUs=2, max_tasks_per_worker=1) as executor:
+            slots = set()
+            for i in range(6):
+                results, elapsed, timer = self.evaluate(executor, [(i, {"a": i, "b": i})])
+                slots.add(results[0][1]["slot_model"]["values"][0])
+
+        self.assertTrue(slots.issubset({0, 1}))
+
+
+    def test_async(self):
+        self.parallel.model = TestingModelAsync()
+
+        with AsyncExecutor(max_concurrent=4) as executor:
+            self.assertEqual(executor.nr_workers, 4)
+            self.assertFalse(executor.can_terminate)
+
+            self.assert_batch_result(self.evaluate(executor), model_name="TestingModelAsync")
+
+        self.assertIsNone(executor._loop)
+
+
+    def test_async_feature_workers(self):
+        self.parallel.model = TestingModelAsync()
+
+        with AsyncExecutor(feature_workers=2) as executor:
+            batch_result = self.evaluate(executor)
+            self.assertIsNotNone(executor._feature_pool)
+
+            self.assert_batch_result(batch_result, model_name="TestingModelAsync")
+            self.assertEqual(len(batch_result[2].samples["feature feature0d"]), 2)
+
+        self.assertIsNone(executor._feature_pool)
+
+
+    def test_async_regular_model(self):
+        with AsyncExecutor() as executor:
+            self.assert_batch_result(self.evaluate(executor))
+
+
+    def test_async_error(self):
+        async def error_model(a, b):
+            raise RuntimeError("model error")
+
+        self.parallel.model = Model(error_model, logger_level="error")
+
+        with AsyncExecutor() as executor:
+            result = self.evaluate(executor)
+
+        self.assertIsInstance(result, RuntimeError)
+
+
+    def test_mpi_workers(self):
+        if not mpi_size:
+            with self.assertRaises(ImportError):
+                MPIExecutor()
+        else:
+            self.assertEqual(MPIExecutor(workers=3).nr_workers, 3)
+            self.assertEqual(MPIExecutor().nr_workers, max(mpi_size - 1, 1))
+
+
+    # Requires running on several MPI ranks:
+    # mpirun -n 4 python -m mpi4py.futures -m pytest tests/test_executors.py
+    @unittest.skipUnless(mpi_size > 1, "requires mpi4py and running with mpirun -n >= 2")
+    def test_mpi(self):
+        with MPIExecutor() as executor:
+            self.assert_batch_result(self.evaluate(executor))
+
+            batch = [(i, {"a": i, "b": i + 1}) for i in range(10)]
+            results, elapsed, timer = self.evaluate(executor, batch)
+
+            for index, result in results:
+                self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                               np.arange(0, 10) + 2*index + 1))
@@ -0,0 +1,86 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+import chaospy as cp
+
+from uncertainpy.core import ExpansionCache
+
+
+
+class TestExpansionCache(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.folder = os.path.join(self.output_test_dir, "expansion_cache")
+        self.cache = ExpansionCache(self.folder, logger_level="error")
+
+        self.distribution = cp.J(cp.Uniform(0.5, 1.5), cp.Normal(2, 0.5))
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        self.assertEqual(self.cache.folder, self.folder)
+        self.assertEqual(self.cache.max_size, 10**8)
+
+
+    def test_describe(self):
+        description = ExpansionCache.describe(self.distribution)
+
+        self.assertEqual(description, ExpansionCache.describe(cp.J(cp.Uniform(0.5, 1.5), cp.Normal(2, 0.5))))
+        self.assertNotEqual(description, ExpansionCache.describe(cp.J(cp.Uniform(0.5, 1.5), cp.Normal(2, 1))))
+
+
+    def test_expansion_key(self):
+        key = self.cache.expansion_key("orth_ttr", self.distribution, order=3)
+
+        self.assertEqual(key, self.cache.expansion_key("orth_ttr", self.distribution, order=3))
+        self.assertNotEqual(key, self.cache.expansion_key("orth_ttr", self.distribution, order=4))
+        self.assertNotEqual(key, self.cache.expansion_key("generate_quadrature", self.distribution, order=3))
+        self.assertNotEqual(key, self.cache.expansion_key("orth_ttr", cp.J(cp.Normal(), cp.Normal()), order=3))
+
+
+    def test_orth_ttr(self):
+        P = self.cache.orth_ttr(3, self.distribution)
+
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(len(os.listdir(self.folder)), 1)
+
+        P_cached = self.cache.orth_ttr(3, self.distribution)
+
+        self.assertEqual(self.cache.hits, 1)
+
+        samples = self.distribution.sample(5)
+        self.assertTrue(np.allclose(P_cached(*samples), P(*samples)))
+        self.assertTrue(np.allclose(P(*samples), cp.orth_ttr(3, self.distribution)(*samples)))
+
+
+    def test_generate_quadrature(self):
+        nodes, weights = self.cache.generate_quadrature(3, self.distribution, rule="J", sparse=True)
+        nodes_cached, weights_cached = self.cache.generate_quadrature(3, self.distribution, rule="J", sparse=True)
+
+        self.assertEqual(self.cache.hits, 1)
+        self.assertTrue(np.array_equal(nodes, nodes_cached))
+        self.assertTrue(np.array_equal(weights, weights_cached))
+
+        self.cache.generate_quadrature(3, self.distribution, rule="J", sparse=False)
+        self.assertEqual(self.cache.misses, 2)
+
+
+    def test_max_size(self):
+        cache = ExpansionCache(self.folder, max_size=0, logger_level="error")
+
+        cache.orth_ttr(2, self.distribution)
+        cache.orth_ttr(2, self.distribution)
+
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.size(), 0)
@@ -11,6 +11,7 @@ from uncertainpy.features import Features, GeneralSpikingFeatures
 from uncertainpy.features import SpikingFeatures, NetworkFeatures, GeneralNetworkFeatures
 from uncertainpy.features import EfelFeatures
 from uncertainpy.features import Spikes
+from uncertainpy.utils import Timer
 from .testing_classes import TestingFeatures
 
 class TestFeatures(unittest.TestCase):
@@ -881,6 +882,14 @@ class TestTestingFeatures(unittest.TestCase):
                          set(self.implemented_features))
 
 
+    def test_calculate_features_timer(self):
+        timer = Timer()
+        self.features.calculate_features(None, None, timer=timer)
+
+        self.assertEqual(set(timer.samples.keys()),
+                         set(["preprocess"] + ["feature " + feature for feature in self.implemented_features]))
+
+
     # def test_calculate_none(self):
     #     self.assertEqual(set(self.features.calculate(None, None).keys()),
     #                      set(self.implemented_features))
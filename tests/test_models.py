@@ -1,11 +1,14 @@
 import os
+import sys
+import shutil
 import unittest
 
 import numpy as np
+import dill
 from xvfbwrapper import Xvfb
 # import nest
 
-from uncertainpy.models import Model, NeuronModel, NestModel
+from uncertainpy.models import Model, NeuronModel, NestModel, ExternalProcessModel
 from uncertainpy.core import Parallel
 from uncertainpy.core import RunModel
 
@@ -16,7 +19,8 @@ from .models import brunel_network
 
 
 from .testing_classes import TestingModel0d, TestingModel1d, TestingModel2d
-from .testing_classes import TestingModelAdaptive, model_function
+from .testing_classes import TestingModelAdaptive, model_function, model_function_batch
+from .testing_classes import TestingModelSetup, TestingModelAsync
 
 
 folder = os.path.dirname(os.path.realpath(__file__))
@@ -57,6 +61,28 @@ class TestModel(unittest.TestCase):
             Model(run=2)
 
 
+    def test_setup(self):
+        model = TestingModelSetup()
+
+        model.evaluate(a=1, b=2)
+        time, values = model.evaluate(a=1, b=2)
+
+        self.assertEqual(model.nr_setups, 1)
+        self.assertEqual(values[0], 1)
+
+        # A copy sent to another process is set up again
+        model_copy = dill.loads(dill.dumps(model))
+        self.assertFalse(model_copy._is_setup)
+
+        model._ensure_teardown()
+        model._ensure_teardown()
+
+        self.assertEqual(model.nr_teardowns, 1)
+
+        model.evaluate(a=1, b=2)
+        self.assertEqual(model.nr_setups, 2)
+
+
     def test_set_parameters(self):
         parameters = {"a": -1, "b": -1}
 
@@ -108,6 +134,18 @@ class TestModel(unittest.TestCase):
         self.assertEqual(values, 22)
 
 
+    def test_evaluate_async(self):
+        model = TestingModelAsync()
+
+        self.assertTrue(model.is_async)
+        self.assertFalse(TestingModel1d().is_async)
+
+        time, values = model.evaluate(a=1, b=2)
+
+        self.assertTrue(np.array_equal(time, np.arange(0, 10)))
+        self.assertTrue(np.array_equal(values, np.arange(0, 10) + 3))
+
+
     def test_evaluate_validate_error(self):
         def test_model(a=10, b=11, c=12):
             return "123456"
@@ -121,6 +159,55 @@ class TestModel(unittest.TestCase):
 
 
 
+    def test_run_batch(self):
+        self.assertIsNone(self.model.run_batch)
+
+        model = Model(run=model_function, run_batch=model_function_batch, logger_level="error")
+        self.assertEqual(model.run_batch, model_function_batch)
+        self.assertEqual(model.name, "model_function")
+
+        model = Model(logger_level="error")
+        model.run_batch = model_function_batch
+        self.assertEqual(model.run_batch, model_function_batch)
+
+        with self.assertRaises(TypeError):
+            model.run_batch = 2
+
+
+    def test_evaluate_batch(self):
+        def test_model(a=10, b=11, c=12):
+            return np.arange(0, 3), np.outer(a + b, np.ones(3)) + c, [{"a": value} for value in a]
+
+        model = Model(run_batch=test_model, c=22, logger_level="error")
+
+        model_results = model.evaluate_batch(a=np.array([0, 1]), b=np.array([1, 2]))
+
+        self.assertEqual(len(model_results), 2)
+
+        time, values, info = model_results[0]
+        self.assertTrue(np.array_equal(time, np.arange(0, 3)))
+        self.assertTrue(np.array_equal(values, [23, 23, 23]))
+        self.assertEqual(info, {"a": 0})
+
+        time, values, info = model_results[1]
+        self.assertTrue(np.array_equal(values, [25, 25, 25]))
+        self.assertEqual(info, {"a": 1})
+
+
+    def test_validate_run_batch(self):
+        self.model.validate_run_batch((None, [1, 2]), 2)
+        self.model.validate_run_batch((None, [1, 2], [{}, {}]), 2)
+
+        with self.assertRaises(ValueError):
+            self.model.validate_run_batch((None, [1, 2, 3]), 2)
+
+        with self.assertRaises(ValueError):
+            self.model.validate_run_batch((None, [1, 2], [{}]), 2)
+
+        with self.assertRaises(ValueError):
+            self.model.validate_run_batch(np.arange(2), 2)
+
+
     def test_validate_run(self):
         self.model.validate_run(("t", "U"))
         self.model.validate_run((1, 2, 3))
@@ -331,6 +418,30 @@ class TestNeuronModel(unittest.TestCase):
 
 
 
+    def test_setup_assign_run(self):
+        def test_run(a, b):
+            return "time", "values"
+
+        model = NeuronModel(run=test_run,
+                            logger_level="error")
+
+        # Nothing is loaded with a custom run function
+        model.setup()
+
+        self.assertIsNone(model.h)
+        self.assertIsNone(model._model_function)
+
+
+    def test_getstate(self):
+        model = NeuronModel(logger_level="error")
+        model.h = "neuron"
+
+        model_copy = dill.loads(dill.dumps(model))
+
+        self.assertIsNone(model_copy.h)
+        self.assertEqual(model.h, "neuron")
+
+
     def test_parallel(self):
         path = os.path.join(os.path.dirname(os.path.realpath(__file__)),
                             "models/interneuron_modelDB/")
@@ -567,5 +678,169 @@ class TestNestModel(unittest.TestCase):
         self.assertTrue(np.array_equal(values, binary_spike))
 
 
+
+simulator = """
+import sys
+import numpy as np
+
+parameters = {}
+with open("model.cfg") as f:
+    for line in f:
+        name, value = line.split("=")
+        parameters[name.strip()] = float(value)
+
+if parameters["a"] < 0:
+    sys.stderr.write("negative a")
+    sys.exit(1)
+
+scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+np.savetxt("output.txt", scale*(np.arange(0, 10) + parameters["a"] + parameters["b"]))
+"""
+
+
+def parse_output(directory):
+    return np.arange(0, 10), np.loadtxt(os.path.join(directory, "output.txt"))
+
+
+
+class TestExternalProcessModel(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.template = os.path.join(self.output_test_dir, "model.cfg")
+        with open(self.template, "w") as f:
+            f.write("a = 1\nb = 2\nab = 5\n")
+
+        self.script = os.path.join(self.output_test_dir, "simulator.py")
+        with open(self.script, "w") as f:
+            f.write(simulator)
+
+        self.scratch_dir = os.path.join(self.output_test_dir, "scratch")
+
+        self.model = ExternalProcessModel(command=[sys.executable, "simulator.py"],
+                                          template=self.template,
+                                          files=[self.script],
+                                          parse=parse_output,
+                                          scratch_dir=self.scratch_dir,
+                                          logger_level="error")
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def test_init(self):
+        self.assertEqual(self.model.name, "ExternalProcessModel")
+        self.assertEqual(self.model.parse, parse_output)
+        self.assertEqual(self.model.files, [self.script])
+
+        model = ExternalProcessModel(command="simulator -v model.cfg", logger_level="error")
+        self.assertEqual(model.command, ["simulator", "-v", "model.cfg"])
+
+        with self.assertRaises(NotImplementedError):
+            model.parse(".")
+
+        with self.assertRaises(ValueError):
+            ExternalProcessModel(command="simulator", keep_directories="always")
+
+
+    def test_render(self):
+        text = self.model.render({"a": 0.5, "ab": -3})
+
+        self.assertEqual(text, "a = 0.5\nb = 2\nab = -3\n")
+
+        # The pattern is compiled once for each set of parameter names
+        self.model.render({"a": 1, "ab": 2})
+        self.assertEqual(list(self.model._patterns), [("a", "ab")])
+
+        with self.assertRaises(ValueError):
+            ExternalProcessModel(command="simulator", logger_level="error").render({"a": 1})
+
+
+    def test_evaluate(self):
+        time, values = self.model.evaluate(a=1, b=3)
+
+        self.assertTrue(np.array_equal(time, np.arange(0, 10)))
+        self.assertTrue(np.allclose(values, np.arange(0, 10) + 4))
+
+        # The template is not changed, and the scratch directory is removed
+        with open(self.template) as f:
+            self.assertEqual(f.read(), "a = 1\nb = 2\nab = 5\n")
+
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+
+    def test_evaluate_command(self):
+        self.model.command = [sys.executable, "simulator.py", "{scale}"]
+
+        time, values = self.model.evaluate(a=1, b=3, scale=2)
+
+        self.assertTrue(np.allclose(values, 2*(np.arange(0, 10) + 4)))
+
+
+    def test_evaluate_command_braces(self):
+        self.model.command = [sys.executable, "simulator.py", "{scale:.1f}", '{"b": {b}, "c": "{c}"}']
+
+        time, values = self.model.evaluate(a=1, b=3, scale=2)
+
+        self.assertTrue(np.allclose(values, 2*(np.arange(0, 10) + 4)))
+
+        values = {"a": 1, "ab": 2.5, "directory": "scratch"}
+        self.assertEqual(self.model._format_argument('{"a": {a}, "ab": {ab:.2f}}', values),
+                         '{"a": 1, "ab": 2.50}')
+        self.assertEqual(self.model._format_argument("{directory}/{b}/{}", values), "scratch/{b}/{}")
+
+
+    def test_evaluate_failed(self):
+        self.model.keep_directories = "failed"
+
+        with self.assertRaises(RuntimeError) as error:
+            self.model.evaluate(a=-1, b=3)
+
+        self.assertIn("negative a", str(error.exception))
+
+        directories = os.listdir(self.scratch_dir)
+        self.assertEqual(len(directories), 1)
+        self.assertIn("stderr.txt", os.listdir(os.path.join(self.scratch_dir, directories[0])))
+
+
+    def test_reuse_directories(self):
+        self.model.reuse_directories = True
+
+        self.model.evaluate(a=1, b=3)
+        time, values = self.model.evaluate(a=2, b=3)
+
+        self.assertTrue(np.allclose(values, np.arange(0, 10) + 5))
+        self.assertEqual(len(os.listdir(self.scratch_dir)), 1)
+
+        self.model._ensure_teardown()
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+
+    def test_run_model_threads(self):
+        from uncertainpy import Parameters
+        from uncertainpy.core import ThreadExecutor
+
+        nodes = np.array([np.arange(0, 8), np.arange(1, 9)])
+        parameters = Parameters({"a": 1, "b": 2})
+
+        with RunModel(model=self.model,
+                      parameters=parameters,
+                      executor=ThreadExecutor(workers=4),
+                      logger_level="error") as runmodel:
+            results = runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.allclose(result["ExternalProcessModel"]["values"],
+                                        np.arange(0, 10) + 2*i + 1))
+
+        self.assertEqual(os.listdir(self.scratch_dir), [])
+
+
 if __name__ == "__main__":
     unittest.main()
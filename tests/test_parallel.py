@@ -1,17 +1,21 @@
 import unittest
 import os
+import io
 import shutil
+import contextlib
 import scipy.interpolate
 
 import numpy as np
 
 from xvfbwrapper import Xvfb
-from uncertainpy.core import Parallel
+from uncertainpy.core import Parallel, ResultBuffers
+from uncertainpy.core.parallel import _init_worker, _run_worker_batch
 from uncertainpy.models import Model
 from uncertainpy.features import Features
+from uncertainpy.utils import Timer
 
 from .testing_classes import TestingFeatures
-from .testing_classes import TestingModel1d, model_function
+from .testing_classes import TestingModel1d, model_function, model_function_batch
 from .testing_classes import TestingModelNoTime
 from .testing_classes import TestingModelAdaptive
 from .testing_classes import PostprocessErrorNumpy
@@ -382,6 +386,24 @@ class TestParallel(unittest.TestCase):
             self.parallel.create_interpolations(results)
 
 
+    def test_all_parameters(self):
+        self.assertIs(self.parallel.all_parameters(self.model_parameters), self.model_parameters)
+
+        self.parallel.fixed_parameters = {"b": 1, "c": 2}
+
+        self.assertEqual(self.parallel.all_parameters({"a": 0}), {"a": 0, "b": 1, "c": 2})
+        self.assertEqual(self.parallel.all_parameters({"a": 0, "b": 3}), {"a": 0, "b": 3, "c": 2})
+        self.assertEqual(self.parallel.fixed_parameters, {"b": 1, "c": 2})
+
+
+    def test_run_fixed_parameters(self):
+        self.parallel.fixed_parameters = {"b": 1}
+
+        results = self.parallel.run({"a": 0})
+
+        self.assertTrue(np.array_equal(results["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+
+
     def test_run(self):
         results = self.parallel.run(self.model_parameters)
 
@@ -404,6 +426,37 @@ class TestParallel(unittest.TestCase):
                               scipy.interpolate.fitpack2.UnivariateSpline)
 
 
+    def test_run_timer(self):
+        timer = Timer()
+        self.parallel.run(self.model_parameters, timer=timer)
+
+        stages = ["evaluate", "postprocess", "preprocess", "interpolation",
+                  "feature feature0d", "feature feature1d", "feature feature2d",
+                  "feature feature_invalid", "feature feature_interpolate"]
+
+        self.assertEqual(set(timer.samples.keys()), set(stages))
+
+        for stage in stages:
+            self.assertEqual(len(timer.samples[stage]), 1)
+            self.assertGreaterEqual(timer.samples[stage][0][0], 0)
+
+
+    def test_run_calculate_features_override(self):
+        class OverrideFeatures(Features):
+            def calculate_features(self, time, values):
+                return {"override": {"time": None, "values": values.sum()}}
+
+        self.parallel.features = OverrideFeatures()
+
+        timer = Timer()
+        results = self.parallel.run(self.model_parameters, timer=timer)
+
+        self.assertEqual(results["override"]["values"], 55)
+        self.assertTrue(np.isnan(results["override"]["time"]))
+        self.assertEqual(set(timer.samples.keys()),
+                         {"evaluate", "postprocess", "features", "interpolation"})
+
+
     def test_run_kwargs(self):
         def test_model(a=10, b=11, c=12):
             return a + b, c
@@ -437,6 +490,53 @@ class TestParallel(unittest.TestCase):
                               scipy.interpolate.fitpack2.UnivariateSpline)
 
 
+    def test_get_time_grid(self):
+        self.assertIsNone(self.parallel.get_time_grid("TestingModel1d"))
+
+        self.parallel.time_grid = [0, 1, 2]
+        self.assertTrue(np.array_equal(self.parallel.get_time_grid("TestingModel1d"), [0, 1, 2]))
+        self.assertTrue(np.array_equal(self.parallel.get_time_grid("feature1d"), [0, 1, 2]))
+
+        self.parallel.time_grid = {"feature_interpolate": [0, 1]}
+        self.assertTrue(np.array_equal(self.parallel.get_time_grid("feature_interpolate"), [0, 1]))
+        self.assertIsNone(self.parallel.get_time_grid("TestingModel1d"))
+
+
+    def test_resample(self):
+        self.parallel.time_grid = {"feature_interpolate": np.linspace(0, 9, 19),
+                                   "feature_invalid": np.arange(0, 5)}
+
+        results = {"feature1d": {"values": np.arange(0, 10),
+                                 "time": np.arange(0, 10)},
+                   "feature_interpolate": {"values": np.arange(0, 10) + 1,
+                                           "time": np.arange(0, 10),
+                                           "interpolation": scipy.interpolate.InterpolatedUnivariateSpline(np.arange(0, 10), np.arange(0, 10) + 1, k=3)},
+                   "feature_invalid": {"values": np.nan,
+                                       "time": np.nan,
+                                       "interpolation": None}}
+
+        results = self.parallel.resample(results)
+
+        self.assertTrue(np.array_equal(results["feature1d"]["values"], np.arange(0, 10)))
+        self.assertTrue(np.array_equal(results["feature_interpolate"]["time"], np.linspace(0, 9, 19)))
+        self.assertTrue(np.allclose(results["feature_interpolate"]["values"], np.linspace(0, 9, 19) + 1))
+        self.assertNotIn("interpolation", results["feature_interpolate"])
+        self.assertEqual(len(results["feature_invalid"]["values"]), 5)
+        self.assertTrue(np.all(np.isnan(results["feature_invalid"]["values"])))
+
+
+    def test_run_interpolate_time_grid(self):
+        parallel = Parallel(model=TestingModelAdaptive(),
+                            features=TestingFeatures(features_to_run="feature_interpolate"),
+                            time_grid=np.arange(0, 15))
+        results = parallel.run(self.model_parameters)
+
+        for name in ["TestingModelAdaptive", "feature_interpolate"]:
+            self.assertTrue(np.array_equal(results[name]["time"], np.arange(0, 15)))
+            self.assertTrue(np.allclose(results[name]["values"], np.arange(0, 15) + 1))
+            self.assertNotIn("interpolation", results[name])
+
+
     def test_run_model_no_time(self):
         parallel = Parallel(model=TestingModelNoTime())
         with self.assertRaises(ValueError):
@@ -473,6 +573,29 @@ class TestParallel(unittest.TestCase):
             parallel.run(self.model_parameters)
 
 
+    def test_catch_errors_output(self):
+        parallel = Parallel(model=PostprocessErrorValue())
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            with self.assertRaises(ValueError):
+                parallel.run(self.model_parameters)
+
+        self.assertIn("Caught exception", output.getvalue())
+        self.assertIn("Traceback", output.getvalue())
+
+        # The traceback is returned with the failed evaluation, so it is not
+        # printed
+        parallel.catch_errors = True
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            with self.assertRaises(ValueError):
+                parallel.run(self.model_parameters)
+
+        self.assertEqual(output.getvalue(), "")
+
+
     def test_use_info_arg(self):
         def model_function(**model_parameters):
             return 1, 2, True
@@ -515,3 +638,73 @@ class TestParallel(unittest.TestCase):
         self.parallel.features = feature_function
         with self.assertRaises(TypeError):
             self.parallel.run(self.model_parameters)
+
+
+    def test_run_worker(self):
+        _init_worker(self.parallel)
+
+        results, elapsed, timer = _run_worker_batch([(0, self.model_parameters)])
+        index, result = results[0]
+
+        self.assertEqual(index, 0)
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], self.t))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], self.values))
+
+
+    def test_run_worker_batch(self):
+        _init_worker(self.parallel)
+
+        results, elapsed, timer = _run_worker_batch([(3, self.model_parameters),
+                                                     (1, self.model_parameters)])
+
+        self.assertEqual([index for index, result in results], [3, 1])
+        self.assertTrue(np.array_equal(results[0][1]["TestingModel1d"]["values"], self.values))
+        self.assertGreaterEqual(elapsed, 0)
+        self.assertEqual(len(timer.samples["evaluate"]), 2)
+
+
+    def test_run_batch(self):
+        self.parallel.model = Model(run=model_function, run_batch=model_function_batch)
+
+        results = self.parallel.run_batch([{"a": 0, "b": 1}, {"a": 1, "b": 2}])
+
+        self.assertEqual(len(results), 2)
+        for i, result in enumerate(results):
+            expected = self.parallel.run({"a": i, "b": i + 1})
+
+            self.assertEqual(set(result.keys()), set(expected.keys()))
+            self.assertTrue(np.array_equal(result["model_function"]["time"], self.t))
+            self.assertTrue(np.array_equal(result["model_function"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+            self.assertTrue(np.array_equal(result["feature1d"]["values"],
+                                           expected["feature1d"]["values"]))
+
+
+    def test_run_worker_batch_buffers(self):
+        _init_worker(self.parallel)
+
+        buffers = ResultBuffers(4, folder=os.path.join(self.output_test_dir, "buffers"))
+        buffers.add("TestingModel1d", (10,), np.arange(0, 10))
+
+        results, elapsed, timer = _run_worker_batch([(3, {"a": 0, "b": 1}),
+                                                     (1, {"a": 1, "b": 2})],
+                                                    buffers)
+
+        self.assertEqual(results[0][1]["TestingModel1d"], {"buffered": True})
+        self.assertEqual(results[0][1]["feature0d"]["values"], 1)
+        self.assertTrue(np.array_equal(buffers.array("TestingModel1d")[3], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(buffers.array("TestingModel1d")[1], np.arange(0, 10) + 3))
+
+        buffers.close()
+
+
+    def test_run_worker_batch_model(self):
+        self.parallel.model = Model(run=model_function, run_batch=model_function_batch)
+        _init_worker(self.parallel)
+
+        results, elapsed, timer = _run_worker_batch([(3, {"a": 0, "b": 1}),
+                                                     (1, {"a": 1, "b": 2})])
+
+        self.assertEqual([index for index, result in results], [3, 1])
+        self.assertTrue(np.array_equal(results[1][1]["model_function"]["values"],
+                                       np.arange(0, 10) + 3))
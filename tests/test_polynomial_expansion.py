@@ -0,0 +1,196 @@
+import unittest
+
+import numpy as np
+import chaospy as cp
+import numpoly
+
+from uncertainpy.core import PolynomialExpansion
+
+
+
+class TestPolynomialExpansion(unittest.TestCase):
+    def setUp(self):
+        self.distribution = cp.J(cp.Uniform(1, 3), cp.Normal(2, 0.5), cp.Uniform(-1, 1))
+
+        P = cp.orth_ttr(3, self.distribution)
+        nodes = self.distribution.sample(60, "M")
+
+        t = np.linspace(0, 1, 5)
+        evaluations = np.array([np.sin(a*t) + b**2*c + a*c for a, b, c in nodes.T])
+
+        self.U_hat = cp.fit_regression(P, nodes, evaluations)
+
+        self.expansion = PolynomialExpansion.from_poly(self.U_hat, 3)
+        self.moments = PolynomialExpansion.marginal_moments(self.distribution, 6)
+
+
+    def test_init(self):
+        expansion = PolynomialExpansion([[1, 2], [3, 4]], [[1, 0], [0, 1]])
+
+        self.assertEqual(expansion.shape, (2,))
+
+        # A constant term is added
+        self.assertEqual(expansion.coefficients.shape, (3, 2))
+        self.assertTrue(np.array_equal(expansion.exponents, [[0, 0], [1, 0], [0, 1]]))
+
+
+    def test_from_poly(self):
+        self.assertEqual(self.expansion.shape, (5,))
+        self.assertEqual(self.expansion.coefficients.shape[1], 5)
+        self.assertEqual(self.expansion.exponents.shape[1], 3)
+        self.assertTrue(np.array_equal(self.expansion.degree, [3, 3, 3]))
+
+
+    def test_from_poly_fewer_dimensions(self):
+        q0 = cp.variable(1)
+        expansion = PolynomialExpansion.from_poly(numpoly.polynomial([q0, 2*q0**2]), 2)
+
+        self.assertEqual(expansion.exponents.shape[1], 2)
+        self.assertEqual(expansion.shape, (2,))
+
+
+    def test_marginal_moments(self):
+        moments = PolynomialExpansion.marginal_moments(self.distribution, 2)
+
+        self.assertTrue(np.allclose(moments, [[1, 2, 13/3.],
+                                              [1, 2, 4.25],
+                                              [1, 0, 1/3.]]))
+
+
+    def test_mean(self):
+        self.assertTrue(np.allclose(self.expansion.mean(self.moments),
+                                    cp.E(self.U_hat, self.distribution)))
+
+
+    def test_variance(self):
+        self.assertTrue(np.allclose(self.expansion.variance(self.moments),
+                                    cp.Var(self.U_hat, self.distribution)))
+
+
+    def test_sobol_first(self):
+        sobol_first = self.expansion.sobol_first(self.moments)
+
+        self.assertEqual(sobol_first.shape, (3, 5))
+        self.assertTrue(np.allclose(sobol_first, cp.Sens_m(self.U_hat, self.distribution)))
+
+
+    def test_sobol_total(self):
+        sobol_total = self.expansion.sobol_total(self.moments)
+
+        self.assertEqual(sobol_total.shape, (3, 5))
+        self.assertTrue(np.allclose(sobol_total, cp.Sens_t(self.U_hat, self.distribution)))
+
+
+    def test_sobol_zero_variance(self):
+        q0, q1 = cp.variable(2)
+        distribution = cp.J(cp.Uniform(), cp.Uniform())
+
+        expansion = PolynomialExpansion.from_poly(numpoly.polynomial([q0, 2*q0**0]), 2)
+        moments = PolynomialExpansion.marginal_moments(distribution, 2)
+
+        self.assertTrue(np.allclose(expansion.sobol_first(moments), [[1, 0], [0, 0]]))
+        self.assertTrue(np.allclose(expansion.sobol_total(moments), [[1, 0], [0, 0]]))
+
+
+    def test_moments_degree(self):
+        moments = PolynomialExpansion.marginal_moments(self.distribution, 5)
+
+        with self.assertRaises(ValueError):
+            self.expansion.variance(moments)
+
+
+    def test_call(self):
+        samples = self.distribution.sample(7)
+
+        values = self.expansion(*samples)
+
+        self.assertEqual(values.shape, (5, 7))
+        self.assertTrue(np.allclose(values, self.U_hat(*samples)))
+
+
+    def test_basis(self):
+        basis = PolynomialExpansion.basis([[1, 2], [3, 4]], [[0, 0], [1, 0], [1, 2]])
+
+        self.assertTrue(np.array_equal(basis, [[1, 1, 9], [1, 2, 32]]))
+
+        basis = PolynomialExpansion.basis([2, 3], [[0], [2]])
+
+        self.assertTrue(np.array_equal(basis, [[1, 4], [1, 9]]))
+
+
+    def test_aligned(self):
+        expansion = PolynomialExpansion([[1, 2], [3, 4]], [[0, 0], [0, 1]])
+
+        coefficients = expansion.aligned([[1, 0], [0, 0], [0, 1]])
+
+        self.assertTrue(np.array_equal(coefficients, [[0, 0], [1, 2], [3, 4]]))
+
+        with self.assertRaises(ValueError):
+            expansion.aligned([[0, 0], [1, 0]])
+
+
+    def test_percentile(self):
+        samples = self.distribution.sample(1000)
+        values = self.U_hat(*samples)
+
+        percentile = self.expansion.percentile([5, 95], samples, max_size=2000)
+
+        self.assertEqual(percentile.shape, (2, 5))
+        self.assertTrue(np.allclose(percentile, np.percentile(values, [5, 95], -1)))
+
+        percentile = self.expansion.percentile(5, samples)
+        self.assertEqual(percentile.shape, (5,))
+        self.assertTrue(np.allclose(percentile, np.percentile(values, 5, -1)))
+
+
+    def test_percentile_chunks(self):
+        samples = self.distribution.sample(1000)
+        values = self.U_hat(*samples)
+
+        # Fewer values than the number of samples are evaluated at the same
+        # time, so the approximation is evaluated in chunks of samples
+        percentile = self.expansion.percentile([5, 95], samples, max_size=100)
+
+        self.assertEqual(percentile.shape, (2, 5))
+        self.assertTrue(np.allclose(percentile, np.percentile(values, [5, 95], -1)))
+
+
+    def test_percentile_shared_exponents(self):
+        samples = self.distribution.sample(100)
+
+        U_hat = self.U_hat[1]
+        expansion = PolynomialExpansion.from_poly(U_hat, 3)
+
+        exponents = np.unique(np.concatenate([self.expansion.exponents, [[4, 0, 0]]]), axis=0)
+
+        percentile = expansion.percentile([5, 95], samples, exponents, max_size=50)
+
+        self.assertEqual(percentile.shape, (2,))
+        self.assertTrue(np.allclose(percentile, np.percentile(U_hat(*samples), [5, 95])))
+
+
+    def test_0d(self):
+        U_hat = self.U_hat[2]
+        expansion = PolynomialExpansion.from_poly(U_hat, 3)
+
+        samples = self.distribution.sample(7)
+
+        self.assertEqual(expansion.shape, ())
+        self.assertEqual(expansion.mean(self.moments).shape, ())
+        self.assertTrue(np.allclose(expansion.variance(self.moments), cp.Var(U_hat, self.distribution)))
+        self.assertTrue(np.allclose(expansion(*samples), U_hat(*samples)))
+
+
+    def test_one_parameter(self):
+        distribution = cp.Uniform(1, 2)
+        q0 = cp.variable(1)
+        U_hat = numpoly.polynomial([q0**2, q0])
+
+        expansion = PolynomialExpansion.from_poly(U_hat, 1)
+        moments = PolynomialExpansion.marginal_moments(distribution, 4)
+
+        samples = distribution.sample(7)
+
+        self.assertTrue(np.allclose(expansion.mean(moments), cp.E(U_hat, distribution)))
+        self.assertTrue(np.allclose(expansion.variance(moments), cp.Var(U_hat, distribution)))
+        self.assertTrue(np.allclose(expansion(samples), U_hat(samples)))
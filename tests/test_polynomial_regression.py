@@ -0,0 +1,111 @@
+import unittest
+
+import numpy as np
+import chaospy as cp
+
+from uncertainpy.core import PolynomialRegression
+
+
+
+class TestPolynomialRegression(unittest.TestCase):
+    def setUp(self):
+        self.distribution = cp.J(cp.Uniform(), cp.Uniform())
+        self.P = cp.orth_ttr(2, self.distribution)
+
+        self.nodes = self.distribution.sample(20, "M")
+        self.evaluations = np.array([[a + b, a*b, a**2] for a, b in self.nodes.T])
+
+        self.regression = PolynomialRegression(self.P, self.nodes)
+
+
+    def test_init(self):
+        self.assertEqual(self.regression.design.shape, (20, len(self.P)))
+
+
+    def test_fit(self):
+        U_hat = self.regression.fit(self.evaluations)
+        U_hat_chaospy = cp.fit_regression(self.P, self.nodes, self.evaluations)
+
+        self.assertEqual(U_hat.shape, (3,))
+
+        samples = self.distribution.sample(10)
+        self.assertTrue(np.allclose(U_hat(*samples), U_hat_chaospy(*samples)))
+        self.assertTrue(np.allclose(U_hat(*samples)[0], samples[0] + samples[1]))
+
+
+    def test_fit_masked(self):
+        mask = np.ones(20, dtype=bool)
+        mask[[3, 7]] = False
+
+        U_hat = self.regression.fit(self.evaluations[mask], mask)
+        U_hat_chaospy = cp.fit_regression(self.P, self.nodes[:, mask], self.evaluations[mask])
+
+        samples = self.distribution.sample(10)
+        self.assertTrue(np.allclose(U_hat(*samples), U_hat_chaospy(*samples)))
+
+
+    def test_fit_0d(self):
+        U_hat = self.regression.fit(self.evaluations[:, 1])
+        U_hat_chaospy = cp.fit_regression(self.P, self.nodes, self.evaluations[:, 1])
+
+        self.assertEqual(U_hat.shape, ())
+
+        samples = self.distribution.sample(10)
+        self.assertTrue(np.allclose(U_hat(*samples), U_hat_chaospy(*samples)))
+
+
+    def test_fit_one_parameter(self):
+        distribution = cp.Uniform(1, 2)
+        P = cp.orth_ttr(3, distribution)
+        nodes = distribution.sample(10, "M")
+
+        regression = PolynomialRegression(P, nodes)
+        U_hat = regression.fit(nodes**2)
+
+        self.assertTrue(np.allclose(U_hat(np.array([1.2, 1.5])), [1.44, 2.25]))
+
+
+    def test_coefficients(self):
+        coefficients = self.regression.coefficients(self.evaluations.reshape(20, 3, 1))
+
+        _, coefficients_chaospy = cp.fit_regression(self.P, self.nodes, self.evaluations, retall=1)
+
+        self.assertEqual(coefficients.shape, (len(self.P), 3, 1))
+        self.assertTrue(np.allclose(coefficients[:, :, 0], coefficients_chaospy))
+
+
+    def test_pseudo_inverse(self):
+        mask = np.ones(20, dtype=bool)
+        mask[5] = False
+
+        pseudo_inverse = self.regression.pseudo_inverse(mask)
+
+        self.assertEqual(pseudo_inverse.shape, (len(self.P), 19))
+        self.assertTrue(np.allclose(pseudo_inverse, np.linalg.pinv(self.regression.design[mask])))
+
+        # The factorization is reused for features with the same mask
+        self.assertIs(self.regression.pseudo_inverse(mask.copy()), pseudo_inverse)
+        self.assertIsNot(self.regression.pseudo_inverse(), pseudo_inverse)
+
+
+
+    def test_leave_one_out(self):
+        # The evaluations are in the span of the polynomials
+        self.assertLess(self.regression.leave_one_out(self.evaluations), 10**-10)
+
+        np.random.seed(10)
+        evaluations = np.random.random((20, 2))
+        mask = np.ones(20, dtype=bool)
+        mask[4] = False
+
+        residuals = []
+        for i in np.where(mask)[0]:
+            mask_i = mask.copy()
+            mask_i[i] = False
+
+            U_hat = cp.fit_regression(self.P, self.nodes[:, mask_i], evaluations[mask_i])
+            residuals.append(evaluations[i] - U_hat(*self.nodes[:, i]))
+
+        error = np.sum(np.mean(np.array(residuals)**2, axis=0))/np.sum(np.var(evaluations[mask], axis=0))
+
+        self.assertTrue(np.isclose(self.regression.leave_one_out(evaluations[mask], mask), error))
@@ -0,0 +1,112 @@
+import unittest
+import os
+import shutil
+
+import dill
+import numpy as np
+
+from uncertainpy.core import ResultBuffers
+
+
+
+class TestResultBuffers(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.folder = os.path.join(self.output_test_dir, "buffers")
+        self.buffers = ResultBuffers(3, folder=self.folder)
+        self.buffers.add("TestingModel1d", (10,), np.arange(0, 10))
+
+
+    def tearDown(self):
+        self.buffers.close()
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def result(self, i):
+        return {"TestingModel1d": {"values": np.arange(0, 10) + i,
+                                   "time": np.arange(0, 10)},
+                "feature0d": {"values": i,
+                              "time": np.nan}}
+
+
+    def test_init(self):
+        self.assertEqual(self.buffers.nr_results, 3)
+        self.assertEqual(self.buffers.folder, self.folder)
+        self.assertIn("TestingModel1d", self.buffers)
+        self.assertNotIn("feature0d", self.buffers)
+
+
+    def test_init_temporary(self):
+        buffers = ResultBuffers(3)
+
+        self.assertTrue(os.path.isdir(buffers.folder))
+
+        buffers.close()
+        self.assertFalse(os.path.isdir(buffers.folder))
+
+
+    def test_add(self):
+        array = self.buffers.array("TestingModel1d")
+
+        self.assertEqual(array.shape, (3, 10))
+        self.assertTrue(np.all(np.isnan(array)))
+
+
+    def test_fits(self):
+        self.assertTrue(self.buffers.fits("TestingModel1d", np.arange(0, 10), np.arange(0, 10)))
+        self.assertFalse(self.buffers.fits("TestingModel1d", np.arange(0, 11), np.arange(0, 10)))
+        self.assertFalse(self.buffers.fits("TestingModel1d", np.arange(0, 10), np.arange(1, 11)))
+        self.assertFalse(self.buffers.fits("TestingModel1d", list(range(10)), np.arange(0, 10)))
+        self.assertFalse(self.buffers.fits("TestingModel1d", np.nan, np.nan))
+        self.assertFalse(self.buffers.fits("feature0d", 1, np.nan))
+
+
+    def test_store_load(self):
+        result = self.buffers.store(1, self.result(1))
+
+        self.assertEqual(result["TestingModel1d"], {"buffered": True})
+        self.assertEqual(result["feature0d"]["values"], 1)
+        self.assertTrue(np.array_equal(self.buffers.array("TestingModel1d")[1], np.arange(0, 10) + 1))
+
+        result = self.buffers.load(1, result)
+
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["time"], np.arange(0, 10)))
+        self.assertNotIn("buffered", result["TestingModel1d"])
+        self.assertTrue(self.buffers.is_buffered("TestingModel1d", result["TestingModel1d"]["values"]))
+        self.assertFalse(self.buffers.is_buffered("TestingModel1d", np.arange(0, 10)))
+
+
+    def test_store_not_fitting(self):
+        result = self.result(1)
+        result["TestingModel1d"]["values"] = np.arange(0, 5)
+
+        result = self.buffers.store(1, result)
+
+        self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 5)))
+        self.assertTrue(np.all(np.isnan(self.buffers.array("TestingModel1d")[1])))
+
+
+    def test_pickle(self):
+        self.buffers.array("TestingModel1d")
+
+        buffers = dill.loads(dill.dumps(self.buffers))
+        self.assertEqual(buffers._arrays, {})
+
+        # Writes from a copy are seen by the original buffers
+        buffers.store(2, self.result(2))
+        self.assertTrue(np.array_equal(self.buffers.array("TestingModel1d")[2], np.arange(0, 10) + 2))
+
+
+    def test_close(self):
+        self.buffers.close()
+
+        self.assertFalse(os.path.isdir(self.folder))
+        self.assertNotIn("TestingModel1d", self.buffers)
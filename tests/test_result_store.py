@@ -0,0 +1,133 @@
+import unittest
+import os
+import shutil
+
+import numpy as np
+
+from uncertainpy.core import ResultStore
+
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.output_test_dir = ".tests/"
+
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+        os.makedirs(self.output_test_dir)
+
+        self.folder = os.path.join(self.output_test_dir, "results")
+        self.store = ResultStore(self.folder, nr_results=5, chunk_size=2, logger_level="error")
+
+
+    def tearDown(self):
+        if os.path.isdir(self.output_test_dir):
+            shutil.rmtree(self.output_test_dir)
+
+
+    def result(self, i):
+        return {"TestingModel1d": {"values": np.arange(0, 10) + i,
+                                   "time": np.arange(0, 10)}}
+
+
+    def test_init(self):
+        self.assertEqual(self.store.folder, self.folder)
+        self.assertEqual(self.store.nr_results, 5)
+        self.assertEqual(self.store.chunk_size, 2)
+        self.assertEqual(self.store.nr_chunks, 3)
+        self.assertEqual(len(self.store), 5)
+
+
+    def test_init_error(self):
+        with self.assertRaises(ValueError):
+            ResultStore(self.folder, nr_results=5, chunk_size=0)
+
+
+    def test_chunk_length(self):
+        self.assertEqual(self.store.chunk_length(0), 2)
+        self.assertEqual(self.store.chunk_length(2), 1)
+
+
+    def test_append(self):
+        self.store.append(1, self.result(1))
+        self.assertFalse(os.path.isfile(self.store.filename(0)))
+
+        # A chunk is written when all its results are added
+        self.store.append(0, self.result(0))
+        self.assertTrue(os.path.isfile(self.store.filename(0)))
+        self.assertEqual(self.store._buffers, {})
+
+
+    def test_append_error(self):
+        with self.assertRaises(IndexError):
+            self.store.append(5, self.result(5))
+
+
+    def test_read(self):
+        for i in [4, 2, 0, 3, 1]:
+            self.store.append(i, self.result(i))
+
+        self.assertEqual(len(os.listdir(self.folder)), 3)
+
+        for i, result in enumerate(self.store):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + i))
+
+        self.assertTrue(np.array_equal(self.store[3]["TestingModel1d"]["values"], np.arange(0, 10) + 3))
+        self.assertTrue(np.array_equal(self.store[-1]["TestingModel1d"]["values"], np.arange(0, 10) + 4))
+
+        results = self.store[1:4]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(np.array_equal(results[0]["TestingModel1d"]["values"], np.arange(0, 10) + 1))
+
+        with self.assertRaises(IndexError):
+            self.store[5]
+
+
+    def test_load(self):
+        self.store.append(0, self.result(0))
+        self.store.append(1, self.result(1))
+
+        results = self.store.load(0)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.store._loaded_chunk, 0)
+
+        with self.assertRaises(IOError):
+            self.store.load(1)
+
+
+    def test_flush(self):
+        self.store.append(2, self.result(2))
+        self.store.flush()
+
+        self.assertTrue(os.path.isfile(self.store.filename(1)))
+        self.assertIsNone(self.store[3])
+        self.assertTrue(np.array_equal(self.store[2]["TestingModel1d"]["values"], np.arange(0, 10) + 2))
+
+
+    def test_clear(self):
+        self.store.append(0, self.result(0))
+        self.store.append(1, self.result(1))
+        self.store.clear()
+
+        self.assertFalse(os.path.isdir(self.folder))
+
+        # Clearing a missing store does nothing
+        self.store.clear()
+
+
+    def test_clear_existing_folder(self):
+        filename = os.path.join(self.output_test_dir, "data.h5")
+        with open(filename, "w") as f:
+            f.write("data")
+
+        os.makedirs(os.path.join(self.output_test_dir, "figures"))
+
+        store = ResultStore(self.output_test_dir, nr_results=2, chunk_size=1, logger_level="error")
+        store.append(0, self.result(0))
+        store.append(1, self.result(1))
+        store.clear()
+
+        # Only the chunks are removed from a folder that already existed
+        self.assertEqual(sorted(os.listdir(self.output_test_dir)), ["data.h5", "figures"])
+        self.assertTrue(os.path.isfile(filename))
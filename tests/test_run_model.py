@@ -1,19 +1,23 @@
 import unittest
 import os
 import shutil
+import time
+import types
 import scipy.interpolate
 
 import numpy as np
 import multiprocess as mp
 
 from uncertainpy import Parameters
-from uncertainpy.core import RunModel
+from uncertainpy.core import RunModel, Checkpoint, EvaluationCache, ResultStore, RuntimePredictor
+from uncertainpy.core import ErrorBudgetExceeded
+from uncertainpy.core import SerialExecutor, ThreadExecutor, ProcessExecutor, AsyncExecutor
 from uncertainpy.models import Model
 from uncertainpy.features import Features, SpikingFeatures
 
-from .testing_classes import TestingFeatures, model_function
+from .testing_classes import TestingFeatures, model_function, model_function_batch
 from .testing_classes import TestingModel0d, TestingModel1d, TestingModel2d
-from .testing_classes import TestingModelAdaptive
+from .testing_classes import TestingModelAdaptive, TestingModelSetup, TestingModelAsync
 
 
 
@@ -80,6 +84,1099 @@ class TestRunModel(unittest.TestCase):
 
         self.assertIsNone(runmodel.CPUs)
 
+
+    def test_pool_reused(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        self.runmodel.CPUs = 2
+
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        pool = self.runmodel.executor._pool
+        self.assertIsNotNone(pool)
+
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.assertIs(self.runmodel.executor._pool, pool)
+
+        self.runmodel.close()
+
+
+    def test_close(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        self.runmodel.CPUs = 2
+
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.assertIsNotNone(self.runmodel.executor._pool)
+
+        self.runmodel.close()
+        self.assertIsNone(self.runmodel.executor._pool)
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.assertEqual(len(results), 3)
+
+        self.runmodel.close()
+
+
+    def test_context_manager(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        with RunModel(model=TestingModel1d(),
+                      parameters=self.parameters,
+                      logger_level="error",
+                      CPUs=2) as runmodel:
+            runmodel.evaluate_nodes(nodes, ["a", "b"])
+            self.assertIsNotNone(runmodel.executor._pool)
+
+        self.assertIsNone(runmodel.executor._pool)
+
+
+    def test_pool_restarted_model_changed(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        self.runmodel.CPUs = 2
+
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        pool = self.runmodel.executor._pool
+
+        self.runmodel.model = TestingModel2d()
+        self.runmodel.features = None
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertIsNot(self.runmodel.executor._pool, pool)
+        self.assertEqual(set(results[0].keys()), set(["TestingModel2d"]))
+
+        self.runmodel.close()
+
+
+    def test_set_cpus_closes_pool(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        self.runmodel.CPUs = 2
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        executor = self.runmodel.executor
+
+        self.runmodel.CPUs = 2
+        self.assertIs(self.runmodel.executor, executor)
+        self.assertIsNotNone(executor._pool)
+
+        self.runmodel.CPUs = 3
+        self.assertIsNone(executor._pool)
+        self.assertIsInstance(self.runmodel.executor, ProcessExecutor)
+        self.assertEqual(self.runmodel.executor.nr_workers, 3)
+
+        self.runmodel.CPUs = None
+        self.assertIsInstance(self.runmodel.executor, SerialExecutor)
+
+
+    def test_executor(self):
+        nodes = np.array([np.arange(0, 6), np.arange(1, 7)])
+
+        for executor in [SerialExecutor(), ThreadExecutor(workers=2), ProcessExecutor(CPUs=2)]:
+            self.runmodel.executor = executor
+            self.assertIs(self.runmodel.executor, executor)
+
+            results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+            self.assertEqual(len(results), 6)
+            for i, result in enumerate(results):
+                self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                               np.arange(0, 10) + 2*i + 1))
+
+        self.runmodel.close()
+        self.assertIsNone(executor._pool)
+
+        # Setting CPUs replaces the executor with the default executor
+        self.runmodel.CPUs = None
+        self.assertIsInstance(self.runmodel.executor, SerialExecutor)
+
+
+    def test_init_executor(self):
+        executor = ThreadExecutor(workers=2)
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            executor=executor)
+
+        self.assertIs(runmodel.executor, executor)
+
+
+    def test_timeout_not_supported(self):
+        self.runmodel.executor = ThreadExecutor(workers=2)
+        self.runmodel.timeout = 1
+
+        nodes = np.array([np.arange(0, 2), np.arange(1, 3)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertEqual(len(results), 2)
+
+
+    def test_init_chunksize(self):
+        runmodel = RunModel(model=TestingModel1d(),
+                            parameters=self.parameters,
+                            logger_level="error",
+                            chunksize=5)
+
+        self.assertEqual(runmodel.chunksize, 5)
+
+
+    def test_batch_size_int(self):
+        self.runmodel.chunksize = 5
+
+        self.assertEqual(self.runmodel.batch_size(100), 5)
+        self.assertEqual(self.runmodel.batch_size(100, 10), 5)
+        self.assertEqual(self.runmodel.batch_size(3), 3)
+
+
+    def test_batch_size_error(self):
+        self.runmodel.chunksize = 0
+
+        with self.assertRaises(ValueError):
+            self.runmodel.batch_size(100)
+
+
+    def test_batch_size_auto(self):
+        self.runmodel.CPUs = 2
+        self.runmodel.target_batch_time = 0.1
+
+        # No timing yet
+        self.assertEqual(self.runmodel.batch_size(1000), 1)
+
+        # Cheap model
+        self.assertEqual(self.runmodel.batch_size(1000, 0.001), 100)
+
+        # Limited by the number of remaining evaluations
+        self.assertEqual(self.runmodel.batch_size(80, 0.001), 10)
+
+        # Expensive model
+        self.assertEqual(self.runmodel.batch_size(1000, 10), 1)
+
+
+    def test_evaluate_nodes_chunksize(self):
+        nodes = np.array([np.arange(0, 20), np.arange(1, 21)])
+        self.runmodel.CPUs = 2
+
+        for chunksize in [3, "auto"]:
+            self.runmodel.chunksize = chunksize
+            results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+            self.assertEqual(len(results), 20)
+            for i, result in enumerate(results):
+                self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                               np.arange(0, 10) + 2*i + 1))
+
+        self.runmodel.close()
+
+
+    def test_iterate_nodes_completion_order(self):
+        def slow_model(a, b):
+            if a == 0:
+                time.sleep(1)
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = Model(slow_model, logger_level="error")
+        self.runmodel.CPUs = 2
+        self.runmodel.chunksize = 1
+
+        nodes = np.array([np.arange(0, 6), np.arange(1, 7)])
+
+        indices = []
+        for index, result in self.runmodel.iterate_nodes(nodes, ["a", "b"]):
+            indices.append(index)
+            self.assertTrue(np.array_equal(result["slow_model"]["values"],
+                                           np.arange(0, 10) + 2*index + 1))
+
+        self.assertEqual(sorted(indices), list(range(6)))
+        self.assertEqual(indices[-1], 0)
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["slow_model"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+        self.runmodel.close()
+
+
+    def test_iterate_nodes_sequential(self):
+        self.runmodel.CPUs = None
+        nodes = np.array([np.arange(0, 3), np.arange(1, 4)])
+
+        indices = [index for index, result in self.runmodel.iterate_nodes(nodes, ["a", "b"])]
+
+        self.assertEqual(indices, [0, 1, 2])
+
+
+    def test_evaluate_nodes_checkpoint(self):
+        evaluated = []
+        def counting_model(a, b):
+            evaluated.append((a, b))
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        checkpoint = os.path.join(self.output_test_dir, "counting_model.checkpoint")
+
+        self.runmodel.model = Model(counting_model, logger_level="error")
+        self.runmodel.CPUs = None
+        self.runmodel.checkpoint = checkpoint
+
+        nodes = np.array([np.arange(0, 3), np.arange(1, 4)])
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(len(evaluated), 3)
+        self.assertTrue(os.path.isfile(checkpoint))
+
+        # Only the new nodes are evaluated when resuming
+        del evaluated[:]
+        nodes = np.array([np.arange(0, 5), np.arange(1, 6)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(evaluated, [(3, 4), (4, 5)])
+        self.assertEqual(len(results), 5)
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["counting_model"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_checkpoint_parallel(self):
+        checkpoint = os.path.join(self.output_test_dir, "TestingModel1d.checkpoint")
+
+        self.runmodel.CPUs = 2
+        self.runmodel.checkpoint = checkpoint
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertEqual(len(Checkpoint(checkpoint).load()), 4)
+
+        def failing_model(a, b):
+            raise RuntimeError("The model should not be evaluated")
+
+        self.runmodel.CPUs = None
+        self.runmodel.model = Model(failing_model, logger_level="error")
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_cache(self):
+        self.runmodel.CPUs = None
+        self.runmodel.features = None
+        self.runmodel.cache = os.path.join(self.output_test_dir, "cache")
+
+        self.assertIsInstance(self.runmodel.cache, EvaluationCache)
+
+        nodes = np.array([np.arange(0, 3), np.arange(1, 4)])
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(self.runmodel.cache.hits, 0)
+        self.assertEqual(self.runmodel.cache.misses, 3)
+
+        nodes = np.array([np.arange(0, 5), np.arange(1, 6)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(self.runmodel.cache.hits, 3)
+        self.assertEqual(self.runmodel.cache.misses, 5)
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+        # Changing the features changes the key of the evaluations
+        def feature(time, values):
+            return None, values.mean()
+
+        self.runmodel.features = Features(new_features=[feature], logger_level="error")
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(self.runmodel.cache.hits, 3)
+        self.assertEqual(self.runmodel.cache.misses, 10)
+
+
+    def test_stream_nodes(self):
+        self.runmodel.result_store = os.path.join(self.output_test_dir, "results")
+        self.runmodel.result_chunk_size = 2
+
+        nodes = np.array([np.arange(0, 5), np.arange(1, 6)])
+        results = self.runmodel.stream_nodes(nodes, ["a", "b"])
+
+        self.assertIsInstance(results, ResultStore)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results.nr_chunks, 3)
+        self.assertEqual(results._buffers, {})
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_stream_nodes_error(self):
+        nodes = np.array([np.arange(0, 3), np.arange(1, 4)])
+
+        with self.assertRaises(ValueError):
+            self.runmodel.stream_nodes(nodes, ["a", "b"])
+
+
+    def test_run_result_store(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        features = TestingFeatures(features_to_run=["feature0d",
+                                                    "feature1d",
+                                                    "feature2d",
+                                                    "feature_interpolate"])
+
+        folder = os.path.join(self.output_test_dir, "results")
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 features=features,
+                                 CPUs=1,
+                                 logger_level="error",
+                                 result_store=folder,
+                                 result_chunk_size=2)
+
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assert_testingmodel1d(data)
+        self.assert_feature_0d(data)
+        self.assert_feature_1d(data)
+        self.assert_feature_2d(data)
+        self.assertEqual(len(data["feature_interpolate"].evaluations), 3)
+
+        # The results are removed when the data is created
+        self.assertFalse(os.path.isdir(folder))
+
+        # Other files in the result store folder are kept
+        filename = os.path.join(self.output_test_dir, "data.h5")
+        with open(filename, "w") as f:
+            f.write("data")
+
+        self.runmodel.result_store = self.output_test_dir
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assert_testingmodel1d(data)
+        self.assertEqual(os.listdir(self.output_test_dir), ["data.h5"])
+
+        self.runmodel.close()
+
+
+    def test_run_timings(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        data = self.runmodel.run(nodes, ["a", "b"])
+        self.assertEqual(data.timings, {})
+
+        self.runmodel.CPUs = 2
+        self.runmodel.timings = True
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(data.timings["evaluate"]["count"], 3)
+        self.assertEqual(data.timings["postprocess"]["count"], 3)
+        self.assertEqual(data.timings["feature feature1d"]["count"], 3)
+        self.assertEqual(data.timings["results_to_data"]["count"], 1)
+        self.assertGreaterEqual(data.timings["evaluate"]["wall_max"],
+                                data.timings["evaluate"]["wall_mean"])
+
+        # The timings are reset for each run
+        data = self.runmodel.run(nodes, ["a", "b"])
+        self.assertEqual(data.timings["evaluate"]["count"], 3)
+
+
+    def test_set_time_grid(self):
+        self.runmodel.time_grid = np.arange(0, 15)
+        self.assertTrue(np.array_equal(self.runmodel._parallel.time_grid, np.arange(0, 15)))
+
+        self.runmodel.time_grid = "pilot"
+        self.assertEqual(self.runmodel.time_grid, "pilot")
+        self.assertIsNone(self.runmodel._parallel.time_grid)
+
+        with self.assertRaises(ValueError):
+            self.runmodel.time_grid = "longest"
+
+
+    def test_run_time_grid(self):
+        features = TestingFeatures(features_to_run=["feature0d", "feature_interpolate"],
+                                   interpolate="feature_interpolate")
+
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 features=features,
+                                 CPUs=2,
+                                 logger_level="error",
+                                 time_grid=np.arange(0, 15))
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for result in results:
+            self.assertNotIn("interpolation", result["TestingModelAdaptive"])
+            self.assertEqual(len(result["TestingModelAdaptive"]["values"]), 15)
+
+        data = self.runmodel.results_to_data(results)
+
+        for name in ["TestingModelAdaptive", "feature_interpolate"]:
+            self.assertTrue(np.array_equal(data[name]["time"], np.arange(0, 15)))
+            self.assertTrue(np.allclose(data[name].evaluations[0], np.arange(0, 15) + 1))
+            self.assertTrue(np.allclose(data[name].evaluations[1], np.arange(0, 15) + 3))
+            self.assertTrue(np.allclose(data[name].evaluations[2], np.arange(0, 15) + 5))
+
+        self.runmodel.close()
+
+
+    def test_run_time_grid_pilot(self):
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 logger_level="error",
+                                 time_grid="pilot")
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        # The first node has 11 time points
+        self.assertTrue(np.array_equal(self.runmodel._parallel.time_grid["TestingModelAdaptive"],
+                                       np.arange(0, 11)))
+        self.assertTrue(np.array_equal(data["TestingModelAdaptive"]["time"], np.arange(0, 11)))
+        self.assertEqual(np.shape(data["TestingModelAdaptive"].evaluations), (3, 11))
+        self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[2], np.arange(0, 11) + 5))
+
+        self.runmodel.close()
+
+
+    def test_run_time_grid_pilot_stored(self):
+        for store in ["checkpoint", "cache"]:
+            self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                     parameters=self.parameters,
+                                     CPUs=None,
+                                     logger_level="error",
+                                     time_grid="pilot")
+
+            if store == "checkpoint":
+                self.runmodel.checkpoint = os.path.join(self.output_test_dir, "test.checkpoint")
+            else:
+                self.runmodel.cache = os.path.join(self.output_test_dir, "cache")
+
+            nodes = np.array([[0, 1, 2], [1, 2, 3]])
+            self.runmodel.run(nodes, ["a", "b"])
+
+            # The time grid and the first node are read back, without
+            # evaluating the pilot again
+            def pilot_time_grid(model_parameters):
+                raise RuntimeError("The pilot should not be evaluated")
+
+            self.runmodel.pilot_time_grid = pilot_time_grid
+            data = self.runmodel.run(nodes, ["a", "b"])
+
+            self.assertTrue(np.array_equal(self.runmodel._parallel.time_grid["TestingModelAdaptive"],
+                                           np.arange(0, 11)))
+            self.assertEqual(np.shape(data["TestingModelAdaptive"].evaluations), (3, 11))
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[0], np.arange(0, 11) + 1))
+            self.assertTrue(np.allclose(data["TestingModelAdaptive"].evaluations[2], np.arange(0, 11) + 5))
+
+            self.runmodel.close()
+            shutil.rmtree(self.output_test_dir)
+            os.makedirs(self.output_test_dir)
+
+
+    def test_run_time_grid_pilot_failed(self):
+        def failing_pilot_model(a, b):
+            if a == 0:
+                raise RuntimeError("model error")
+
+            return np.arange(0, 10 + a + b), np.arange(0, 10 + a + b) + a + b
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        self.runmodel = RunModel(model=Model(failing_pilot_model, interpolate=True, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 time_grid="pilot")
+
+        with self.assertRaises(RuntimeError):
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.runmodel.error_budget = 0
+        with self.assertRaises(ErrorBudgetExceeded):
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.runmodel.error_budget = 1
+        self.runmodel.checkpoint = os.path.join(self.output_test_dir, "test.checkpoint")
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertEqual(list(self.runmodel.failed_evaluations), [0])
+        self.assertIn("model error", self.runmodel.failed_evaluations[0]["traceback"])
+        self.assertTrue(np.isnan(results[0]["failing_pilot_model"]["values"]))
+        self.assertTrue(np.array_equal(results[2]["failing_pilot_model"]["values"], np.arange(0, 15) + 5))
+
+        # Neither the failed evaluation nor a time grid is stored
+        self.assertEqual(len(Checkpoint(self.runmodel.checkpoint).load()), 2)
+
+        self.runmodel.close()
+
+
+    def test_evaluate_nodes_setup(self):
+        nodes = np.array([np.arange(0, 8), np.arange(1, 9)])
+
+        model = TestingModelSetup()
+        self.runmodel = RunModel(model=model,
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 chunksize=1,
+                                 logger_level="error")
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        # Each worker sets up its own copy of the model once
+        for result in results:
+            self.assertEqual(result["TestingModelSetup"]["values"][0], 1)
+
+        self.assertEqual(model.nr_setups, 0)
+
+        self.runmodel.CPUs = None
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.assertEqual(model.nr_setups, 1)
+
+        self.runmodel.close()
+        self.assertEqual(model.nr_teardowns, 1)
+
+
+    def test_evaluate_nodes_async(self):
+        nodes = np.array([np.arange(0, 8), np.arange(1, 9)])
+
+        self.runmodel = RunModel(model=TestingModelAsync(),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 logger_level="error")
+
+        self.assertIsInstance(self.runmodel.executor, AsyncExecutor)
+        self.assertEqual(self.runmodel.executor.nr_workers, 32)
+        self.assertIsNone(self.runmodel.executor.feature_workers)
+
+        self.runmodel.max_concurrent = 4
+        self.runmodel.feature_workers = 2
+        self.assertEqual(self.runmodel.executor.nr_workers, 4)
+        self.assertEqual(self.runmodel.executor.feature_workers, 2)
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModelAsync"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+        # Regular models go back to the default executor
+        self.runmodel.model = TestingModel1d()
+        self.assertIsInstance(self.runmodel.executor, ProcessExecutor)
+
+        self.runmodel.close()
+
+
+    def test_evaluate_nodes_longest_first(self):
+        nodes = np.array([np.arange(0, 20), np.arange(1, 21)])
+
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 chunksize=1,
+                                 schedule="longest_first",
+                                 logger_level="error")
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+        self.runmodel.schedule = "random"
+        with self.assertRaises(ValueError):
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.runmodel.close()
+
+
+    def test_iterate_executor_longest_first_lazy(self):
+        nodes = np.array([np.arange(0, 200), np.arange(1, 201)])
+        self.runmodel.CPUs = None
+        self.runmodel.chunksize = 1
+        self.runmodel.schedule = "longest_first"
+
+        nr_read = [0]
+        def tasks():
+            for index, node in enumerate(nodes.T):
+                nr_read[0] += 1
+                yield index, {"a": node[0], "b": node[1]}
+
+        # Only a window of tasks is read ahead of the completed evaluations
+        indices = []
+        for index, result in self.runmodel._iterate_executor(tasks(), nodes, nr_tasks=200):
+            indices.append(index)
+            self.assertLessEqual(nr_read[0] - len(indices), 32 + 2)
+
+        self.assertEqual(sorted(indices), list(range(200)))
+
+
+    def test_longest_first(self):
+        coordinates = np.array([[0.], [1.], [2.], [3.]])
+
+        predictor = RuntimePredictor(nr_neighbours=1)
+        predictor.add([0], 1)
+        predictor.add([3], 10)
+
+        waiting = [(1, {"a": 1}), (2, {"a": 2}), (3, {"a": 3})]
+        waiting = self.runmodel._longest_first(waiting, predictor, coordinates)
+
+        self.assertEqual([index for index, parameters in waiting], [2, 3, 1])
+
+
+    def failing_model(self):
+        def model_function(a=1, b=2):
+            if a >= 6:
+                raise RuntimeError("model error")
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        return Model(model_function, logger_level="error")
+
+
+    def test_run_error_budget(self):
+        nodes = np.array([np.arange(0, 8), np.arange(1, 9)])
+
+        self.runmodel = RunModel(model=self.failing_model(),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 chunksize=2,
+                                 error_budget=0.25,
+                                 logger_level="error")
+
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(sorted(self.runmodel.failed_evaluations), [6, 7])
+        self.assertTrue(np.all(np.isnan(data["model_function"].evaluations[6])))
+        self.assertTrue(np.array_equal(data["model_function"].evaluations[5], np.arange(0, 10) + 11))
+
+        self.assertEqual([failed["index"] for failed in data.failed_evaluations], [6, 7])
+        self.assertEqual(data.failed_evaluations[0]["parameters"]["a"], 6)
+        self.assertIn("model error", data.failed_evaluations[0]["traceback"])
+
+        self.runmodel.close()
+
+
+    def test_format_failed_evaluations(self):
+        failed_evaluations = {7: {"parameters": {"a": np.float64(7), "b": "c"}, "traceback": "error 7"},
+                              np.int64(2): {"parameters": {"a": 2}, "traceback": "error 2"}}
+
+        formatted = RunModel.format_failed_evaluations(failed_evaluations)
+
+        self.assertEqual(formatted, [{"index": 2, "parameters": {"a": 2}, "traceback": "error 2"},
+                                     {"index": 7, "parameters": {"a": 7.0, "b": "c"}, "traceback": "error 7"}])
+        self.assertIsInstance(formatted[0]["index"], int)
+        self.assertIsInstance(formatted[1]["parameters"]["a"], float)
+
+
+    def test_run_error_budget_exceeded(self):
+        nodes = np.array([np.arange(0, 8), np.arange(1, 9)])
+        checkpoint = os.path.join(self.output_test_dir, "test.checkpoint")
+
+        self.runmodel = RunModel(model=self.failing_model(),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 chunksize=1,
+                                 error_budget=1,
+                                 checkpoint=checkpoint,
+                                 logger_level="error")
+
+        with self.assertRaises(ErrorBudgetExceeded) as error:
+            self.runmodel.run(nodes, ["a", "b"])
+
+        self.assertEqual(error.exception.checkpoint, checkpoint)
+        self.assertEqual(sorted(error.exception.failed_evaluations), [6, 7])
+        self.assertIn("resume", str(error.exception))
+
+        # The completed evaluations are saved, but not the failed
+        self.assertEqual(len(Checkpoint(checkpoint, logger_level="error").load()), 6)
+
+        self.runmodel.close()
+
+
+    def test_save_partial(self):
+        self.runmodel.model = self.failing_model()
+        filename = "model_function_partial.checkpoint"
+
+        try:
+            self.assertEqual(self.runmodel._save_partial([({"a": 0, "b": 1}, {"result": 1})]), filename)
+
+            results = Checkpoint(filename, logger_level="error").load()
+            self.assertEqual(list(results.values()), [{"result": 1}])
+        finally:
+            os.remove(filename)
+
+
+    def test_max_failures(self):
+        self.assertIsNone(self.runmodel._max_failures(10))
+
+        self.runmodel.error_budget = 3
+        self.assertEqual(self.runmodel._max_failures(10), 3)
+
+        self.runmodel.error_budget = 0.25
+        self.assertEqual(self.runmodel._max_failures(10), 2)
+
+        for error_budget in [-1, 1.5, True]:
+            self.runmodel.error_budget = error_budget
+            with self.assertRaises(ValueError):
+                self.runmodel._max_failures(10)
+
+
+    def test_threads_per_worker(self):
+        self.assertEqual(self.runmodel.threads_per_worker(2), max(1, mp.cpu_count()//2))
+        self.assertEqual(self.runmodel.threads_per_worker(10*mp.cpu_count()), 1)
+
+        self.runmodel.worker_threads = 3
+        self.assertEqual(self.runmodel.threads_per_worker(2), 3)
+
+        self.runmodel.worker_threads = None
+        self.assertIsNone(self.runmodel.threads_per_worker(2))
+
+
+    def test_evaluate_nodes_worker_threads(self):
+        def threads_model(a, b):
+            return np.arange(0, 2), np.array([int(os.environ.get("OMP_NUM_THREADS", -1)),
+                                              len(os.sched_getaffinity(0))])
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+        omp_num_threads = os.environ.get("OMP_NUM_THREADS")
+
+        self.runmodel = RunModel(model=Model(threads_model, logger_level="error"),
+                                 parameters=self.parameters,
+                                 CPUs=2,
+                                 worker_threads=3,
+                                 pin_workers="core",
+                                 logger_level="error")
+
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for result in results:
+            self.assertEqual(result["threads_model"]["values"][0], 3)
+            self.assertEqual(result["threads_model"]["values"][1], 1)
+
+        # The threads are limited in the current process only while the
+        # model is evaluated
+        self.runmodel.executor = ThreadExecutor(workers=2)
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        for result in results:
+            self.assertEqual(result["threads_model"]["values"][0], 3)
+
+        self.assertEqual(os.environ.get("OMP_NUM_THREADS"), omp_num_threads)
+
+        self.runmodel.pin_workers = "socket"
+        with self.assertRaises(ValueError):
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.runmodel.close()
+
+
+    def test_run_shared_buffers(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        features = TestingFeatures(features_to_run=["feature0d",
+                                                    "feature1d",
+                                                    "feature2d"])
+
+        self.runmodel = RunModel(model=TestingModel1d(),
+                                 parameters=self.parameters,
+                                 features=features,
+                                 CPUs=2,
+                                 chunksize=1,
+                                 logger_level="error",
+                                 shared_buffers=True)
+
+        data = self.runmodel.run(nodes, ["a", "b"])
+
+        self.assert_testingmodel1d(data)
+        self.assert_feature_0d(data)
+        self.assert_feature_1d(data)
+        self.assert_feature_2d(data)
+
+        # The regular results are stored in a single array
+        self.assertIsInstance(data["TestingModel1d"].evaluations, np.ndarray)
+        self.assertEqual(data["TestingModel1d"].evaluations.shape, (3, 10))
+        self.assertEqual(data["feature2d"].evaluations.shape, (3, 2, 10))
+
+        # The buffers are removed after the data is created
+        self.assertIsNone(self.runmodel._buffers)
+
+        self.runmodel.close()
+
+
+    def assert_shared_buffers_stored(self, option):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        for CPUs in [None, 2]:
+            self.runmodel = RunModel(model=TestingModel1d(),
+                                     parameters=self.parameters,
+                                     features=TestingFeatures(features_to_run=["feature1d"]),
+                                     CPUs=CPUs,
+                                     chunksize=1,
+                                     logger_level="error",
+                                     shared_buffers=True)
+
+            setattr(self.runmodel, option, os.path.join(self.output_test_dir, option))
+
+            data = self.runmodel.run(nodes, ["a", "b"])
+            self.assert_testingmodel1d(data)
+
+            # The stored results are copies of the values in the buffers
+            if option == "checkpoint":
+                stored = list(Checkpoint(self.runmodel.checkpoint).load().values())
+            elif option == "cache":
+                stored = [self.runmodel.cache.get(os.path.splitext(name)[0])
+                          for name in os.listdir(self.runmodel.cache.folder)]
+            else:
+                stored = []
+
+            for result in stored:
+                self.assertNotIsInstance(result["TestingModel1d"]["values"], np.memmap)
+                self.assertEqual(len(result["TestingModel1d"]["values"]), 10)
+
+            # A second run reads the stored results
+            data = self.runmodel.run(nodes, ["a", "b"])
+            self.assert_testingmodel1d(data)
+
+            self.runmodel.close()
+
+            shutil.rmtree(self.output_test_dir)
+            os.makedirs(self.output_test_dir)
+
+
+    def test_run_shared_buffers_checkpoint(self):
+        self.assert_shared_buffers_stored("checkpoint")
+
+
+    def test_run_shared_buffers_cache(self):
+        self.assert_shared_buffers_stored("cache")
+
+
+    def test_run_shared_buffers_result_store(self):
+        self.assert_shared_buffers_stored("result_store")
+
+
+    def test_evaluate_nodes_shared_buffers_irregular(self):
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 CPUs=None,
+                                 logger_level="error",
+                                 shared_buffers=True)
+
+        self.runmodel.model.interpolate = False
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        # Only the first result fits in the buffer
+        self.assertTrue(self.runmodel._buffers.is_buffered("TestingModelAdaptive",
+                                                           results[0]["TestingModelAdaptive"]["values"]))
+        self.assertFalse(self.runmodel._buffers.is_buffered("TestingModelAdaptive",
+                                                            results[1]["TestingModelAdaptive"]["values"]))
+
+        data = self.runmodel.results_to_data(results)
+
+        self.assertEqual(data.error, ["TestingModelAdaptive"])
+        self.assertTrue(np.array_equal(data["TestingModelAdaptive"].evaluations[2], np.arange(0, 15) + 5))
+
+        self.runmodel.close()
+        self.assertIsNone(self.runmodel._buffers)
+
+
+    def test_evaluate_nodes_cache_parallel(self):
+        self.runmodel.CPUs = 2
+        self.runmodel.cache = os.path.join(self.output_test_dir, "cache")
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+        self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertEqual(self.runmodel.cache.hits, 4)
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_timeout(self):
+        def hanging_model(a, b):
+            if a == 0:
+                time.sleep(10)
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = Model(hanging_model, logger_level="error")
+        self.runmodel.features = None
+        self.runmodel.CPUs = 2
+        self.runmodel.timeout = 1
+        self.runmodel.checkpoint = os.path.join(self.output_test_dir, "test.checkpoint")
+        self.runmodel.cache = os.path.join(self.output_test_dir, "cache")
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+
+        start = time.time()
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertLess(time.time() - start, 10)
+
+        self.assertTrue(np.isnan(results[0]["hanging_model"]["values"]))
+        self.assertIsInstance(results[0]["hanging_model"]["interpolation"], str)
+        for i in range(1, 4):
+            self.assertTrue(np.array_equal(results[i]["hanging_model"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+        # The timed out evaluation is a failed evaluation, and is neither
+        # stored in the checkpoint nor in the cache
+        self.assertEqual(list(self.runmodel.failed_evaluations), [0])
+        self.assertEqual(self.runmodel.failed_evaluations[0]["parameters"], {"a": 0, "b": 1})
+        self.assertIn("timed out", self.runmodel.failed_evaluations[0]["traceback"])
+
+        completed = Checkpoint(self.runmodel.checkpoint).load()
+        self.assertEqual(len(completed), 3)
+        self.assertNotIn(Checkpoint.key({"a": 0, "b": 1}), completed)
+        self.assertEqual(len(self.runmodel.cache._entries()), 3)
+
+
+    def test_evaluate_nodes_timeout_error_budget(self):
+        def hanging_model(a, b):
+            if a < 2:
+                time.sleep(10)
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = Model(hanging_model, logger_level="error")
+        self.runmodel.features = None
+        self.runmodel.CPUs = 2
+        self.runmodel.timeout = 1
+        self.runmodel.error_budget = 1
+        self.runmodel.checkpoint = os.path.join(self.output_test_dir, "test.checkpoint")
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+
+        with self.assertRaises(ErrorBudgetExceeded) as error:
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.runmodel.close()
+
+        self.assertEqual(sorted(error.exception.failed_evaluations), [0, 1])
+
+
+    def test_evaluate_nodes_timeout_retries(self):
+        marker = os.path.join(self.output_test_dir, "hanged")
+
+        def hanging_once_model(a, b):
+            if a == 0 and not os.path.isfile(marker):
+                open(marker, "w").close()
+                time.sleep(10)
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = Model(hanging_once_model, logger_level="error")
+        self.runmodel.features = None
+        self.runmodel.CPUs = 2
+        self.runmodel.timeout = 1
+        self.runmodel.retries = 1
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertTrue(os.path.isfile(marker))
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["hanging_once_model"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_timeout_slow_setup(self):
+        class SlowSetupModel(Model):
+            def setup(self):
+                time.sleep(2)
+
+        def quick_model(a, b):
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = SlowSetupModel(quick_model, logger_level="error")
+        self.runmodel.features = None
+        self.runmodel.CPUs = 2
+        self.runmodel.timeout = 1
+
+        # The timeout is measured from when each evaluation starts, so the
+        # time used to set up the model is not counted
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.runmodel.close()
+
+        self.assertEqual(self.runmodel.failed_evaluations, {})
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["quick_model"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_error_terminates(self):
+        def failing_model(a, b):
+            if a == 0:
+                raise RuntimeError("model error")
+
+            time.sleep(10)
+
+            return np.arange(0, 10), np.arange(0, 10) + a + b
+
+        self.runmodel.model = Model(failing_model, logger_level="error")
+        self.runmodel.features = None
+        self.runmodel.CPUs = 2
+
+        nodes = np.array([np.arange(0, 4), np.arange(1, 5)])
+
+        # The evaluations that are still running are stopped when the error
+        # is raised
+        start = time.time()
+        with self.assertRaises(RuntimeError):
+            self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+        self.assertLess(time.time() - start, 10)
+        self.assertIsNone(self.runmodel.executor._pool)
+
+
+    def test_max_tasks_per_worker(self):
+        self.runmodel.CPUs = 2
+        executor = self.runmodel.executor
+
+        self.runmodel.max_tasks_per_worker = 1
+        self.assertIsNot(self.runmodel.executor, executor)
+        self.assertEqual(self.runmodel.executor.max_tasks_per_worker, 1)
+
+        nodes = np.array([np.arange(0, 6), np.arange(1, 7)])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        self.assertEqual(self.runmodel.executor._pool._maxtasksperchild, 1)
+        self.runmodel.close()
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"],
+                                           np.arange(0, 10) + 2*i + 1))
+
+
+    def test_evaluate_nodes_run_batch(self):
+        self.runmodel.model = Model(run=model_function,
+                                    run_batch=model_function_batch,
+                                    logger_level="error")
+
+        nodes = np.array([np.arange(0, 10), np.arange(1, 11)])
+
+        for CPUs, chunksize in [(None, "auto"), (None, 3), (2, "auto"), (2, 4)]:
+            self.runmodel.CPUs = CPUs
+            self.runmodel.chunksize = chunksize
+
+            results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+
+            self.assertEqual(len(results), 10)
+            for i, result in enumerate(results):
+                self.assertTrue(np.array_equal(result["model_function"]["values"],
+                                               np.arange(0, 10) + 2*i + 1))
+                self.assertEqual(result["feature0d"]["values"], 1)
+
+        self.runmodel.close()
+
+
     def test_set_feature(self):
         self.runmodel.features = Features(logger_level="error")
         self.assertIsInstance(self.runmodel._features, Features)
@@ -247,6 +1344,64 @@ class TestRunModel(unittest.TestCase):
         self.assertEqual(result, [{"a": 0, "b": 2}, {"a": 1, "b": 2}, {"a": 2, "b": 2}])
 
 
+    def test_fixed_parameters(self):
+        self.assertEqual(self.runmodel.fixed_parameters(["a"]), {"b": 2})
+        self.assertEqual(self.runmodel.fixed_parameters(["a", "b"]), {})
+
+
+    def test_iterate_model_parameters(self):
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+
+        result = self.runmodel.iterate_model_parameters(nodes, ["a", "b"])
+
+        self.assertIsInstance(result, types.GeneratorType)
+        self.assertEqual(list(result), [{"a": 0, "b": 1}, {"a": 1, "b": 2}, {"a": 2, "b": 3}])
+
+        result = self.runmodel.iterate_model_parameters(np.array([0, 1, 2]), ["a"])
+
+        self.assertEqual(list(result), [{"a": 0}, {"a": 1}, {"a": 2}])
+
+
+    def test_evaluate_nodes_fixed_parameters(self):
+        batches = []
+
+        class RecordingExecutor(SerialExecutor):
+            def submit(self, batch, callback, buffers=None):
+                batches.extend(batch)
+                super(RecordingExecutor, self).submit(batch, callback, buffers=buffers)
+
+        self.runmodel.executor = RecordingExecutor()
+
+        nodes = np.array([0, 1, 2])
+        results = self.runmodel.evaluate_nodes(nodes, ["a"])
+
+        # Only the uncertain parameters are sent with each evaluation
+        self.assertEqual(sorted(batches, key=lambda task: task[0]),
+                         [(0, {"a": 0}), (1, {"a": 1}), (2, {"a": 2})])
+        self.assertEqual(self.runmodel._parallel.fixed_parameters, {"b": 2})
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + i + 2))
+
+
+
+    def test_evaluate_nodes_fixed_parameters_reuse_pool(self):
+        self.runmodel.CPUs = 2
+
+        nodes = np.array([0, 1, 2])
+        results = self.runmodel.evaluate_nodes(nodes, ["a"])
+        pool = self.runmodel.executor._pool
+
+        # The fixed parameters change, but the worker processes are reused
+        results = self.runmodel.evaluate_nodes(nodes, ["b"])
+
+        self.assertIs(self.runmodel.executor._pool, pool)
+
+        for i, result in enumerate(results):
+            self.assertTrue(np.array_equal(result["TestingModel1d"]["values"], np.arange(0, 10) + i + 1))
+
+        self.runmodel.close()
+
 
     def test_evaluate_nodes_sequential_model_0d(self):
         nodes = np.array([[0, 1, 2], [1, 2, 3]])
@@ -706,6 +1861,38 @@ class TestRunModel(unittest.TestCase):
 
 
 
+    def test_results_to_data_nan_result(self):
+        features = TestingFeatures(features_to_run=["feature0d",
+                                                    "feature1d",
+                                                    "feature_interpolate"],
+                                   interpolate=["feature_interpolate"])
+
+        self.runmodel = RunModel(model=TestingModelAdaptive(),
+                                 parameters=self.parameters,
+                                 features=features,
+                                 logger_level="critical",
+                                 CPUs=None)
+
+        nodes = np.array([[0, 1, 2], [1, 2, 3]])
+        results = self.runmodel.evaluate_nodes(nodes, ["a", "b"])
+        results[0] = self.runmodel._nan_result("Model evaluation 0 timed out")
+
+        data = self.runmodel.results_to_data(results)
+
+        self.assertEqual(set(data.keys()),
+                         set(["TestingModelAdaptive", "feature0d", "feature1d", "feature_interpolate"]))
+
+        for feature in ["TestingModelAdaptive", "feature_interpolate"]:
+            self.assertTrue(np.isnan(data[feature].evaluations[0]))
+            self.assertEqual(len(data[feature].time), 15)
+            self.assertEqual(len(data[feature].evaluations[1]), 15)
+
+        self.assertTrue(np.array_equal(data["feature1d"].time, np.arange(0, 10)))
+        self.assertTrue(np.isnan(data["feature1d"].evaluations[0]))
+        self.assertTrue(np.array_equal(data["feature1d"].evaluations[1], np.arange(0, 10)))
+        self.assertTrue(np.isnan(data["feature0d"].evaluations[0]))
+
+
     # def test_results_to_datainterpolateError(self):
     #     self.runmodel = RunModel(TestingModelAdaptive(interpolate=True),
     #                              features=TestingFeatures(),
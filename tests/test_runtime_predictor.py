@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from uncertainpy.core import RuntimePredictor
+
+
+
+class TestRuntimePredictor(unittest.TestCase):
+    def setUp(self):
+        self.predictor = RuntimePredictor(nr_neighbours=2, scale=[10, 1])
+
+        self.predictor.add([0, 0], 1)
+        self.predictor.add([1, 0], 1)
+        self.predictor.add([9, 1], 100)
+        self.predictor.add([10, 1], 10000)
+
+
+    def test_init(self):
+        predictor = RuntimePredictor(scale=[2, 0])
+
+        self.assertEqual(predictor.nr_neighbours, 5)
+        self.assertTrue(np.array_equal(predictor.scale, [2, np.inf]))
+        self.assertEqual(len(predictor), 0)
+        self.assertEqual(len(self.predictor), 4)
+
+
+    def test_predict(self):
+        runtimes = self.predictor.predict([[0.5, 0], [9.5, 1]])
+
+        self.assertTrue(np.allclose(runtimes, [1, 1000]))
+
+
+    def test_predict_chunks(self):
+        coordinates = np.random.uniform(0, 10, (50, 2))
+
+        self.assertTrue(np.allclose(self.predictor.predict(coordinates, chunk_size=7),
+                                    self.predictor.predict(coordinates)))
+
+
+    def test_predict_scale(self):
+        # Without scaling the first coordinate decides the nearest nodes
+        predictor = RuntimePredictor(nr_neighbours=1)
+        predictor.add([0, 0], 1)
+        predictor.add([2, 1], 2)
+
+        self.assertTrue(np.allclose(predictor.predict([[0, 1]]), [1]))
+
+        predictor = RuntimePredictor(nr_neighbours=1, scale=[10, 1])
+        predictor.add([0, 0], 1)
+        predictor.add([2, 1], 2)
+
+        self.assertTrue(np.allclose(predictor.predict([[0, 1]]), [2]))
+
+
+    def test_predict_empty(self):
+        runtimes = RuntimePredictor().predict(np.zeros((3, 2)))
+
+        self.assertEqual(len(runtimes), 3)
+        self.assertTrue(np.all(np.isnan(runtimes)))
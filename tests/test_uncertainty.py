@@ -15,7 +15,7 @@ from uncertainpy import UncertaintyQuantification
 from uncertainpy.parameters import Parameters
 from uncertainpy.features import Features
 from uncertainpy import uniform, normal
-from uncertainpy.core import UncertaintyCalculations
+from uncertainpy.core import UncertaintyCalculations, EvaluationCache
 from uncertainpy import Data
 from uncertainpy import Model
 from uncertainpy import SpikingFeatures
@@ -84,6 +84,24 @@ class TestUncertainty(TestCasePlot):
         self.assertEqual(uncertainty.uncertainty_calculations.runmodel.CPUs, 34)
 
 
+    def test_init_chunksize(self):
+        uncertainty = UncertaintyQuantification(model=self.model,
+                                                parameters=self.parameters,
+                                                logger_level="error",
+                                                chunksize=7)
+
+        self.assertEqual(uncertainty.uncertainty_calculations.runmodel.chunksize, 7)
+
+
+    def test_init_cache(self):
+        uncertainty = UncertaintyQuantification(model=self.model,
+                                                parameters=self.parameters,
+                                                logger_level="error",
+                                                cache=os.path.join(self.output_test_dir, "cache"))
+
+        self.assertIsInstance(uncertainty.uncertainty_calculations.runmodel.cache, EvaluationCache)
+
+
     def test_init_parameter_list(self):
         uncertainty = UncertaintyQuantification(self.model,
                                                 self.parameter_list,
@@ -827,7 +845,9 @@ class TestUncertainty(TestCasePlot):
                                          nr_collocation_nodes=50,
                                          quadrature_order=3,
                                          nr_pc_mc_samples=10**3,
-                                         allow_incomplete=False)
+                                         allow_incomplete=False,
+                                         tolerance=10**-2,
+                                         max_evaluations=100)
 
 
         self.assertEqual(self.uncertainty.data.arguments["function"], "PC")
@@ -850,6 +870,8 @@ class TestUncertainty(TestCasePlot):
         self.assertEqual(data.arguments["quadrature_order"], 3)
         self.assertEqual(data.arguments["nr_pc_mc_samples"],10**3)
         self.assertEqual(data.arguments["allow_incomplete"], False)
+        self.assertEqual(data.arguments["tolerance"], 10**-2)
+        self.assertEqual(data.arguments["max_evaluations"], 100)
         self.assertEqual(data.arguments["seed"], self.seed)
 
 
@@ -1474,6 +1496,75 @@ class TestUncertainty(TestCasePlot):
         self.assertEqual(data.arguments["nr_samples"], self.nr_mc_samples)
 
 
+    def test_quantify_checkpoint(self):
+        data = self.uncertainty.quantify(method="mc",
+                                         nr_mc_samples=self.nr_mc_samples,
+                                         data_folder=self.output_test_dir,
+                                         plot=None,
+                                         seed=self.seed,
+                                         checkpoint=True)
+
+        checkpoint = os.path.join(self.output_test_dir, "TestingModel1d.checkpoint")
+
+        self.assertFalse(os.path.isfile(checkpoint))
+        self.assertIsNone(self.uncertainty.uncertainty_calculations.runmodel.checkpoint)
+
+        data_no_checkpoint = self.uncertainty.quantify(method="mc",
+                                                       nr_mc_samples=self.nr_mc_samples,
+                                                       data_folder=self.output_test_dir,
+                                                       plot=None,
+                                                       seed=self.seed)
+
+        self.assertTrue(np.array_equal(data["TestingModel1d"].evaluations,
+                                       data_no_checkpoint["TestingModel1d"].evaluations))
+
+
+    def test_quantify_keep_checkpoint(self):
+        checkpoint = os.path.join(self.output_test_dir, "user.checkpoint")
+        self.uncertainty.uncertainty_calculations.runmodel.checkpoint = checkpoint
+
+        self.uncertainty.quantify(method="mc",
+                                  nr_mc_samples=self.nr_mc_samples,
+                                  data_folder=self.output_test_dir,
+                                  plot=None,
+                                  seed=self.seed)
+
+        self.assertEqual(self.uncertainty.uncertainty_calculations.runmodel.checkpoint, checkpoint)
+        self.assertTrue(os.path.isfile(checkpoint))
+
+        self.uncertainty.quantify(method="mc",
+                                  nr_mc_samples=self.nr_mc_samples,
+                                  data_folder=self.output_test_dir,
+                                  plot=None,
+                                  seed=self.seed,
+                                  checkpoint=True)
+
+        self.assertEqual(self.uncertainty.uncertainty_calculations.runmodel.checkpoint, checkpoint)
+        self.assertFalse(os.path.isfile(os.path.join(self.output_test_dir, "TestingModel1d.checkpoint")))
+
+
+    def test_quantify_timing_report(self):
+        data = self.uncertainty.quantify(method="mc",
+                                         nr_mc_samples=self.nr_mc_samples,
+                                         data_folder=self.output_test_dir,
+                                         plot=None,
+                                         seed=self.seed,
+                                         timing_report=True)
+
+        self.assertIn("evaluate", data.timings)
+        self.assertIn("analyse TestingModel1d", data.timings)
+        self.assertFalse(self.uncertainty.uncertainty_calculations.runmodel.timings)
+
+        loaded_data = Data(os.path.join(self.output_test_dir, "TestingModel1d.h5"))
+        self.assertEqual(loaded_data.timings, data.timings)
+
+        # The timings are turned off again when the quantification fails
+        with self.assertRaises(ValueError):
+            self.uncertainty.quantify(method="not_existing", timing_report=True)
+
+        self.assertFalse(self.uncertainty.uncertainty_calculations.runmodel.timings)
+
+
     def test_quantify_custom(self):
         self.set_up_test_calculations()
 
@@ -10,7 +10,7 @@ import chaospy as cp
 import numpoly
 import multiprocess as mp
 
-from uncertainpy.core import UncertaintyCalculations
+from uncertainpy.core import UncertaintyCalculations, ExpansionCache
 from uncertainpy.parameters import Parameters
 from uncertainpy.features import Features
 from uncertainpy import uniform, normal
@@ -95,6 +95,18 @@ class TestUncertaintyCalculations(unittest.TestCase):
 
         self.assertIsNone(uncertainty_calculations.runmodel.CPUs)
 
+
+    def test_close(self):
+        with UncertaintyCalculations(model=self.model,
+                                     parameters=self.parameters,
+                                     logger_level="error",
+                                     CPUs=2) as uncertainty_calculations:
+            executor = uncertainty_calculations.runmodel.executor
+            self.assertIsNotNone(executor.pool)
+
+        self.assertIsNone(executor._pool)
+
+
     def test_intit_features(self):
         uncertainty_calculations = UncertaintyCalculations(model=self.model,
                                                            logger_level="error")
@@ -296,6 +308,16 @@ class TestUncertaintyCalculations(unittest.TestCase):
         self.assertTrue(np.all(mask))
 
 
+    def test_create_mask_array(self):
+        evaluations = np.array([np.arange(0, 10), np.arange(0, 10) + 1, np.arange(0, 10) + 2], dtype=float)
+        evaluations[1, 3] = np.nan
+
+        masked_evaluations, mask = self.uncertainty_calculations.create_mask(evaluations)
+
+        self.assertTrue(np.array_equal(mask, [True, False, True]))
+        self.assertTrue(np.array_equal(masked_evaluations, evaluations[[0, 2]]))
+
+
     def test_create_masked_evaluations(self):
         nodes = np.array([[0, 1, 2], [1, 2, 3]])
         uncertain_parameters = ["a", "b"]
@@ -786,6 +808,47 @@ class TestUncertaintyCalculations(unittest.TestCase):
         self.assertIsInstance(U_hat["TestingModel1d"], numpoly.ndpoly)
 
 
+    def test_create_PCE_collocation_expansion_cache(self):
+        folder = os.path.join(self.output_test_dir, "expansion_cache")
+
+        uncertainty_calculations = UncertaintyCalculations(model=self.model,
+                                                           parameters=self.parameters,
+                                                           features=self.features,
+                                                           logger_level="error",
+                                                           expansion_cache=folder)
+
+        self.assertIsInstance(uncertainty_calculations.expansion_cache, ExpansionCache)
+
+        U_hat, distribution, data = uncertainty_calculations.create_PCE_collocation()
+        U_hat_cached, distribution, data = uncertainty_calculations.create_PCE_collocation()
+
+        self.assertEqual(uncertainty_calculations.expansion_cache.misses, 1)
+        self.assertEqual(uncertainty_calculations.expansion_cache.hits, 1)
+
+        samples = distribution.sample(5)
+        self.assertTrue(np.allclose(U_hat["feature1d"](*samples), U_hat_cached["feature1d"](*samples)))
+
+
+    def test_create_PCE_spectral_expansion_cache(self):
+        folder = os.path.join(self.output_test_dir, "expansion_cache")
+
+        uncertainty_calculations = UncertaintyCalculations(model=self.model,
+                                                           parameters=self.parameters,
+                                                           features=self.features,
+                                                           logger_level="error",
+                                                           expansion_cache=folder)
+
+        uncertainty_calculations.create_PCE_spectral()
+        uncertainty_calculations.create_PCE_spectral_rosenblatt()
+
+        self.assertEqual(uncertainty_calculations.expansion_cache.misses, 4)
+
+        uncertainty_calculations.create_PCE_spectral()
+        uncertainty_calculations.create_PCE_spectral_rosenblatt()
+
+        self.assertEqual(uncertainty_calculations.expansion_cache.hits, 4)
+
+
     def test_create_PCE_collocation_all_no_multiprocessing(self):
         uncertainty_calculations = UncertaintyCalculations(model=self.model,
                                                            parameters=self.parameters,
@@ -1190,6 +1253,103 @@ class TestUncertaintyCalculations(unittest.TestCase):
 
 
 
+    def test_create_PCE_adaptive(self):
+        U_hat, distribution, data = self.uncertainty_calculations.create_PCE_adaptive()
+
+        self.assertEqual(data.uncertain_parameters, ["a", "b"])
+        self.assertIsInstance(U_hat["feature0d"], numpoly.ndpoly)
+        self.assertIsInstance(U_hat["feature1d"], numpoly.ndpoly)
+        self.assertIsInstance(U_hat["feature2d"], numpoly.ndpoly)
+        self.assertIsInstance(U_hat["TestingModel1d"], numpoly.ndpoly)
+
+        # The model is linear, so the first order is exact
+        self.assertIn("adaptive point collocation", data.method)
+        self.assertIn("polynomial_order=1,", data.method)
+        self.assertEqual(len(data["TestingModel1d"].evaluations), 8)
+
+        samples = distribution.sample(5)
+        self.assertTrue(np.allclose(U_hat["TestingModel1d"](*samples),
+                                    np.arange(0, 10)[:, np.newaxis] + samples[0] + samples[1]))
+
+
+    def test_create_PCE_adaptive_one(self):
+        U_hat, distribution, data = self.uncertainty_calculations.create_PCE_adaptive("a")
+
+        self.assertEqual(data.uncertain_parameters, ["a"])
+        self.assertIsInstance(U_hat["TestingModel1d"], numpoly.ndpoly)
+        self.assertEqual(len(data["TestingModel1d"].evaluations), 6)
+
+
+    def test_create_PCE_adaptive_reuse(self):
+        U_hat, distribution, data = \
+            self.uncertainty_calculations.create_PCE_adaptive(polynomial_order=3,
+                                                              tolerance=0)
+
+        # The nodes of the lower orders are reused, so only the nodes of the
+        # third order (2*10 + 2) are evaluated
+        self.assertEqual(len(data["TestingModel1d"].evaluations), 22)
+        self.assertIn("nr_collocation_nodes=22,", data.method)
+
+        nodes = distribution.sample(22, "H")
+        model = TestingModel1d()
+        for node, evaluation in zip(nodes.T, data["TestingModel1d"].evaluations):
+            self.assertTrue(np.allclose(model.run(*node)[1], evaluation))
+
+
+    def test_create_PCE_adaptive_max_evaluations(self):
+        U_hat, distribution, data = \
+            self.uncertainty_calculations.create_PCE_adaptive(polynomial_order=5,
+                                                              tolerance=0,
+                                                              max_evaluations=15)
+
+        self.assertEqual(len(data["TestingModel1d"].evaluations), 15)
+        self.assertIsInstance(U_hat["TestingModel1d"], numpoly.ndpoly)
+
+        with self.assertRaises(ValueError):
+            self.uncertainty_calculations.create_PCE_adaptive(max_evaluations=3)
+
+
+    def test_create_PCE_adaptive_rosenblatt_dependent(self):
+        a = cp.Uniform(1, 2)
+        b = cp.Uniform(1, 2) + a
+
+        parameter_dict = {"a": a, "b": b}
+
+        self.uncertainty_calculations.parameters = Parameters(parameter_dict)
+
+        U_hat, distribution, data = \
+            self.uncertainty_calculations.create_PCE_adaptive(rosenblatt=True)
+
+        self.assertEqual(data.uncertain_parameters, ["a", "b"])
+        self.assertIn("Rosenblatt", data.method)
+        self.assertIsInstance(U_hat["feature0d"], numpoly.ndpoly)
+        self.assertIsInstance(U_hat["TestingModel1d"], numpoly.ndpoly)
+
+
+    def test_create_PCE_adaptive_incomplete(self):
+        uncertainty_calculations = UncertaintyCalculations(model=TestingModelIncomplete(),
+                                                           parameters=self.parameters,
+                                                           features=None,
+                                                           logger_level="error")
+
+        U_hat, distribution, data = uncertainty_calculations.create_PCE_adaptive(allow_incomplete=False)
+
+        self.assertEqual(U_hat, {})
+        self.assertEqual(data.incomplete, ["TestingModelIncomplete"])
+
+
+    def test_polynomial_chaos_adaptive(self):
+        data = self.uncertainty_calculations.polynomial_chaos(method="adaptive",
+                                                              polynomial_order=3,
+                                                              tolerance=10**-3,
+                                                              seed=self.seed)
+
+        self.assertIn("adaptive point collocation", data.method)
+        self.assertTrue(np.allclose(data["TestingModel1d"].mean, np.arange(0, 10) + 3))
+        self.assertIsNotNone(data["TestingModel1d"].sobol_first)
+        self.assertIsNotNone(data["feature1d"].percentile_95)
+
+
     def test_polynomial_chaos_spectral(self):
         features = TestingFeatures(features_to_run=["feature0d_var",
                                                     "feature1d_var",
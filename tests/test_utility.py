@@ -1,8 +1,11 @@
+import os
 import numpy as np
 import unittest
 
 from uncertainpy.utils import lengths, none_to_nan, contains_nan
-from uncertainpy.utils import is_regular, set_nan
+from uncertainpy.utils import is_regular, set_nan, Timer
+from uncertainpy.utils import limit_threads, restore_threads, thread_limits, pin_process
+from uncertainpy.utils.threads import thread_variables, cpu_sets, parse_cpulist
 
 
 class TestLengths(unittest.TestCase):
@@ -615,3 +618,129 @@ class TestIsRegular(unittest.TestCase):
     #     self.assertTrue(np.isnan(result[0]))
     #     self.assertTrue(np.isnan(result[1][0]))
     #     self.assertTrue(np.array_equal(result[1][1], [1, 2, 3]))
+
+
+
+class TestTimer(unittest.TestCase):
+    def test_stage(self):
+        timer = Timer()
+
+        with timer.stage("evaluate"):
+            sum(range(1000))
+
+        self.assertEqual(len(timer.samples["evaluate"]), 1)
+        wall, cpu = timer.samples["evaluate"][0]
+        self.assertGreaterEqual(wall, 0)
+        self.assertGreaterEqual(cpu, 0)
+
+
+    def test_stage_error(self):
+        timer = Timer()
+
+        with self.assertRaises(ValueError):
+            with timer.stage("evaluate"):
+                raise ValueError
+
+        self.assertEqual(len(timer.samples["evaluate"]), 1)
+
+
+    def test_merge(self):
+        timer = Timer()
+        timer.add("evaluate", 1, 0.5)
+
+        other = Timer()
+        other.add("evaluate", 3, 1.5)
+        other.add("postprocess", 2, 2)
+
+        timer.merge(other)
+
+        self.assertEqual(timer.samples["evaluate"], [(1, 0.5), (3, 1.5)])
+        self.assertEqual(timer.samples["postprocess"], [(2, 2)])
+
+
+    def test_summary(self):
+        timer = Timer()
+        timer.add("evaluate", 1, 0.5)
+        timer.add("evaluate", 3, 1.5)
+
+        summary = timer.summary()
+
+        self.assertEqual(summary, {"evaluate": {"count": 2,
+                                                "wall_total": 4,
+                                                "wall_mean": 2,
+                                                "wall_max": 3,
+                                                "cpu_total": 2,
+                                                "cpu_mean": 1}})
+
+        timer.clear()
+        self.assertEqual(timer.summary(), {})
+
+
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+        self.environment = {name: os.environ.get(name) for name in thread_variables}
+
+
+    def tearDown(self):
+        for name, value in self.environment.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+    def test_limit_restore_threads(self):
+        os.environ["OMP_NUM_THREADS"] = "8"
+        os.environ.pop("MKL_NUM_THREADS", None)
+
+        state = limit_threads(2)
+
+        for name in thread_variables:
+            self.assertEqual(os.environ[name], "2")
+
+        restore_threads(state)
+
+        self.assertEqual(os.environ["OMP_NUM_THREADS"], "8")
+        self.assertNotIn("MKL_NUM_THREADS", os.environ)
+
+
+    def test_thread_limits(self):
+        with thread_limits(None):
+            self.assertEqual(os.environ.get("OPENBLAS_NUM_THREADS"),
+                             self.environment["OPENBLAS_NUM_THREADS"])
+
+        with thread_limits(3):
+            self.assertEqual(os.environ["OPENBLAS_NUM_THREADS"], "3")
+
+        self.assertEqual(os.environ.get("OPENBLAS_NUM_THREADS"),
+                         self.environment["OPENBLAS_NUM_THREADS"])
+
+
+    def test_parse_cpulist(self):
+        self.assertEqual(parse_cpulist("0-3,8,10-11\n"), set([0, 1, 2, 3, 8, 10, 11]))
+        self.assertEqual(parse_cpulist(""), set())
+
+
+    def test_cpu_sets(self):
+        cores = cpu_sets("core")
+
+        self.assertTrue(all(len(cpus) == 1 for cpus in cores))
+        self.assertEqual(set.union(*cpu_sets("numa")), set.union(*cores))
+
+        with self.assertRaises(ValueError):
+            cpu_sets("socket")
+
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "requires os.sched_setaffinity")
+    def test_pin_process(self):
+        affinity = os.sched_getaffinity(0)
+        cores = cpu_sets("core")
+
+        try:
+            cpus = pin_process(len(cores) + 1)
+
+            self.assertEqual(cpus, cores[1 % len(cores)])
+            self.assertEqual(os.sched_getaffinity(0), cpus)
+        finally:
+            os.sched_setaffinity(0, affinity)
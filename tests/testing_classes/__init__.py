@@ -1,9 +1,9 @@
 from .testing_models import TestingModel0d, TestingModel1d, TestingModel2d
 from .testing_models import TestingModelNoTime, TestingModelNoTimeU
 from .testing_models import TestingModelAdaptive, TestingModelConstant
-from .testing_models import TestingModelIncomplete
+from .testing_models import TestingModelIncomplete, TestingModelSetup, TestingModelAsync
 from .testing_models import PostprocessErrorNumpy, PostprocessErrorValue, PostprocessErrorOne
-from .testing_models import model_function
+from .testing_models import model_function, model_function_batch
 
 from .testing_features import TestingFeatures
 from .testing_uncertainty import TestingUncertaintyCalculations
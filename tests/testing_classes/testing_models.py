@@ -1,5 +1,6 @@
 from uncertainpy import Model
 import numpy as np
+import asyncio
 
 
 
@@ -10,6 +11,13 @@ def model_function(a=1, b=2):
     return time, values
 
 
+def model_function_batch(a=1, b=2):
+    time = np.arange(0, 10)
+    values = np.arange(0, 10) + (np.asarray(a) + np.asarray(b))[:, np.newaxis]
+
+    return time, values
+
+
 
 class TestingModel0d(Model):
     def __init__(self):
@@ -101,6 +109,45 @@ class TestingModelNoTimeU(Model):
 
 
 
+class TestingModelSetup(Model):
+    def __init__(self):
+        super(TestingModelSetup, self).__init__(labels=["x", "y"], logger_level=None)
+
+        self.nr_setups = 0
+        self.nr_teardowns = 0
+
+
+    def setup(self):
+        self.nr_setups += 1
+
+
+    def teardown(self):
+        self.nr_teardowns += 1
+
+
+    def run(self, a=1, b=2):
+        time = np.arange(0, 2)
+        values = np.array([self.nr_setups, a + b])
+
+        return time, values
+
+
+
+class TestingModelAsync(Model):
+    def __init__(self):
+        super(TestingModelAsync, self).__init__(labels=["x", "y"], logger_level=None)
+
+
+    async def run(self, a=1, b=2):
+        await asyncio.sleep(0.01)
+
+        time = np.arange(0, 10)
+        values = np.arange(0, 10) + a + b
+
+        return time, values
+
+
+
 class TestingModelThree(Model):
     def __init__(self):
         super(TestingModelThree, self).__init__(labels=["x", "y"], logger_level=None)
@@ -12,7 +12,9 @@ class TestingUncertaintyCalculations(UncertaintyCalculations):
                          quadrature_order=4,
                          nr_pc_mc_samples=10**4,
                          allow_incomplete=False,
-                         seed=None):
+                         seed=None,
+                         tolerance=10**-3,
+                         max_evaluations=None):
 
         arguments = {}
 
@@ -26,6 +28,8 @@ class TestingUncertaintyCalculations(UncertaintyCalculations):
         arguments["nr_pc_mc_samples"] = nr_pc_mc_samples
         arguments["seed"] = seed
         arguments["allow_incomplete"] = allow_incomplete
+        arguments["tolerance"] = tolerance
+        arguments["max_evaluations"] = max_evaluations
 
 
         data = Data(logger_level=None)